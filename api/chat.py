@@ -9,6 +9,10 @@ from qdrant_client.http import models
 import google.generativeai as genai
 from dotenv import load_dotenv
 from datetime import datetime
+from app.hybrid_searcher import EVENTS_COLLECTION
+from app.tracing import span
+from app.embedding import DENSE_MODEL, configure_model, query_batcher
+from app.backends import QDRANT_TIMEOUT, LLM_TIMEOUT, UNAVAILABLE_ERRORS, qdrant_breaker, llm_breaker, record_degraded
 
 # Load environment variables
 load_dotenv()
@@ -37,10 +41,11 @@ def initialize_services():
         logger.info("Connecting to Qdrant Cloud...")
         qdrant_client = QdrantClient(
             url=os.getenv("QDRANT_URL"),
-            api_key=os.getenv("QDRANT_API_KEY")
+            api_key=os.getenv("QDRANT_API_KEY"),
+            timeout=QDRANT_TIMEOUT
         )
         # Set the same models as hybrid_searcher
-        qdrant_client.set_model("sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2")
+        configure_model(qdrant_client, DENSE_MODEL)
         
         # Initialize Gemini API
         logger.info("Initializing Gemini API...")
@@ -83,9 +88,12 @@ class ChatResponse(BaseModel):
     query_embedding_time: float
     search_time: float
     generation_time: float
+    # True when the LLM was slow or down and `text` is a canned summary of the search results
+    degraded: bool = False
 
+# Sync, so FastAPI runs it in the threadpool and a slow LLM never blocks the event loop
 @router.post("/chat", response_model=ChatResponse)
-async def chat_with_events(request: ChatRequest):
+def chat_with_events(request: ChatRequest):
     """
     Process a chat query by:
     1. Embedding the query using Qdrant's query method
@@ -98,15 +106,22 @@ async def chat_with_events(request: ChatRequest):
         
         logger.info(f"Processing chat query: '{request.query}'")
         
-        # Step 1: Use Qdrant's query method (which handles embedding internally)
+        # Step 1: Embed the query, batched with concurrent search/chat queries
         start_time = time.time()
+        with span("embedding.query"):
+            query_vector = query_batcher(qdrant_client, DENSE_MODEL).embed(request.query)
+        query_embedding_time = time.time() - start_time
         
-        # Step 2: Search Qdrant for relevant events using query method like hybrid_searcher
-        search_results = qdrant_client.query(
-            collection_name="events",
-            query_text=request.query,
-            limit=request.max_results
-        )
+        # Step 2: Search Qdrant for relevant events with that vector
+        start_time = time.time()
+        with qdrant_breaker.guard(), span("qdrant.query_points", collection=EVENTS_COLLECTION, limit=request.max_results):
+            search_results = qdrant_client.query_points(
+                collection_name=EVENTS_COLLECTION,
+                query=query_vector,
+                using=qdrant_client.get_vector_field_name(),
+                limit=request.max_results,
+                with_payload=True
+            ).points
         
         search_time = time.time() - start_time
         logger.info(f"Qdrant search completed in {search_time:.3f}s, found {len(search_results)} results")
@@ -178,11 +193,16 @@ If no relevant events were found, suggest alternative search terms or popular ev
 
 Response:"""
 
+        degraded = False
         try:
-            response = genai_client.generate_content(prompt)
+            with llm_breaker.guard(), span("gemini.generate_content", model="gemini-2.0-flash"):
+                response = genai_client.generate_content(prompt, request_options={"timeout": LLM_TIMEOUT})
             generated_text = response.text
         except Exception as e:
             logger.error(f"Gemini API error: {str(e)}")
+            # Search-only response: the events found, without a generated answer
+            degraded = True
+            record_degraded("chat_search_only")
             # Fallback response
             if events:
                 generated_text = f"I found {len(events)} events related to your query '{request.query}'. Here are the top matches that might interest you!"
@@ -195,11 +215,15 @@ Response:"""
         return ChatResponse(
             text=generated_text,
             events=events,
-            query_embedding_time=0.0,  # Embedding is handled internally by Qdrant
+            query_embedding_time=query_embedding_time,
             search_time=search_time,
-            generation_time=generation_time
+            generation_time=generation_time,
+            degraded=degraded
         )
         
+    except (HTTPException,) + UNAVAILABLE_ERRORS:
+        # Unavailable backends become 503 with Retry-After in the app's exception handlers
+        raise
     except Exception as e:
         logger.error(f"Error in chat endpoint: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e)) 
\ No newline at end of file
+        raise HTTPException(status_code=500, detail="Internal Server Error")
\ No newline at end of file
@@ -3,30 +3,32 @@ import os
 import psycopg2
 from psycopg2.extras import RealDictCursor
 import logging
-from app.hybrid_searcher import HybridSearcher, models, DatabasePool
+from app.hybrid_searcher import HybridSearcher, models, DatabasePool, EVENTS_COLLECTION
+from app.reference_data import reference_data
+from app.tracing import span, traced, with_context
+from app.redis_pool import get_redis, mget_json, setex_many_json
+from app.tiered_cache import cache_version
+from app.metrics import record_cache
+from app.backends import record_degraded
 from typing import Dict, List
 import asyncio
 from concurrent.futures import ThreadPoolExecutor
 import redis
-import json
 from datetime import timedelta
 from typing import Optional
 from fastapi import Query
 
 router = APIRouter()
 
-# Initialize Redis client
-redis_client = redis.Redis(
-    host=os.getenv('REDIS_HOST', 'redis'),  # Use environment variable or default to 'redis'
-    port=int(os.getenv('REDIS_PORT', 6379)),
-    decode_responses=True,  # This will automatically decode responses to strings
-    socket_connect_timeout=5,  # Add timeout
-    retry_on_timeout=True  # Retry on timeout
-)
+# Shared pooled Redis client
+redis_client = get_redis()
+hybrid_searcher = HybridSearcher(collection_name=EVENTS_COLLECTION)
 
-CACHE_KEY = "events_by_category_base"
+# One entry per category section, so an expired section is recomputed on its own
+CACHE_KEY_PREFIX = "events_by_category:"
 CACHE_DURATION = timedelta(minutes=10)
 
+@traced("events_by_category.fetch_category")
 def fetch_category_events(searcher: HybridSearcher, category_code: str, category_name_en: str, category_name_vi: str, userId: Optional[str] = None) -> tuple:
     """Fetch events for a single category"""
     extra_filter = models.Filter(
@@ -54,20 +56,13 @@ def fetch_category_events(searcher: HybridSearcher, category_code: str, category
 
 def fetch_user_interests(user_id: str) -> set:
     """Fetch user's interested event IDs"""
-    conn = None
-    try:
-        db_pool = DatabasePool.get_instance()
-        conn = db_pool.get_connection()
+    with DatabasePool.get_instance().connection() as conn:
         cursor = conn.cursor(cursor_factory=RealDictCursor)
-        cursor.execute("""
-            SELECT event_id FROM interests WHERE user_id = %s
-        """, (user_id,))
-        return {row["event_id"] for row in cursor.fetchall()}
-    finally:
-        if cursor:
-            cursor.close()
-        if conn:
-            db_pool.release_connection(conn)
+        with span("postgres.interests"):
+            cursor.execute("""
+                SELECT event_id FROM interests WHERE user_id = %s
+            """, (user_id,))
+            return {row["event_id"] for row in cursor.fetchall()}
 
 def annotate_events_with_interests(events: List[dict], interested_ids: set) -> List[dict]:
     """Add isInterested field to events based on user's interests"""
@@ -75,72 +70,71 @@ def annotate_events_with_interests(events: List[dict], interested_ids: set) -> L
         event["isInterested"] = event["id"] in interested_ids
     return events
 
+def section_key(category_code: str) -> str:
+    """Cache key of one category's section, in the current cache generation"""
+    return f"{CACHE_KEY_PREFIX}{EVENTS_COLLECTION}:{category_code}:v{cache_version.current(redis_client)}"
+
+def fetch_sections(categories: List[dict]) -> Dict[str, dict]:
+    """Fetch the sections of `categories` concurrently, keyed by category code"""
+    # Use ThreadPoolExecutor to fetch events for all categories concurrently
+    with ThreadPoolExecutor(max_workers=max(1, min(10, len(categories)))) as executor:
+        futures = [
+            executor.submit(
+                with_context(fetch_category_events),  # keep worker spans in this request's trace
+                hybrid_searcher,
+                category["code"].lower(),
+                category["name"]["en"],
+                category["name"]["vi"],
+                None  # Don't pass userId here to get base data
+            )
+            for category in categories
+        ]
+        return dict(future.result() for future in futures)
+
+# Sync, so FastAPI runs it in the threadpool and slow backends never block the event loop
 @router.get("/events-by-category")
-async def get_events_by_category(userId: Optional[str] = Query(default=None)):
-    # Try to get base data from cache first
-    cached_data = redis_client.get(CACHE_KEY)
-    categorized_events = None
-    
-    if cached_data:
+def get_events_by_category(userId: Optional[str] = Query(default=None)):
+    # Categories come from the in-process reference data cache, not Postgres
+    categories = reference_data.get().categories
+    keys = [section_key(category["code"].lower()) for category in categories]
+
+    # Read every section in one MGET; missing or undecodable ones come back as None
+    cached = [None] * len(keys)
+    try:
+        with span("redis.mget", cache_namespace="events_by_category"):
+            cached = mget_json(keys, redis_client)
+    except redis.RedisError as e:
+        logging.warning(f"Cache retrieval failed, fetching fresh data: {e}")
+
+    hits = sum(section is not None for section in cached)
+    record_cache("events_by_category", True, hits)
+    record_cache("events_by_category", False, len(keys) - hits)
+
+    # Recompute only the sections that expired or were never cached
+    missing = [category for category, section in zip(categories, cached) if section is None]
+    fresh = {}
+    if missing:
         try:
-            categorized_events = json.loads(cached_data)
-        except json.JSONDecodeError:
-            logging.warning("Failed to decode cached data, fetching fresh data")
+            fresh = fetch_sections(missing)
+        except Exception as e:
+            logging.error("Error fetching events by category: %s", e)
+            raise HTTPException(status_code=500, detail="Internal Server Error")
 
-    # If no cached data, fetch fresh data
-    if not categorized_events:
-        conn = None
+        # Write the recomputed sections back in one pipeline
         try:
-            db_pool = DatabasePool.get_instance()
-            conn = db_pool.get_connection()
-            cursor = conn.cursor(cursor_factory=RealDictCursor)
-            
-            # Fetch all categories in a single query
-            cursor.execute("SELECT code, name_en, name_vi FROM categories")
-            categories = cursor.fetchall()
-
-            # Initialize HybridSearcher
-            searcher = HybridSearcher(collection_name="events")
-
-            # Use ThreadPoolExecutor to fetch events for all categories concurrently
-            with ThreadPoolExecutor(max_workers=min(10, len(categories))) as executor:
-                # Create tasks for each category
-                futures = [
-                    executor.submit(
-                        fetch_category_events,
-                        searcher,
-                        category["code"].lower(),
-                        category["name_en"],
-                        category["name_vi"],
-                        None  # Don't pass userId here to get base data
-                    )
-                    for category in categories
-                ]
-                
-                # Collect results as they complete
-                categorized_events = {}
-                for future in futures:
-                    category_code, result = future.result()
-                    categorized_events[category_code] = result
-
-            # Cache the base results
-            try:
-                redis_client.setex(
-                    CACHE_KEY,
+            with span("redis.setex", cache_namespace="events_by_category"):
+                setex_many_json(
+                    {section_key(code): section for code, section in fresh.items()},
                     CACHE_DURATION,
-                    json.dumps(categorized_events)
+                    redis_client
                 )
-            except redis.RedisError as e:
-                logging.error(f"Failed to cache data: {e}")
+        except redis.RedisError as e:
+            logging.error(f"Failed to cache data: {e}")
 
-        except Exception as e:
-            logging.error("Error fetching events by category: %s", e)
-            raise HTTPException(status_code=500, detail="Internal Server Error")
-        finally:
-            if cursor:
-                cursor.close()
-            if conn:
-                db_pool.release_connection(conn)
+    categorized_events = {}
+    for category, section in zip(categories, cached):
+        code = category["code"].lower()
+        categorized_events[code] = section if section is not None else fresh[code]
 
     # If userId is provided, fetch and add interest data
     if userId:
@@ -155,5 +149,6 @@ async def get_events_by_category(userId: Optional[str] = Query(default=None)):
         except Exception as e:
             logging.error(f"Error fetching user interests: {e}")
             # Continue without interest data if there's an error
+            record_degraded("interests_skipped")
 
     return categorized_events
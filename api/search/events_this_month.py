@@ -1,6 +1,6 @@
 from fastapi import APIRouter
 from datetime import datetime, timedelta
-from app.hybrid_searcher import HybridSearcher
+from app.hybrid_searcher import HybridSearcher, EVENTS_COLLECTION
 from app.cache_decorator import cache_endpoint
 import calendar
 import logging
@@ -10,7 +10,7 @@ from fastapi import Query
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 router = APIRouter()
-hybrid_searcher = HybridSearcher(collection_name="events")
+hybrid_searcher = HybridSearcher(collection_name=EVENTS_COLLECTION)
 
 @router.get("/events/this-month")
 @cache_endpoint(duration_minutes=10, prefix="events_month")
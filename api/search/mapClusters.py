@@ -0,0 +1,40 @@
+from fastapi import APIRouter, Query, HTTPException
+from api.search.semanticSearch import hybrid_searcher, build_categories_filter
+from app.map_clusters import viewport_clusters, MAX_REPRESENTATIVES
+from app.reference_data import normalize_city
+from typing import Optional
+
+router = APIRouter()
+
+@router.get("/map/clusters")
+def get_map_clusters(
+    min_lat: float = Query(..., ge=-90, le=90),
+    max_lat: float = Query(..., ge=-90, le=90),
+    min_lon: float = Query(..., ge=-180, le=180),
+    max_lon: float = Query(..., ge=-180, le=180),
+    zoom: int = Query(..., ge=0, le=22, description="Map zoom level; sets the cluster cell size"),
+    city: Optional[str] = Query(default=None),
+    categories: Optional[list[str]] = Query(default=None),
+    startDate: Optional[str] = Query(default=None),
+    endDate: Optional[str] = Query(default=None),
+    representatives: int = Query(default=1, ge=0, le=MAX_REPRESENTATIVES, description="Events returned per cluster"),
+):
+    """
+    Aggregate events in a map viewport into geohash cells with counts and a few
+    representative events each, instead of returning every hit.
+    """
+    if min_lat > max_lat or min_lon > max_lon:
+        raise HTTPException(status_code=400, detail="min_lat/min_lon must not exceed max_lat/max_lon")
+
+    try:
+        return viewport_clusters(
+            hybrid_searcher,
+            min_lat, max_lat, min_lon, max_lon, zoom,
+            city=normalize_city(city),
+            extra_filter=build_categories_filter(categories),
+            startDate=startDate,
+            endDate=endDate,
+            representatives=representatives
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
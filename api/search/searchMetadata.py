@@ -1,59 +1,51 @@
-from fastapi import APIRouter
-import os
-import psycopg2
-from psycopg2.extras import RealDictCursor
-from app.hybrid_searcher import DatabasePool
+from fastapi import APIRouter, Request, Response
+import json
+from app.reference_data import reference_data
+from app.query_log import query_log
 
 router = APIRouter()
 
-@router.get("/metadata")
-def get_search_metadata():
-    conn = None
-    try:
-        db_pool = DatabasePool.get_instance()
-        conn = db_pool.get_connection()
-        cursor = conn.cursor(cursor_factory=RealDictCursor)
-        # Fetch categories
-        cursor.execute("SELECT id, code, name_en, name_vi, image FROM categories ORDER BY name_en ASC")
-        categories = [
-            {
-                "name": {"en": row["name_en"], "vi": row["name_vi"]},
-                "id": row["id"],
-                "code": row["code"],
-                "image": row["image"],
-                "deeplink": f"https://ticketbox.vn/search?cate={row['code']}&utm_medium=cate-{row['code']}&utm_source=tkb-view-search"
-            }
-            for row in cursor.fetchall()
-        ]
-        # Fetch cities
-        cursor.execute("SELECT id, origin_id, name, name_en FROM cities WHERE status=1 ORDER BY sort ASC, name_en ASC")
-        cities = [
-            {
-                "id": row["origin_id"],
-                "code": row["origin_id"],
-                "name": {"en": row["name_en"], "vi": row["name"]},
-                "image": "",  # You can add image URLs if you have them
-                "deeplink": f"https://ticketbox.vn/search?local={row['origin_id']}&utm_medium={row['origin_id']}&utm_source=tkb-view-search"
+# Serialized response for the current reference data and trending version: (version, body)
+_metadata_body = (None, b"")
+
+def _build_metadata_body(snapshot, trending) -> bytes:
+    response = {
+        "status": 1,
+        "message": "Success",
+        "data": {
+            "result": {
+                "categories": snapshot.categories,
+                "cities": snapshot.cities,
+                "promotions": None,
+                "trendingKeywords": trending
             }
-            for row in cursor.fetchall()
-        ]
-        response = {
-            "status": 1,
-            "message": "Success",
-            "data": {
-                "result": {
-                    "categories": categories,
-                    "cities": cities,
-                    "promotions": None,
-                    "trendingKeywords": []  # You can fill this if you have trending keywords logic
-                }
-            },
-            "code": 0,
-            "traceId": ""
-        }
-        return response
-    finally:
-        if cursor:
-            cursor.close()
-        if conn:
-            db_pool.release_connection(conn)
+        },
+        "code": 0,
+        "traceId": ""
+    }
+    return json.dumps(response, ensure_ascii=False).encode("utf-8")
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+@router.get("/metadata")
+def get_search_metadata(request: Request):
+    global _metadata_body
+    snapshot = reference_data.get()
+    trending, trending_version = query_log.trending_snapshot()
+    current_version = f"{snapshot.version}-{trending_version}"
+    etag = f'"{current_version}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    version, body = _metadata_body
+    if version != current_version:
+        body = _build_metadata_body(snapshot, trending)
+        _metadata_body = (current_version, body)
+
+    return Response(content=body, media_type="application/json", headers=headers)
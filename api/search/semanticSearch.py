@@ -1,13 +1,62 @@
-from fastapi import APIRouter, Query, Depends
-from app.hybrid_searcher import HybridSearcher, models
+from fastapi import APIRouter, Query, Depends, HTTPException
+from app.hybrid_searcher import HybridSearcher, models, EVENTS_COLLECTION, DEFAULT_DISTANCE_WEIGHT
 from app.auth import optional_verify_token
+from app.facets import parse_facet_names, submit_facets, FACET_NAMES, FACET_TIMEOUT_SECONDS
+from app.backends import record_degraded
+from app.query_log import query_log
+from app.reference_data import normalize_city
+from app.text_normalization import normalize_query
+import logging
 from typing import Optional
 from datetime import datetime, timedelta
 
 router = APIRouter()
-hybrid_searcher = HybridSearcher(collection_name="events")
+hybrid_searcher = HybridSearcher(collection_name=EVENTS_COLLECTION)
 score_thresholds = 0.3
 
+def build_categories_filter(categories: Optional[list[str]]):
+    """Build the categories filter shared by text and voice search"""
+    if not categories:
+        return None
+    # If categories is a list of 1 element containing commas -> split
+    if len(categories) == 1 and ',' in categories[0]:
+        categories = [cat.strip() for cat in categories[0].split(",") if cat.strip()]
+
+    categories_lower = [normalize_query(cat) for cat in categories]
+    return models.Filter(
+        must=[models.FieldCondition(key="categories", match=models.MatchAny(any=categories_lower))]  # Filter by categories
+    )
+
+def validate_search_params(lat, lon, radius_km, sort, min_price, max_price, facets) -> list[str]:
+    """Reject inconsistent geo/price parameters with 400 and return the requested facet names"""
+    if (radius_km is not None or sort in ("distance", "blend")) and (lat is None or lon is None):
+        raise HTTPException(status_code=400, detail="lat and lon are required for radius_km and distance sorting")
+    if min_price is not None and max_price is not None and min_price > max_price:
+        raise HTTPException(status_code=400, detail="minPrice must not exceed maxPrice")
+    try:
+        return parse_facet_names(facets)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def add_facets(response: dict, facets_future):
+    """Set `facets` from the background computation, or flag `facetsDegraded` if it is slow or failed"""
+    try:
+        response["facets"] = facets_future.result(timeout=FACET_TIMEOUT_SECONDS)
+        response["facetsDegraded"] = False
+    except Exception as e:
+        # The results are already in hand; the facets are not worth failing them for
+        logging.warning(f"Facets unavailable, answering without them: {e!r}")
+        record_degraded("facets_skipped")
+        response["facetsDegraded"] = True
+
+def prewarm_queries(queries: list[str]):
+    """Embed popular queries and fill the first-page search cache for them"""
+    for query in queries:
+        try:
+            hybrid_searcher.search(text=query, score_thresholds=score_thresholds)
+        except Exception as e:
+            logging.warning(f"Pre-warming '{query}' failed: {e}")
+
 @router.get("")
 def search_events(
     q: Optional[str] = Query(default=None, description="Search query (optional, leave empty to search by category or city only)"),
@@ -22,34 +71,53 @@ def search_events(
     max_lat: Optional[float] = Query(default=None, description="Maximum latitude for bounding box filter"),
     min_lon: Optional[float] = Query(default=None, description="Minimum longitude for bounding box filter"),
     max_lon: Optional[float] = Query(default=None, description="Maximum longitude for bounding box filter"),
+    lat: Optional[float] = Query(default=None, ge=-90, le=90, description="Latitude of the user's position"),
+    lon: Optional[float] = Query(default=None, ge=-180, le=180, description="Longitude of the user's position"),
+    radius_km: Optional[float] = Query(default=None, gt=0, le=500, description="Only events within this radius of lat/lon"),
+    minPrice: Optional[float] = Query(default=None, ge=0, description="Minimum ticket price"),
+    maxPrice: Optional[float] = Query(default=None, ge=0, description="Maximum ticket price"),
+    free: Optional[bool] = Query(default=None, description="true: only free events, false: only paid events"),
+    sort: str = Query(default="relevance", pattern="^(relevance|distance|blend|price|date)$", description="relevance, distance, blend of both, price (cheapest first) or date (soonest first)"),
+    distance_weight: float = Query(default=DEFAULT_DISTANCE_WEIGHT, ge=0, le=1, description="Proximity weight for sort=blend"),
+    facets: Optional[list[str]] = Query(default=None, description=f"Facet counts to include: {', '.join(FACET_NAMES)}"),
     user: Optional[dict] = Depends(optional_verify_token),
 ):
     """
     Search for events using semantic text, category, city, and date filters.
     Pagination is handled by `page` and `limit` parameters.
+    With `lat`/`lon`, results carry `distanceKm`; `radius_km` restricts to a circle and
+    `sort=distance|blend` ranks by proximity server-side.
+    `minPrice`/`maxPrice`/`free` filter on the lowest ticket price and `sort=price|date`
+    orders by it or by the next upcoming show.
+    `facets=categories,city,price,date` adds counts for the filter chips; if they are
+    slow or fail, the results come back without them and with `facetsDegraded: true`.
     """
-    user_id = user["sub"] if user else None
-    # Lowercase city and categories for case-insensitive search
-    city_lower = city.lower() if city else None
-    categories_lower = None
-    extra_filter = None
+    facet_names = validate_search_params(lat, lon, radius_km, sort, minPrice, maxPrice, facets)
 
-    if categories:
-        # If categories is a list of 1 element containing commas -> split
-        if len(categories) == 1 and ',' in categories[0]:
-            categories = [cat.strip() for cat in categories[0].split(",") if cat.strip()]
-        
-        categories_lower = [cat.lower() for cat in categories]
-        extra_filter = models.Filter(
-            must=[models.FieldCondition(key="categories", match=models.MatchAny(any=categories_lower))]  # Filter by categories
-        )
+    user_id = user["sub"] if user else None
+    # Canonical city (aliases, accents, casing) and lowercased categories
+    city_lower = normalize_city(city)
+    extra_filter = build_categories_filter(categories)
 
     # Get results from searcher
     search_text = q if q is not None else ""
+    if search_text and page == 1:
+        query_log.record(search_text)
     
     # Calculate offset based on page and limit (offset = (page - 1) * limit)
     offset = (page - 1) * limit
-    
+
+    facets_future = None
+    if facet_names:
+        # Runs alongside the search below
+        facets_future = submit_facets(
+            hybrid_searcher, facet_names,
+            city=city_lower, extra_filter=extra_filter, startDate=startDate, endDate=endDate,
+            min_lat=min_lat, max_lat=max_lat, min_lon=min_lon, max_lon=max_lon,
+            lat=lat, lon=lon, radius_km=radius_km,
+            min_price=minPrice, max_price=maxPrice, free=free
+        )
+
     results = hybrid_searcher.search(
         text=search_text,
         city=city_lower,
@@ -63,11 +131,22 @@ def search_events(
         max_lat=max_lat,
         min_lon=min_lon,
         max_lon=max_lon,
-        score_thresholds=score_thresholds
+        score_thresholds=score_thresholds,
+        lat=lat,
+        lon=lon,
+        radius_km=radius_km,
+        sort=sort,
+        distance_weight=distance_weight,
+        min_price=minPrice,
+        max_price=maxPrice,
+        free=free
     )
 
-    return {
+    response = {
         "result": results,
         "page": page,  # Return current page
         "limit": limit,  # Return limit
     }
+    if facets_future:
+        add_facets(response, facets_future)
+    return response
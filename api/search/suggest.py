@@ -0,0 +1,20 @@
+from fastapi import APIRouter, Query
+from app.suggest import suggest_index
+
+router = APIRouter()
+
+@router.get("/suggest")
+def suggest(
+    q: str = Query(default="", description="What the user has typed so far"),
+    limit: int = Query(default=8, ge=1, le=20),
+):
+    """
+    Typeahead suggestions (events, categories, cities and popular queries) matching
+    the typed prefix, diacritic-insensitive. Served from memory: no embedding or
+    vector search per keystroke.
+    """
+    suggestions = [
+        {k: v for k, v in entry.items() if k != "weight"}
+        for entry in suggest_index.get().lookup(q, limit)
+    ]
+    return {"suggestions": suggestions}
@@ -0,0 +1,149 @@
+from fastapi import APIRouter, Query, UploadFile, File, HTTPException
+from fastapi.responses import StreamingResponse
+from api.search.semanticSearch import (hybrid_searcher, score_thresholds, build_categories_filter,
+                                       validate_search_params, add_facets)
+from app.hybrid_searcher import DEFAULT_DISTANCE_WEIGHT
+from app.facets import submit_facets, FACET_NAMES
+from api.speech import validate_wav_bytes, transcribe_audio, stream_transcribe_audio
+from app.reference_data import normalize_city
+from typing import Optional
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+router = APIRouter()
+
+# Sync, so FastAPI runs it in the threadpool: transcription and search block on gRPC, Qdrant and Postgres
+@router.post("/voice")
+def voice_search(
+    file: UploadFile = File(...),
+    language_code: Optional[str] = "vi-VN",
+    stream: bool = Query(default=False, description="Stream NDJSON lines while recognition is in progress"),
+    partial_results: bool = Query(default=False, description="When streaming, also search on interim transcripts"),
+    limit: int = Query(default=15, ge=1, le=100),
+    page: int = Query(default=1, ge=1),
+    city: Optional[str] = Query(default=None),
+    categories: Optional[list[str]] = Query(default=None),
+    userId: Optional[str] = Query(default=None),
+    startDate: Optional[str] = Query(default=None),
+    endDate: Optional[str] = Query(default=None),
+    min_lat: Optional[float] = Query(default=None),
+    max_lat: Optional[float] = Query(default=None),
+    min_lon: Optional[float] = Query(default=None),
+    max_lon: Optional[float] = Query(default=None),
+    lat: Optional[float] = Query(default=None, ge=-90, le=90),
+    lon: Optional[float] = Query(default=None, ge=-180, le=180),
+    radius_km: Optional[float] = Query(default=None, gt=0, le=500),
+    minPrice: Optional[float] = Query(default=None, ge=0),
+    maxPrice: Optional[float] = Query(default=None, ge=0),
+    free: Optional[bool] = Query(default=None),
+    sort: str = Query(default="relevance", pattern="^(relevance|distance|blend|price|date)$"),
+    distance_weight: float = Query(default=DEFAULT_DISTANCE_WEIGHT, ge=0, le=1),
+    facets: Optional[list[str]] = Query(default=None, description=f"Facet counts to include: {', '.join(FACET_NAMES)}"),
+):
+    """
+    Transcribe a WAV recording and search events with the transcript in one request.
+    Accepts the same filters, sorts and facets as `/api/search`, so a voice query costs
+    a single round trip. Facets do not depend on the transcript; when streaming they
+    come with the final line.
+    """
+    facet_names = validate_search_params(lat, lon, radius_km, sort, minPrice, maxPrice, facets)
+    if not file.filename.lower().endswith('.wav'):
+        raise HTTPException(status_code=400, detail="Only WAV files are supported. Please upload a .wav file")
+
+    content = file.file.read()
+    if len(content) == 0:
+        raise HTTPException(status_code=400, detail="Empty file received")
+
+    is_valid, message = validate_wav_bytes(content)
+    if not is_valid:
+        raise HTTPException(status_code=400, detail=f"Invalid WAV file: {message}")
+
+    city_lower = normalize_city(city)
+    extra_filter = build_categories_filter(categories)
+    offset = (page - 1) * limit
+
+    def run_search(text: str):
+        return hybrid_searcher.search(
+            text=text,
+            city=city_lower,
+            limit=limit,
+            offset=offset,
+            user_id=userId,
+            extra_filter=extra_filter,
+            startDate=startDate,
+            endDate=endDate,
+            min_lat=min_lat,
+            max_lat=max_lat,
+            min_lon=min_lon,
+            max_lon=max_lon,
+            score_thresholds=score_thresholds,
+            lat=lat,
+            lon=lon,
+            radius_km=radius_km,
+            sort=sort,
+            distance_weight=distance_weight,
+            min_price=minPrice,
+            max_price=maxPrice,
+            free=free
+        )
+
+    def start_facets():
+        if not facet_names:
+            return None
+        return submit_facets(
+            hybrid_searcher, facet_names,
+            city=city_lower, extra_filter=extra_filter, startDate=startDate, endDate=endDate,
+            min_lat=min_lat, max_lat=max_lat, min_lon=min_lon, max_lon=max_lon,
+            lat=lat, lon=lon, radius_km=radius_km,
+            min_price=minPrice, max_price=maxPrice, free=free
+        )
+
+    if not stream:
+        try:
+            transcript = transcribe_audio(content, language_code)
+        except Exception as e:
+            logger.error(f"Voice search transcription failed: {str(e)}")
+            raise HTTPException(status_code=500, detail=str(e))
+        facets_future = start_facets()
+        response = {
+            "transcript": transcript,
+            "result": run_search(transcript) if transcript else [],
+            "page": page,
+            "limit": limit,
+        }
+        if facets_future:
+            add_facets(response, facets_future)
+        return response
+
+    def event_stream():
+        last_searched = None
+        # Computed while the audio is still being recognised
+        facets_future = start_facets()
+        try:
+            for transcript, is_final in stream_transcribe_audio(content, language_code):
+                if is_final:
+                    line = {
+                        "type": "final",
+                        "transcript": transcript,
+                        "result": run_search(transcript) if transcript else [],
+                        "page": page,
+                        "limit": limit,
+                    }
+                    if facets_future:
+                        add_facets(line, facets_future)
+                    yield json.dumps(line) + "\n"
+                    continue
+
+                line = {"type": "partial", "transcript": transcript}
+                # Only re-search when the hypothesis actually changed
+                if partial_results and transcript and transcript != last_searched:
+                    line["result"] = run_search(transcript)
+                    last_searched = transcript
+                yield json.dumps(line) + "\n"
+        except Exception as e:
+            # Headers are already sent, so report the failure in-band
+            logger.error(f"Voice search streaming failed: {str(e)}")
+            yield json.dumps({"type": "error", "detail": str(e)}) + "\n"
+
+    return StreamingResponse(event_stream(), media_type="application/x-ndjson")
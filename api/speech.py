@@ -7,6 +7,7 @@ from google.oauth2 import service_account
 import logging
 import wave
 import contextlib
+import io
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
@@ -16,14 +17,22 @@ router = APIRouter()
 
 def validate_wav_file(file_path):
     """Validate WAV file format and return audio properties"""
+    try:
+        with open(file_path, "rb") as wav_file:
+            return validate_wav_bytes(wav_file.read())
+    except OSError as e:
+        logger.error(f"Invalid WAV file: {str(e)}")
+        return False, str(e)
+
+def validate_wav_bytes(content: bytes):
+    """Validate in-memory WAV content without writing it to disk"""
     try:
         # Check file size first
-        file_size = os.path.getsize(file_path)
-        if file_size < 44:  # WAV header is 44 bytes
-            logger.error(f"File too small: {file_size} bytes (minimum 44 bytes for WAV header)")
+        if len(content) < 44:  # WAV header is 44 bytes
+            logger.error(f"File too small: {len(content)} bytes (minimum 44 bytes for WAV header)")
             return False, "File is too small to be a valid WAV file"
 
-        with contextlib.closing(wave.open(file_path, 'rb')) as wav_file:
+        with contextlib.closing(wave.open(io.BytesIO(content), 'rb')) as wav_file:
             # Get audio properties
             n_channels = wav_file.getnchannels()
             sample_width = wav_file.getsampwidth()
@@ -45,8 +54,76 @@ def validate_wav_file(file_path):
         logger.error(f"Invalid WAV file: {str(e)}")
         return False, str(e)
 
+_speech_client = None
+
+def get_speech_client():
+    """Return a shared Speech-to-Text client built from the service account file"""
+    global _speech_client
+    if _speech_client is None:
+        # Get the absolute path to the service account file
+        current_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        credentials_path = os.path.join(current_dir, "config", "gcloud", "service-account.json")
+        credentials = service_account.Credentials.from_service_account_file(credentials_path)
+        _speech_client = speech.SpeechClient(credentials=credentials)
+    return _speech_client
+
+def _recognition_config(language_code: str, sample_rate_hertz: int = 16000):
+    return speech.RecognitionConfig(
+        encoding=speech.RecognitionConfig.AudioEncoding.LINEAR16,
+        sample_rate_hertz=sample_rate_hertz,
+        language_code=language_code,
+        enable_automatic_punctuation=True,
+        model="default"
+    )
+
+def transcribe_audio(content: bytes, language_code: str = "vi-VN") -> str:
+    """Run a single synchronous recognition over WAV content and return the transcript"""
+    audio = speech.RecognitionAudio(content=content)
+    response = get_speech_client().recognize(config=_recognition_config(language_code), audio=audio)
+    if not response.results:
+        logger.warning("No transcription results returned")
+        return ""
+    # Combine all transcriptions
+    return " ".join([result.alternatives[0].transcript for result in response.results])
+
+def stream_transcribe_audio(content: bytes, language_code: str = "vi-VN", chunk_ms: int = 100):
+    """
+    Run streaming recognition over WAV content.
+
+    Yields (transcript, is_final) tuples: interim hypotheses while the recognizer
+    refines them, then exactly one final tuple with the complete transcript.
+    """
+    with contextlib.closing(wave.open(io.BytesIO(content), 'rb')) as wav_file:
+        frame_rate = wav_file.getframerate()
+        bytes_per_frame = wav_file.getsampwidth() * wav_file.getnchannels()
+        pcm = wav_file.readframes(wav_file.getnframes())
+
+    # Streaming recognition expects raw PCM chunks, so the WAV header is dropped
+    chunk_size = max(bytes_per_frame, int(frame_rate * chunk_ms / 1000) * bytes_per_frame)
+    requests = (
+        speech.StreamingRecognizeRequest(audio_content=pcm[i:i + chunk_size])
+        for i in range(0, len(pcm), chunk_size)
+    )
+    streaming_config = speech.StreamingRecognitionConfig(
+        config=_recognition_config(language_code, frame_rate),
+        interim_results=True
+    )
+
+    final_parts = []
+    for response in get_speech_client().streaming_recognize(config=streaming_config, requests=requests):
+        for result in response.results:
+            if not result.alternatives:
+                continue
+            transcript = result.alternatives[0].transcript
+            if result.is_final:
+                final_parts.append(transcript)
+            else:
+                yield " ".join(final_parts + [transcript]).strip(), False
+    yield " ".join(final_parts).strip(), True
+
+# Sync, so the blocking gRPC transcription runs in the threadpool, not on the event loop
 @router.post("/stt")
-async def speech_to_text(
+def speech_to_text(
     file: UploadFile = File(...),
     language_code: Optional[str] = "vi-VN"
 ):
@@ -72,7 +149,7 @@ async def speech_to_text(
         # Save the uploaded file with its original name
         temp_file_path = os.path.join(temp_dir, file.filename)
         with open(temp_file_path, "wb") as temp_file:
-            content = await file.read()
+            content = file.file.read()
             if len(content) == 0:
                 raise HTTPException(
                     status_code=400,
@@ -91,43 +168,15 @@ async def speech_to_text(
                 detail=f"Invalid WAV file: {message}"
             )
         
-        # Get the absolute path to the service account file
-        current_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        credentials_path = os.path.join(current_dir, "config", "gcloud", "service-account.json")
-        
-        # Initialize the Speech-to-Text client with service account credentials
-        credentials = service_account.Credentials.from_service_account_file(credentials_path)
-        client = speech.SpeechClient(credentials=credentials)
-        
-        # Read the audio file
-        with open(temp_file_path, "rb") as audio_file:
-            content = audio_file.read()
-        
-        # Configure the audio and recognition settings
-        audio = speech.RecognitionAudio(content=content)
-        config = speech.RecognitionConfig(
-            encoding=speech.RecognitionConfig.AudioEncoding.LINEAR16,
-            sample_rate_hertz=16000,
-            language_code=language_code,
-            enable_automatic_punctuation=True,
-            model="default"
-        )
-        
         # Perform the transcription
         logger.info("Processing speech-to-text...")
-        response = client.recognize(config=config, audio=audio)
+        transcript = transcribe_audio(content, language_code)
         
         # Clean up the temporary file
         os.unlink(temp_file_path)
         
-        if not response.results:
-            logger.warning("No transcription results returned")
-            return {"text": ""}
-        
-        # Combine all transcriptions
-        transcript = " ".join([result.alternatives[0].transcript for result in response.results])
-        logger.info(f"Transcription successful: '{transcript}'")
-        
+        if transcript:
+            logger.info(f"Transcription successful: '{transcript}'")
         return {"text": transcript}
         
     except Exception as e:
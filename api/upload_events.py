@@ -1,17 +1,13 @@
-import uuid
 import logging
-from fastapi import APIRouter, HTTPException, BackgroundTasks, status
-from typing import Dict, Any, Optional
-import importlib.util
-import sys
-import os
-from pathlib import Path
-from datetime import datetime
+from fastapi import APIRouter, HTTPException, status
+from typing import Dict, Any
+from app.job_queue import JobQueue
 
 router = APIRouter(prefix="/api/jobs", tags=["jobs"])
 
-# In-memory job store (consider using a proper database in production)
-jobs_store = {}
+# Jobs live in Redis and are executed by `python -m jobs.worker`, not in the API process.
+# The handlers make blocking Redis calls, so they are plain `def` and run in the threadpool.
+job_queue = None
 
 def get_logger():
     logger = logging.getLogger("uvicorn.error")
@@ -23,98 +19,86 @@ def get_logger():
         logger.addHandler(handler)
     return logger
 
-def run_upload_events_job(job_id: str):
-    logger = get_logger()
-    try:
-        logger.info(f"Starting upload events job {job_id}")
-        jobs_store[job_id]["status"] = "running"
-        jobs_store[job_id]["started_at"] = datetime.utcnow().isoformat()
-        
-        # Import the upload_events module
-        upload_events_path = os.path.join(os.path.dirname(__file__), "..", "jobs", "upload_events.py")
-        spec = importlib.util.spec_from_file_location("upload_events", upload_events_path)
-        upload_events = importlib.util.module_from_spec(spec)
-        sys.modules["upload_events"] = upload_events
-        spec.loader.exec_module(upload_events)
-        
-        # Run the main function
-        upload_events.main()
-        
-        jobs_store[job_id].update({
-            "status": "completed",
-            "completed_at": datetime.utcnow().isoformat(),
-            "result": {"status": "success", "message": "Events upload job completed successfully"}
-        })
-        logger.info(f"Completed upload events job {job_id}")
-        
-    except Exception as e:
-        error_msg = f"Error running upload events job: {str(e)}"
-        logger.error(error_msg, exc_info=True)
-        jobs_store[job_id].update({
-            "status": "failed",
-            "completed_at": datetime.utcnow().isoformat(),
-            "error": error_msg
-        })
-        # Re-raise to ensure the background task fails visibly
-        raise
+def get_job_queue() -> JobQueue:
+    global job_queue
+    if job_queue is None:
+        job_queue = JobQueue()
+    return job_queue
+
+def _job_unavailable(e: Exception):
+    get_logger().error(f"Job store unavailable: {str(e)}", exc_info=True)
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail={"status": "error", "message": f"Job store unavailable: {str(e)}"}
+    )
 
 @router.post("/upload-events", response_model=Dict[str, Any], status_code=status.HTTP_202_ACCEPTED)
-async def trigger_upload_events(background_tasks: BackgroundTasks):
+def trigger_upload_events(full_rebuild: bool = False):
     """
-    Trigger the upload events job as a background task.
+    Queue the upload events job for the background worker.
     This will sync events from the database to the vector store.
+    With `full_rebuild=true` the sync loads a new collection version and switches
+    the alias once it is indexed, so searches never see a partial reindex.
+    If a sync is already pending or running, its job id is returned instead.
     """
     try:
-        job_id = str(uuid.uuid4())
-        jobs_store[job_id] = {
-            "id": job_id,
-            "status": "pending",
-            "created_at": datetime.utcnow().isoformat(),
-            "type": "events_upload"
-        }
-        
-        # Run the job in the background
-        background_tasks.add_task(run_upload_events_job, job_id)
-        
-        return {
-            "job_id": job_id,
-            "status": "accepted",
-            "message": "Events upload job has been queued and will run in the background",
-            "check_status": f"/api/jobs/status/{job_id}"
-        }
-        
+        job, created = get_job_queue().enqueue("events_upload", {"full_rebuild": full_rebuild})
     except Exception as e:
-        get_logger().error(f"Failed to start upload events job: {str(e)}", exc_info=True)
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail={"status": "error", "message": f"Failed to start upload events job: {str(e)}"}
-        )
+        raise _job_unavailable(e)
+
+    job_id = job["id"]
+    return {
+        "job_id": job_id,
+        "status": "accepted" if created else "already_queued",
+        "message": "Events upload job has been queued and will run in the background"
+                   if created else f"An events upload job is already {job['status']}",
+        "check_status": f"/api/jobs/status/{job_id}"
+    }
 
 @router.get("/status/{job_id}", response_model=Dict[str, Any])
-async def get_job_status(job_id: str):
-    """Check the status of a background job"""
-    job = jobs_store.get(job_id)
+def get_job_status(job_id: str):
+    """Check the status and progress of a background job"""
+    try:
+        job = get_job_queue().get(job_id)
+    except Exception as e:
+        raise _job_unavailable(e)
     if not job:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail={"status": "error", "message": "Job not found"}
         )
-    
+
     response = {
         "job_id": job_id,
         "status": job["status"],
-        "created_at": job["created_at"]
+        "created_at": job["created_at"],
+        "progress": job["progress"],
+        "cancel_requested": job["cancel_requested"]
     }
-    
+
     if "started_at" in job:
         response["started_at"] = job["started_at"]
-    
+
     if "completed_at" in job:
         response["completed_at"] = job["completed_at"]
-    
+
     if "result" in job:
         response["result"] = job["result"]
     elif "error" in job:
         response["error"] = job["error"]
-    
+
     return response
+
+@router.post("/cancel/{job_id}", response_model=Dict[str, Any], status_code=status.HTTP_202_ACCEPTED)
+def cancel_job(job_id: str):
+    """Request cancellation; a running job stops at its next batch boundary"""
+    try:
+        job = get_job_queue().request_cancel(job_id)
+    except Exception as e:
+        raise _job_unavailable(e)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail={"status": "error", "message": "Job not found"}
+        )
+    return {"job_id": job_id, "status": job["status"], "cancel_requested": job["cancel_requested"]}
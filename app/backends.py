@@ -0,0 +1,98 @@
+"""
+Deadlines and circuit breakers for the API's remote backends.
+
+Every call to Qdrant, Postgres or the LLM has a deadline, so a slow backend
+cannot hold request threads indefinitely. Each backend also has a breaker: after
+BACKEND_BREAKER_FAILURES consecutive timeouts or connection errors, its calls
+fail immediately with the matching *Unavailable error for
+BACKEND_BREAKER_RESET_SECONDS. Callers then degrade instead of failing outright:
+- search serves stale cached results when Qdrant fails;
+- results report isInterested as false when Postgres is slow;
+- chat answers with search results only when the LLM is slow.
+"""
+import os
+from contextlib import contextmanager
+import httpx
+from fastapi import Request
+from fastapi.responses import JSONResponse
+from psycopg2 import OperationalError
+from psycopg2.pool import PoolError
+from qdrant_client.http.exceptions import ResponseHandlingException, UnexpectedResponse
+from app.circuit_breaker import CircuitBreaker, CircuitOpenError
+from app.metrics import qdrant_call, DEGRADED_RESPONSES
+
+# Seconds per Qdrant HTTP request
+QDRANT_TIMEOUT = int(os.getenv("QDRANT_TIMEOUT", 5))
+POSTGRES_CONNECT_TIMEOUT = int(os.getenv("POSTGRES_CONNECT_TIMEOUT", 3))
+# Enforced by the server on every statement of pooled connections
+POSTGRES_STATEMENT_TIMEOUT_MS = int(os.getenv("POSTGRES_STATEMENT_TIMEOUT_MS", 1000))
+# How long a request waits for a free pooled Postgres connection
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 1))
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", 10))
+BACKEND_BREAKER_FAILURES = int(os.getenv("BACKEND_BREAKER_FAILURES", 5))
+BACKEND_BREAKER_RESET_SECONDS = float(os.getenv("BACKEND_BREAKER_RESET_SECONDS", 10))
+
+
+class QdrantUnavailable(CircuitOpenError):
+    """Raised without calling Qdrant while its circuit is open"""
+
+
+class DatabaseUnavailable(CircuitOpenError):
+    """Raised without touching the pool while the Postgres circuit is open"""
+
+
+class LLMUnavailable(CircuitOpenError):
+    """Raised without calling the LLM while its circuit is open"""
+
+
+def _qdrant_trips(error) -> bool:
+    # 4xx means a bad request (e.g. an unknown point id), not an unhealthy Qdrant
+    return not isinstance(error, UnexpectedResponse) or (error.status_code or 500) >= 500
+
+
+qdrant_breaker = CircuitBreaker(
+    "qdrant", BACKEND_BREAKER_FAILURES, BACKEND_BREAKER_RESET_SECONDS,
+    error_types=(ResponseHandlingException, UnexpectedResponse, httpx.TransportError, TimeoutError, ConnectionError),
+    open_error=QdrantUnavailable, should_trip=_qdrant_trips
+)
+# Statement timeouts (QueryCanceled) and lost connections are OperationalErrors
+postgres_breaker = CircuitBreaker(
+    "postgres", BACKEND_BREAKER_FAILURES, BACKEND_BREAKER_RESET_SECONDS,
+    error_types=(OperationalError, PoolError), open_error=DatabaseUnavailable
+)
+# The Gemini SDK raises a variety of transport and API errors; any of them counts
+llm_breaker = CircuitBreaker(
+    "llm", BACKEND_BREAKER_FAILURES, BACKEND_BREAKER_RESET_SECONDS, open_error=LLMUnavailable
+)
+
+# What callers catch to fall back to a degraded response
+QDRANT_FAILURES = qdrant_breaker.error_types + (QdrantUnavailable,)
+POSTGRES_FAILURES = postgres_breaker.error_types + (DatabaseUnavailable,)
+# Failures with no degraded answer, reported as 503 rather than 500; TimeoutError covers a stalled query embedding
+UNAVAILABLE_ERRORS = (CircuitOpenError, ResponseHandlingException, httpx.TransportError, OperationalError, PoolError,
+                      TimeoutError)
+
+
+@contextmanager
+def qdrant_request(operation: str):
+    """`qdrant_call` accounting plus the Qdrant circuit breaker around one client call"""
+    with qdrant_breaker.guard(), qdrant_call(operation):
+        yield
+
+
+def record_degraded(reason: str):
+    DEGRADED_RESPONSES.labels(reason).inc()
+
+
+def backend_unavailable(request: Request, exc: Exception) -> JSONResponse:
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "A backend service is unavailable, please retry shortly"},
+        headers={"Retry-After": str(int(BACKEND_BREAKER_RESET_SECONDS))}
+    )
+
+
+def install_unavailable_handlers(app):
+    """Answer requests that failed on an unavailable backend with 503 and Retry-After"""
+    for error_type in UNAVAILABLE_ERRORS:
+        app.add_exception_handler(error_type, backend_unavailable)
@@ -1,24 +1,23 @@
-import json
-import hashlib
 import logging
 from datetime import timedelta
 from functools import wraps
-import redis
 import os
+from app.metrics import track_local_cache
+from app.cache_keys import digest
+from app.ttl_cache import TTLCache
+from app.tiered_cache import TieredCache
+from app.redis_pool import get_redis
 
-# Redis client for endpoint caching
-try:
-    redis_client = redis.Redis(
-        host=os.getenv('REDIS_HOST', 'redis'),
-        port=int(os.getenv('REDIS_PORT', 6379)),
-        decode_responses=True,
-        socket_connect_timeout=5,
-        retry_on_timeout=True
-    )
-    redis_client.ping()
-except Exception as e:
-    logging.warning(f"Redis connection failed: {e}. Endpoint caching will be disabled.")
-    redis_client = None
+# Shared Redis client for endpoint caching
+redis_client = get_redis()
+
+# In-process L1 shared by all cached endpoints; its TTL stays below their Redis durations
+ENDPOINT_L1_CACHE_SIZE = int(os.getenv("ENDPOINT_L1_CACHE_SIZE", 256))
+ENDPOINT_L1_CACHE_MAX_MB = float(os.getenv("ENDPOINT_L1_CACHE_MAX_MB", 16))
+ENDPOINT_L1_CACHE_TTL_SECONDS = int(os.getenv("ENDPOINT_L1_CACHE_TTL_SECONDS", 30))
+endpoint_l1_cache = TTLCache(maxsize=ENDPOINT_L1_CACHE_SIZE, ttl=ENDPOINT_L1_CACHE_TTL_SECONDS,
+                             max_bytes=int(ENDPOINT_L1_CACHE_MAX_MB * 1024 * 1024))
+track_local_cache("endpoint", endpoint_l1_cache)
 
 def cache_endpoint(duration_minutes: int = 5, prefix: str = "endpoint"):
     """
@@ -29,26 +28,19 @@ def cache_endpoint(duration_minutes: int = 5, prefix: str = "endpoint"):
         prefix: Cache key prefix
     """
     def decorator(func):
+        cache = TieredCache(f"endpoint:{prefix}", redis_client, endpoint_l1_cache, timedelta(minutes=duration_minutes))
+
         @wraps(func)
         def wrapper(*args, **kwargs):
-            if not redis_client:
-                return func(*args, **kwargs)
-            
-            # Generate cache key from function name and arguments
-            cache_key_data = {
-                'function': func.__name__,
-                'args': str(args),
-                'kwargs': {k: str(v) for k, v in kwargs.items()}
-            }
-            cache_key_str = json.dumps(cache_key_data, sort_keys=True)
-            cache_key = f"{prefix}:{hashlib.md5(cache_key_str.encode()).hexdigest()}"
+            # Generate cache key from function name and the canonical form of its arguments
+            cache_key = f"{prefix}:{digest(func.__name__, args, kwargs)}"
             
             try:
-                # Try to get from cache
-                cached_result = redis_client.get(cache_key)
-                if cached_result:
-                    logging.info(f"Cache hit for {func.__name__}")
-                    return json.loads(cached_result)
+                # Try the in-process tier, then Redis
+                cached_result = cache.get(cache_key)
+                if cached_result is not None:
+                    logging.debug(f"Cache hit for {func.__name__}")
+                    return cached_result
             except Exception as e:
                 logging.warning(f"Cache retrieval failed for {func.__name__}: {e}")
             
@@ -56,16 +48,12 @@ def cache_endpoint(duration_minutes: int = 5, prefix: str = "endpoint"):
             result = func(*args, **kwargs)
             
             try:
-                # Store result in cache
-                redis_client.setex(
-                    cache_key,
-                    timedelta(minutes=duration_minutes),
-                    json.dumps(result)
-                )
-                logging.info(f"Cached result for {func.__name__}")
+                # Store result in both tiers
+                cache.set(cache_key, result)
+                logging.debug(f"Cached result for {func.__name__}")
             except Exception as e:
                 logging.warning(f"Cache storage failed for {func.__name__}: {e}")
             
             return result
         return wrapper
-    return decorator 
\ No newline at end of file
+    return decorator
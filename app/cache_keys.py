@@ -0,0 +1,94 @@
+"""
+Canonical cache keys.
+
+Keys are built from a canonical form of the request instead of `str()` of its
+objects: pydantic models (Qdrant filters) become nested tuples of their set
+fields, dicts are sorted, and lists whose order carries no meaning (filter
+clauses, MatchAny values) are sorted, so equal requests always share one key.
+The canonical form is serialized with marshal and hashed with BLAKE2b.
+"""
+import marshal
+import hashlib
+from dataclasses import dataclass, fields
+from pydantic import BaseModel
+
+# Filter lists that act as sets: clause lists and match/except values
+UNORDERED_FIELDS = frozenset({"must", "should", "must_not", "any", "except_"})
+_PRIMITIVES = (str, int, float, bool, type(None))
+
+
+def canonical(value, unordered: bool = False):
+    """Hashable, order-normalized form of `value`, built from primitives and tuples"""
+    if isinstance(value, BaseModel):
+        # pydantic's (compiled) dump of the set fields; conditions are told apart
+        # by their field names, just as in Qdrant's JSON API
+        value = value.model_dump(exclude_none=True)
+    if isinstance(value, dict):
+        return tuple(sorted(
+            (str(k), v if type(v) in _PRIMITIVES else canonical(v, k in UNORDERED_FIELDS))
+            for k, v in value.items() if v is not None
+        ))
+    if isinstance(value, (list, tuple, set, frozenset)):
+        items = tuple(value)
+        try:
+            # Already hashable (e.g. a list of strings): nothing nested to normalize
+            hash(items)
+        except TypeError:
+            items = tuple(item if type(item) in _PRIMITIVES else canonical(item) for item in items)
+        if unordered or isinstance(value, (set, frozenset)):
+            try:
+                items = tuple(sorted(items))
+            except TypeError:
+                items = tuple(sorted(items, key=repr))
+        return items
+    if type(value) in _PRIMITIVES:
+        return value
+    return repr(value)
+
+
+def _hash(canonical_value) -> str:
+    # marshal format 2 has no back-references, so equal values give equal bytes
+    # regardless of object sharing (format 3+ depends on reference counts)
+    try:
+        data = marshal.dumps(canonical_value, 2)
+    except ValueError:
+        # Subclasses of primitives (e.g. str enums) are not marshallable
+        data = repr(canonical_value).encode()
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def digest(*parts) -> str:
+    """Stable 128-bit hex digest of the canonical form of `parts`"""
+    return _hash(canonical(parts))
+
+
+@dataclass(frozen=True)
+class SearchCacheKey:
+    """Everything that determines a base search result; equal keys share one cache entry"""
+    collection: str
+    text: str
+    city: str = ""
+    limit: int = 15
+    offset: int = 0
+    extra_filter: tuple = None
+    startDate: str = ""
+    endDate: str = ""
+    min_lat: float = None
+    max_lat: float = None
+    min_lon: float = None
+    max_lon: float = None
+    score_thresholds: float = None
+    lat: float = None
+    lon: float = None
+    radius_km: float = None
+    sort: str = "relevance"
+    distance_weight: float = None
+    min_price: float = None
+    max_price: float = None
+    free: bool = None
+
+    def redis_key(self, prefix: str = "search") -> str:
+        return f"{prefix}:{_hash(tuple(getattr(self, f) for f in _SEARCH_KEY_FIELDS))}"
+
+
+_SEARCH_KEY_FIELDS = tuple(f.name for f in fields(SearchCacheKey))
@@ -0,0 +1,97 @@
+"""
+Circuit breaker for calls to a backend that may degrade.
+
+After `failure_threshold` consecutive failures the circuit opens and calls fail
+immediately with `open_error` instead of waiting on timeouts. Once
+`reset_timeout` seconds have passed a single probe call is let through
+(half-open): its success closes the circuit, its failure re-opens it.
+"""
+import time
+import threading
+from contextlib import contextmanager
+from app.metrics import CIRCUIT_STATE, CIRCUIT_REJECTIONS
+
+CLOSED, HALF_OPEN, OPEN = 0, 1, 2
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a backend whose circuit is open"""
+
+
+class CircuitBreaker:
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 10.0,
+                 error_types=(Exception,), open_error=CircuitOpenError, should_trip=None):
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        # Only these exceptions count as backend failures; others pass through untouched
+        self.error_types = error_types
+        # Optional finer test on those, e.g. HTTP 5xx but not 4xx
+        self.should_trip = should_trip
+        self.open_error = open_error
+        self.state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+        CIRCUIT_STATE.labels(name).set(CLOSED)
+
+    def allow(self) -> bool:
+        """Whether a call may go to the backend now"""
+        if self.state == CLOSED:
+            return True
+        with self._lock:
+            if self.state == OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self._set_state(HALF_OPEN)
+            if self.state == HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            return self.state == CLOSED
+
+    def before_call(self):
+        if not self.allow():
+            CIRCUIT_REJECTIONS.labels(self.name).inc()
+            raise self.open_error(f"{self.name} circuit is open")
+
+    def record_success(self):
+        if self.state == CLOSED and not self._failures:
+            return
+        with self._lock:
+            self._failures = 0
+            self._probing = False
+            self._set_state(CLOSED)
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._probing = False
+            if self.state == HALF_OPEN or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+                self._set_state(OPEN)
+
+    @contextmanager
+    def guard(self):
+        """`with breaker.guard(): backend_call()` fails fast while open and records the outcome"""
+        self.before_call()
+        try:
+            yield
+        except self.error_types as e:
+            if self.should_trip is None or self.should_trip(e):
+                self.record_failure()
+            else:
+                self._probing = False
+            raise
+        except BaseException:
+            # Not the backend's fault (e.g. a bad request); release a half-open probe
+            self._probing = False
+            raise
+        self.record_success()
+
+    def call(self, func, *args, **kwargs):
+        with self.guard():
+            return func(*args, **kwargs)
+
+    def _set_state(self, state):
+        if state != self.state:
+            self.state = state
+            CIRCUIT_STATE.labels(self.name).set(state)
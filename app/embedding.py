@@ -0,0 +1,162 @@
+"""
+Embedding model settings shared by the API and the sync job.
+
+The dense model runs in-process on ONNX Runtime through fastembed; these knobs
+tune it for the pod it runs on:
+
+- EMBEDDING_THREADS: ONNX intra-op threads per model (default: ONNX Runtime's
+  choice, one per core).
+- EMBEDDING_BATCH_SIZE: documents per inference batch when indexing (default 32).
+- EMBEDDING_MODEL_PATH: directory holding a replacement ONNX export of the model,
+  e.g. the int8-quantized one written by `python -m benchmarks.embedding quantize`.
+- EMBEDDING_BATCH_MAX_SIZE / EMBEDDING_BATCH_MAX_WAIT_MS: how many concurrent query
+  encodes the micro-batcher coalesces into one inference call, and how long the
+  first of them may wait for company (defaults 32 and 2 ms).
+- EMBEDDING_TIMEOUT_SECONDS: how long a caller waits for its query vector before
+  giving up with TimeoutError (default 5).
+
+`python -m benchmarks.embedding` measures the effect of each setting.
+"""
+import os
+import time
+import queue
+import logging
+import threading
+from concurrent.futures import Future, InvalidStateError
+from app.metrics import EMBEDDING_BATCH
+
+DENSE_MODEL = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
+
+EMBEDDING_THREADS = int(os.getenv("EMBEDDING_THREADS", 0)) or None
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", 32))
+EMBEDDING_MODEL_PATH = os.getenv("EMBEDDING_MODEL_PATH") or None
+EMBEDDING_BATCH_MAX_SIZE = int(os.getenv("EMBEDDING_BATCH_MAX_SIZE", 32))
+EMBEDDING_BATCH_MAX_WAIT_MS = float(os.getenv("EMBEDDING_BATCH_MAX_WAIT_MS", 2))
+EMBEDDING_TIMEOUT_SECONDS = float(os.getenv("EMBEDDING_TIMEOUT_SECONDS", 5))
+
+
+def model_options(threads: int = None, model_path: str = None) -> dict:
+    """Keyword arguments for `QdrantClient.set_model` / fastembed `TextEmbedding`"""
+    options = {}
+    threads = threads or EMBEDDING_THREADS
+    model_path = model_path or EMBEDDING_MODEL_PATH
+    if threads:
+        options["threads"] = threads
+    if model_path:
+        # fastembed loads the ONNX file and tokenizer from here instead of its download cache
+        options["specific_model_path"] = model_path
+    return options
+
+
+def configure_model(client, model_name: str = DENSE_MODEL):
+    """
+    Load the dense model on `client` with the configured options. fastembed models
+    are cached per process by name, so the first caller's options apply to all.
+    """
+    client.set_model(model_name, **model_options())
+
+
+class EmbeddingBatcher:
+    """
+    Coalesces concurrent single-text encodes into batched model calls.
+
+    Callers block on a future while one worker thread drains the queue: it takes
+    the first waiting text, collects more until `max_batch_size` or `max_wait_ms`
+    after the first, and encodes them in one call. While a batch is running new
+    requests queue up, so under load batches fill without any added wait; an idle
+    request pays at most `max_wait_ms`.
+    """
+
+    def __init__(self, embed_batch, max_batch_size: int = EMBEDDING_BATCH_MAX_SIZE,
+                 max_wait_ms: float = EMBEDDING_BATCH_MAX_WAIT_MS, name: str = "embedding-batcher"):
+        self._embed_batch = embed_batch
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000
+        self.name = name
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def submit(self, text: str) -> Future:
+        """Queue `text`; the future resolves to its vector as a list of floats"""
+        future = Future()
+        self._queue.put((text, future))
+        if self._thread is None:
+            self._start()
+        return future
+
+    def embed(self, text: str, timeout: float = EMBEDDING_TIMEOUT_SECONDS):
+        return self.submit(text).result(timeout)
+
+    def _start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            try:
+                # Whatever queued during the previous batch is taken without waiting
+                batch.append(self._queue.get_nowait())
+                continue
+            except queue.Empty:
+                pass
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = []
+            try:
+                batch = self._collect()
+                # Identical concurrent queries are encoded once
+                texts = list(dict.fromkeys(text for text, _ in batch))
+                EMBEDDING_BATCH.observe(len(texts))
+                vectors = dict(zip(texts, (vector.tolist() for vector in self._embed_batch(texts))))
+                for text, future in batch:
+                    if text in vectors:
+                        _resolve(future, result=vectors[text])
+                    else:
+                        _resolve(future, error=RuntimeError(f"Embedding model returned no vector for {text!r}"))
+            except Exception as e:
+                # The worker must outlive any failure, or every later embed() would wait for nothing
+                logging.warning(f"Embedding batch of {len(batch)} failed: {e}")
+                for _, future in batch:
+                    _resolve(future, error=e)
+
+
+def _resolve(future: Future, result=None, error: Exception = None):
+    """Complete `future` unless it already is (e.g. cancelled by its caller)"""
+    if future.done():
+        return
+    try:
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+    except InvalidStateError:
+        pass
+
+
+_query_batchers = {}
+_query_batchers_lock = threading.Lock()
+
+
+def query_batcher(client, model_name: str = DENSE_MODEL) -> EmbeddingBatcher:
+    """The process-wide batcher for query embeddings of `model_name` loaded on `client`"""
+    with _query_batchers_lock:
+        batcher = _query_batchers.get(model_name)
+        if batcher is None:
+            model = client.embedding_models[model_name]
+            batcher = EmbeddingBatcher(lambda texts: model.query_embed(texts), name=f"embedding-batcher:{model_name}")
+            _query_batchers[model_name] = batcher
+        return batcher
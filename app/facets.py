@@ -0,0 +1,159 @@
+import os
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from qdrant_client import models
+from app.hybrid_searcher import LOCAL_TIMEZONE, show_time_condition
+from app.metrics import record_cache
+from app.backends import qdrant_request
+from app.cache_keys import digest
+from app.tiered_cache import cache_version
+from app.tracing import with_context
+
+FACET_NAMES = ("categories", "city", "price", "date")
+FACET_CACHE_DURATION = timedelta(minutes=5)
+FACET_LIMIT = int(os.getenv("FACET_LIMIT", 20))
+# Upper edges of the paid price buckets, e.g. "100000,500000" -> (0, 100000], (100000, 500000], > 500000
+PRICE_FACET_EDGES = [float(edge) for edge in os.getenv("PRICE_FACET_EDGES", "100000,500000").split(",") if edge.strip()]
+DATE_FACET_DAYS = (("today", 1), ("next_7_days", 7), ("next_30_days", 30))
+# How long a search waits for its facets before answering without them
+FACET_TIMEOUT_SECONDS = float(os.getenv("FACET_TIMEOUT_SECONDS", 2))
+
+# Whole facet sets are computed off the request thread, concurrently with the main search;
+# the individual facet/count calls of one set fan out on a separate pool
+_request_executor = ThreadPoolExecutor(max_workers=int(os.getenv("FACET_WORKERS", 4)), thread_name_prefix="facets")
+_call_executor = ThreadPoolExecutor(max_workers=int(os.getenv("FACET_WORKERS", 4)) * 4, thread_name_prefix="facet-call")
+
+
+def parse_facet_names(facets):
+    """Accept repeated or comma separated `facets=` values; raise ValueError on unknown names"""
+    names = []
+    for value in facets or []:
+        names += [name.strip().lower() for name in value.split(",") if name.strip()]
+    unknown = [name for name in names if name not in FACET_NAMES]
+    if unknown:
+        raise ValueError(f"Unknown facets: {', '.join(unknown)}. Expected any of: {', '.join(FACET_NAMES)}")
+    return list(dict.fromkeys(names))
+
+
+def submit_facets(searcher, names, **filters):
+    """Start `compute_facets` in the background and return its future"""
+    return _request_executor.submit(with_context(compute_facets), searcher, names, **filters)
+
+
+def compute_facets(searcher, names, city=None, extra_filter=None, startDate=None, endDate=None,
+                   min_lat=None, max_lat=None, min_lon=None, max_lon=None, lat=None, lon=None, radius_km=None,
+                   min_price=None, max_price=None, free=None):
+    """
+    Counts per category, city, price bucket and date bucket for the current filters.
+
+    Each facet ignores its own filter (so the category chips still show the other
+    categories once one is selected) and applies all the others. Counts come from
+    the keyword indexes via Qdrant facet/count; the free text query does not narrow
+    them, since semantic search has no hard match set.
+    """
+    def build(exclude):
+        return searcher._build_query_filter(
+            None if exclude == "city" else city,
+            None if exclude == "categories" else extra_filter,
+            None if exclude == "date" else startDate,
+            None if exclude == "date" else endDate,
+            min_lat, max_lat, min_lon, max_lon, lat, lon, radius_km,
+            None if exclude == "price" else min_price,
+            None if exclude == "price" else max_price,
+            None if exclude == "price" else free
+        )
+
+    filters = {name: build(name) for name in names}
+    today = datetime.now(LOCAL_TIMEZONE).replace(hour=0, minute=0, second=0, microsecond=0)
+
+    cache_key = _facet_cache_key(searcher.collection_name, filters, today, cache_version.current(searcher.redis_client))
+    if searcher.redis_client:
+        try:
+            cached = searcher.redis_client.get(cache_key)
+            record_cache("facets", bool(cached))
+            if cached:
+                return json.loads(cached)
+        except Exception as e:
+            logging.warning(f"Facet cache retrieval failed: {e}")
+
+    pending = {}
+    for name, base_filter in filters.items():
+        if name in ("categories", "city"):
+            pending[name] = _call_executor.submit(with_context(_keyword_facet), searcher, name, base_filter)
+        elif name == "price":
+            pending[name] = [(bucket, _call_executor.submit(with_context(_count), searcher, base_filter, condition))
+                             for bucket, condition in _price_buckets()]
+        elif name == "date":
+            pending[name] = [(bucket, _call_executor.submit(with_context(_count), searcher, base_filter, condition))
+                             for bucket, condition in _date_buckets(today)]
+
+    facets = {}
+    for name, work in pending.items():
+        if isinstance(work, list):
+            facets[name] = [{**bucket, "count": future.result()} for bucket, future in work]
+        else:
+            facets[name] = work.result()
+
+    if searcher.redis_client:
+        try:
+            searcher.redis_client.setex(cache_key, FACET_CACHE_DURATION, json.dumps(facets))
+        except Exception as e:
+            logging.warning(f"Facet cache storage failed: {e}")
+    return facets
+
+
+def _facet_cache_key(collection_name, filters, today, version):
+    # Date buckets are relative to today, so they roll over at midnight; the cache
+    # generation retires the counts when a sync bumps it, as for the search cache
+    return f"facets:{digest(collection_name, today.strftime('%Y-%m-%d'), filters)}:v{version}"
+
+
+def _keyword_facet(searcher, key, base_filter):
+    with qdrant_request("facet"):
+        response = searcher.qdrant_client.facet(
+            collection_name=searcher.collection_name,
+            key=key,
+            facet_filter=base_filter,
+            limit=FACET_LIMIT
+        )
+    return [{"value": hit.value, "count": hit.count} for hit in response.hits]
+
+
+def _count(searcher, base_filter, condition):
+    conditions = list(base_filter.must) if base_filter else []
+    conditions.append(condition)
+    with qdrant_request("count"):
+        return searcher.qdrant_client.count(
+            collection_name=searcher.collection_name,
+            count_filter=models.Filter(must=conditions),
+            exact=True
+        ).count
+
+
+def _price_buckets():
+    """(bucket description, condition) pairs; min/max can be sent back as price filters"""
+    buckets = [({"value": "free", "min": 0, "max": 0},
+                models.FieldCondition(key="minimumPrice", range=models.Range(lte=0)))]
+    lower = 0
+    for edge in PRICE_FACET_EDGES:
+        buckets.append(({"value": f"{lower:g}-{edge:g}", "min": lower, "max": edge},
+                        models.FieldCondition(key="minimumPrice", range=models.Range(gt=lower, lte=edge))))
+        lower = edge
+    buckets.append(({"value": f"{lower:g}+", "min": lower, "max": None},
+                    models.FieldCondition(key="minimumPrice", range=models.Range(gt=lower))))
+    return buckets
+
+
+def _date_buckets(today):
+    """(bucket description, condition) pairs over every show time, in local days"""
+    buckets = []
+    for label, days in DATE_FACET_DAYS:
+        end = today + timedelta(days=days)
+        buckets.append((
+            {"value": label, "startDate": today.strftime("%Y-%m-%d"),
+             "endDate": (end - timedelta(days=1)).strftime("%Y-%m-%d")},
+            show_time_condition(models.Range(gte=today.timestamp(), lt=end.timestamp()))
+        ))
+    return buckets
@@ -4,15 +4,83 @@ from psycopg2.extras import RealDictCursor
 from psycopg2 import pool
 from dotenv import load_dotenv
 from qdrant_client import QdrantClient, models
+from qdrant_client.http.exceptions import UnexpectedResponse
 from datetime import datetime, timezone, timedelta
-import redis
 import json
-import hashlib
 import logging
+import math
+import time
+import threading
+from contextlib import contextmanager
+from app.ttl_cache import TTLCache
+from app.tiered_cache import TieredCache
+from app.redis_pool import get_redis
+from app.cache_keys import SearchCacheKey, canonical
+from app.text_normalization import query_key
+from app.metrics import search_stage, record_cache, track_db_pool, track_local_cache
+from app.backends import (QDRANT_TIMEOUT, POSTGRES_CONNECT_TIMEOUT, POSTGRES_STATEMENT_TIMEOUT_MS, DB_POOL_TIMEOUT,
+                          QDRANT_FAILURES, POSTGRES_FAILURES, postgres_breaker, qdrant_request, record_degraded)
+from app.tracing import traced
+from app.embedding import DENSE_MODEL, configure_model, query_batcher
 
 LOCAL_TIMEZONE = timezone(timedelta(hours=7))  # UTC+7 (Vietnam, Thailand, etc.)
 load_dotenv()
 
+# Alias maintained by jobs/upload_events.py; full rebuilds switch it atomically
+EVENTS_COLLECTION = os.getenv("EVENTS_COLLECTION", "events")
+
+# Candidates ranked in-process when sorting by something Qdrant cannot order by
+SORT_CANDIDATE_LIMIT = int(os.getenv("SORT_CANDIDATE_LIMIT", 300))
+# Filter-only nearest-first pages widen a circle around the origin, starting at this radius
+NEAREST_START_RADIUS_KM = float(os.getenv("NEAREST_START_RADIUS_KM", 2))
+NEAREST_MAX_RADIUS_KM = 20040  # half the Earth's circumference: covers every point
+SCROLL_BATCH_SIZE = 256
+# Blended ranking: proximity = exp(-distance / DISTANCE_DECAY_KM)
+DISTANCE_DECAY_KM = float(os.getenv("DISTANCE_DECAY_KM", 5))
+DEFAULT_DISTANCE_WEIGHT = 0.3
+# sort option -> float-indexed payload field, ascending (cheapest / soonest first).
+# sort=date ranks by the next upcoming show instead where startTimes is available
+ORDER_FIELDS = {"price": "minimumPrice", "date": "startTime"}
+EARTH_RADIUS_KM = 6371.0088
+# startTimes (every show) only exists on points written since it was added to the sync.
+# Until a full sync has backfilled it, date conditions also accept the first show (startTime)
+SHOW_TIMES_BACKFILLED = os.getenv("SHOW_TIMES_BACKFILLED", "false").lower() == "true"
+
+
+def show_time_condition(time_range: models.Range):
+    """Events with a show in `time_range`; only the first show counts for points synced before startTimes"""
+    any_show = models.FieldCondition(key="startTimes", range=time_range)
+    if SHOW_TIMES_BACKFILLED:
+        return any_show
+    # The first show is one of the shows, so this never matches more than startTimes alone would
+    return models.Filter(should=[any_show, models.FieldCondition(key="startTime", range=time_range)])
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Great-circle distance between two points in kilometres"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lon2 - lon1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+# In-process L1 in front of the Redis search cache, shared by every searcher in the process
+SEARCH_L1_CACHE_SIZE = int(os.getenv("SEARCH_L1_CACHE_SIZE", 1024))
+SEARCH_L1_CACHE_MAX_MB = float(os.getenv("SEARCH_L1_CACHE_MAX_MB", 32))
+SEARCH_L1_CACHE_TTL_SECONDS = int(os.getenv("SEARCH_L1_CACHE_TTL_SECONDS", 30))
+search_l1_cache = TTLCache(maxsize=SEARCH_L1_CACHE_SIZE, ttl=SEARCH_L1_CACHE_TTL_SECONDS,
+                           max_bytes=int(SEARCH_L1_CACHE_MAX_MB * 1024 * 1024))
+track_local_cache("search", search_l1_cache)
+# Results are also kept this long for serving while Qdrant is failing; 0 disables.
+# Each kept copy is a second Redis entry per distinct search, so keep this a small
+# multiple of the 5-minute live entry
+SEARCH_STALE_TTL_SECONDS = int(os.getenv("SEARCH_STALE_TTL_SECONDS", 3600))
+
+
+def _copy_results(results):
+    # Callers annotate result dicts in place (isInterested), so L1 hands out copies
+    return [dict(result) for result in results]
+
+
 class DatabasePool:
     _instance = None
     _pool = None
@@ -32,66 +100,184 @@ class DatabasePool:
                 port=os.getenv("DATABASE_PORT"),
                 user=os.getenv("DATABASE_USERNAME"),
                 password=os.getenv("DATABASE_PASSWORD"),
-                dbname=os.getenv("DATABASE_NAME")
+                dbname=os.getenv("DATABASE_NAME"),
+                connect_timeout=POSTGRES_CONNECT_TIMEOUT,
+                options=f"-c statement_timeout={POSTGRES_STATEMENT_TIMEOUT_MS}"
             )
+            track_db_pool(DatabasePool._pool)
+        # getconn() raises as soon as the pool is exhausted; wait up to DB_POOL_TIMEOUT for a slot instead
+        self._slots = threading.BoundedSemaphore(DatabasePool._pool.maxconn)
 
     def get_connection(self):
-        return self._pool.getconn()
+        if not self._slots.acquire(timeout=DB_POOL_TIMEOUT):
+            raise pool.PoolError(f"connection pool exhausted for {DB_POOL_TIMEOUT}s")
+        try:
+            return self._pool.getconn()
+        except Exception:
+            self._slots.release()
+            raise
 
-    def release_connection(self, conn):
-        self._pool.putconn(conn)
+    def release_connection(self, conn, close=False):
+        try:
+            self._pool.putconn(conn, close=close)
+        finally:
+            self._slots.release()
+
+    @contextmanager
+    def connection(self):
+        """
+        `with db_pool.connection() as conn:` for one unit of work, behind the Postgres
+        circuit breaker. The connection is discarded if the work fails, since a
+        cancelled statement leaves it in an aborted transaction.
+        """
+        with postgres_breaker.guard():
+            conn = self.get_connection()
+            try:
+                yield conn
+            except BaseException:
+                self.release_connection(conn, close=True)
+                raise
+            self.release_connection(conn)
 
 class HybridSearcher:
-    DENSE_MODEL = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
+    DENSE_MODEL = DENSE_MODEL
     CACHE_DURATION = timedelta(minutes=5)  # Cache for 5 minutes
+    # Redis hash of event id -> JSON list of neighbour ids, written by jobs/upload_events.py
+    RELATED_KEY_PREFIX = "related_events:"
+    EVENT_CACHE_SIZE = int(os.getenv("EVENT_CACHE_SIZE", 2048))
+    EVENT_CACHE_TTL_SECONDS = int(os.getenv("EVENT_CACHE_TTL_SECONDS", 60))
+    # Query embeddings only change with the model; the TTL just bounds memory churn
+    EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", 4096))
+    EMBEDDING_CACHE_TTL_SECONDS = int(os.getenv("EMBEDDING_CACHE_TTL_SECONDS", 3600))
 
     def __init__(self, collection_name):
         self.collection_name = collection_name
-        self.qdrant_client = QdrantClient(os.getenv("QDRANT_URL"), api_key=os.getenv("QDRANT_API_KEY"))
-        self.qdrant_client.set_model(self.DENSE_MODEL)
+        self.qdrant_client = QdrantClient(os.getenv("QDRANT_URL"), api_key=os.getenv("QDRANT_API_KEY"), timeout=QDRANT_TIMEOUT)
+        configure_model(self.qdrant_client, self.DENSE_MODEL)
         self.db_pool = DatabasePool.get_instance()
+        self.event_cache = TTLCache(maxsize=self.EVENT_CACHE_SIZE, ttl=self.EVENT_CACHE_TTL_SECONDS)
+        self.embedding_cache = TTLCache(maxsize=self.EMBEDDING_CACHE_SIZE, ttl=self.EMBEDDING_CACHE_TTL_SECONDS)
         
-        # Initialize Redis client
+        # Shared pooled client; a down Redis fails fast through its circuit breaker
+        self.redis_client = get_redis()
+        self.result_cache = TieredCache("search", self.redis_client, search_l1_cache, self.CACHE_DURATION,
+                                        copy=_copy_results, stale_ttl=SEARCH_STALE_TTL_SECONDS)
+
+    def get_event_by_id(self, event_id):
+        """Fetch a single event by its id (the Qdrant point id)."""
+        events = self.get_events_by_ids([event_id])
+        return events[0] if events else None
+
+    @traced("hybrid_searcher.get_events_by_ids")
+    def get_events_by_ids(self, event_ids):
+        """
+        Fetch events by point id with a single `retrieve`, preserving the order of
+        `event_ids` and skipping ids that do not exist. Hot payloads are served from
+        a small in-process TTL cache.
+        """
+        event_ids = [int(i) if isinstance(i, str) and i.isdigit() else i for i in event_ids]
+        found = self.event_cache.get_many(event_ids)
+        missing = list(dict.fromkeys(i for i in event_ids if i not in found))
+        record_cache("event", True, len(found), tier="local")
+        record_cache("event", False, len(missing), tier="local")
+        if missing:
+            with qdrant_request("retrieve"):
+                points = self.qdrant_client.retrieve(
+                    collection_name=self.collection_name,
+                    ids=missing,
+                    with_payload=True,
+                    with_vectors=False
+                )
+            for point in points:
+                payload = self._payload_to_result(point.payload)
+                self.event_cache.set(point.id, payload)
+                found[point.id] = payload
+        # Copies, since callers annotate results in place
+        return [dict(found[i]) for i in event_ids if i in found]
+
+    @traced("hybrid_searcher.get_related_events")
+    def get_related_events(self, event_id, limit: int = 4, user_id: str = None):
+        """
+        Events most similar to `event_id`, using its stored vector (nothing is re-embedded).
+        Reads the neighbour table precomputed by the sync job when it has enough
+        entries, otherwise asks Qdrant for the nearest points to this point id.
+        Returns None if the event does not exist.
+        """
+        results = self._precomputed_related(event_id, limit)
+        if results is None:
+            results = self._query_related(event_id, limit)
+        if results is None:
+            return None
+
+        self._annotate_with_bookmarks(results, self._bookmarks_if_available(user_id) if user_id else set())
+        return results
+
+    def _precomputed_related(self, event_id, limit):
+        if not self.redis_client:
+            return None
         try:
-            self.redis_client = redis.Redis(
-                host=os.getenv('REDIS_HOST', 'redis'),
-                port=int(os.getenv('REDIS_PORT', 6379)),
-                decode_responses=True,
-                socket_connect_timeout=5,
-                retry_on_timeout=True
-            )
-            # Test Redis connection
-            self.redis_client.ping()
+            with search_stage("related_lookup"):
+                neighbours = self.redis_client.hget(self.RELATED_KEY_PREFIX + self.collection_name, str(event_id))
         except Exception as e:
-            logging.warning(f"Redis connection failed: {e}. Caching will be disabled.")
-            self.redis_client = None
-
-    def get_event_by_id(self, event_id: str):
-        """Fetch a single event by its id from Qdrant."""
-        result = self.qdrant_client.scroll(
-            collection_name=self.collection_name,
-            scroll_filter=models.Filter(
-                must=[models.FieldCondition(key="id", match=models.MatchValue(value=event_id))]
-            ),
-            limit=1,
-            with_vectors=False
-        )
-        if result and result[0]:
-            return result[0][0].payload
-        return None
-
-    def search(self, text: str, city: str = None, limit: int = 15, offset: int = 0, user_id: str = None, extra_filter=None, startDate: str = None, endDate: str = None, min_lat: float = None, max_lat: float = None, min_lon: float = None, max_lon: float = None, score_thresholds: float = None):
+            logging.warning(f"Related events lookup failed: {e}")
+            return None
+        if not neighbours:
+            return None
+
+        neighbour_ids = [i for i in json.loads(neighbours) if str(i) != str(event_id)][:limit]
+        if len(neighbour_ids) < limit:
+            # Table was built with a smaller top-K than requested
+            return None
+        return self.get_events_by_ids(neighbour_ids)
+
+    def _query_related(self, event_id, limit):
+        try:
+            with qdrant_request("query_related"):
+                response = self.qdrant_client.query_points(
+                    collection_name=self.collection_name,
+                    query=event_id,  # query by point id: Qdrant uses the stored vector
+                    using=self.qdrant_client.get_vector_field_name(),
+                    query_filter=models.Filter(must_not=[models.HasIdCondition(has_id=[event_id])]),
+                    limit=limit,
+                    with_payload=True
+                )
+        except (UnexpectedResponse, ValueError):
+            # Qdrant rejects ids that do not exist; report that as "not found"
+            if self.get_event_by_id(event_id) is None:
+                return None
+            raise
+        return [self._payload_to_result(point.payload) for point in response.points]
+
+    @staticmethod
+    def _payload_to_result(payload):
+        return {k: v for k, v in (payload or {}).items() if k != "document"}
+
+    @traced("hybrid_searcher.search")
+    def search(self, text: str, city: str = None, limit: int = 15, offset: int = 0, user_id: str = None, extra_filter=None, startDate: str = None, endDate: str = None, min_lat: float = None, max_lat: float = None, min_lon: float = None, max_lon: float = None, score_thresholds: float = None, lat: float = None, lon: float = None, radius_km: float = None, sort: str = "relevance", distance_weight: float = DEFAULT_DISTANCE_WEIGHT,
+               min_price: float = None, max_price: float = None, free: bool = None):
         """
         Search for events with optional user interest annotation.
         If user_id is provided, the results will include isInterested field.
+        If lat/lon are provided, each result includes distanceKm; radius_km limits
+        results to that circle and sort="distance" or "blend" ranks by proximity.
+        min_price/max_price/free filter on minimumPrice; sort="price" or "date"
+        orders by minimumPrice or the next upcoming show (events with only past
+        shows go last, or are left out of filter-only pages).
         """
+        # One canonical form per query for both cache lookup and embedding, so
+        # queries sharing a cache entry always share the vector it was computed from
+        text = query_key(text)
         # Get base search results
-        results = self._search_base(text, city, limit, offset, extra_filter, startDate, endDate, min_lat, max_lat, min_lon, max_lon, score_thresholds)
+        results = self._search_base(text, city, limit, offset, extra_filter, startDate, endDate, min_lat, max_lat, min_lon, max_lon, score_thresholds,
+                                    lat=lat, lon=lon, radius_km=radius_km, sort=sort, distance_weight=distance_weight,
+                                    min_price=min_price, max_price=max_price, free=free)
         
         # Add interest data if user_id is provided
         if user_id:
-            bookmarked_ids = self._fetch_bookmarked_ids(user_id)
-            self._annotate_with_bookmarks(results, bookmarked_ids)
+            with search_stage("bookmarks"):
+                bookmarked_ids = self._bookmarks_if_available(user_id)
+            with search_stage("annotate"):
+                self._annotate_with_bookmarks(results, bookmarked_ids)
         else:
             self._annotate_with_bookmarks(results, set())
             
@@ -100,87 +286,279 @@ class HybridSearcher:
     def _generate_cache_key(self, text: str, city: str = None, limit: int = 15, offset: int = 0, 
                           extra_filter=None, startDate: str = None, endDate: str = None, 
                           min_lat: float = None, max_lat: float = None, min_lon: float = None, 
-                          max_lon: float = None, score_thresholds: float = None):
+                          max_lon: float = None, score_thresholds: float = None, lat: float = None,
+                          lon: float = None, radius_km: float = None, sort: str = "relevance",
+                          distance_weight: float = DEFAULT_DISTANCE_WEIGHT, min_price: float = None,
+                          max_price: float = None, free: bool = None):
         """Generate a unique cache key based on search parameters"""
-        # Create a string representation of all search parameters
-        params = {
-            'text': text or '',
-            'city': city or '',
-            'limit': limit,
-            'offset': offset,
-            'startDate': startDate or '',
-            'endDate': endDate or '',
-            'min_lat': min_lat,
-            'max_lat': max_lat,
-            'min_lon': min_lon,
-            'max_lon': max_lon,
-            'score_thresholds': score_thresholds,
-            'collection': self.collection_name
-        }
-        
-        # Handle extra_filter
-        if extra_filter:
-            # Convert filter to a serializable format
-            filter_str = str(extra_filter)
-            params['extra_filter'] = filter_str
-        
-        # Create hash of parameters
-        params_str = json.dumps(params, sort_keys=True)
-        cache_key = f"search:{hashlib.md5(params_str.encode()).hexdigest()}"
-        return cache_key
+        return SearchCacheKey(
+            collection=self.collection_name,
+            text=query_key(text),
+            city=city or '',
+            limit=limit,
+            offset=offset,
+            # Canonical and order-independent, so equivalent filters share an entry
+            extra_filter=canonical(extra_filter) if extra_filter else None,
+            startDate=startDate or '',
+            endDate=endDate or '',
+            min_lat=min_lat,
+            max_lat=max_lat,
+            min_lon=min_lon,
+            max_lon=max_lon,
+            score_thresholds=score_thresholds,
+            lat=lat,
+            lon=lon,
+            radius_km=radius_km,
+            sort=sort,
+            distance_weight=distance_weight if sort == "blend" else None,
+            min_price=min_price,
+            max_price=max_price,
+            free=free
+        ).redis_key()
 
-    def _search_base(self, text: str, city: str = None, limit: int = 15, offset: int = 0, extra_filter=None, startDate: str = None, endDate: str = None, min_lat: float = None, max_lat: float = None, min_lon: float = None, max_lon: float = None, score_thresholds: float = None):
+    def _search_base(self, text: str, city: str = None, limit: int = 15, offset: int = 0, extra_filter=None, startDate: str = None, endDate: str = None, min_lat: float = None, max_lat: float = None, min_lon: float = None, max_lon: float = None, score_thresholds: float = None,
+                     lat: float = None, lon: float = None, radius_km: float = None, sort: str = "relevance", distance_weight: float = DEFAULT_DISTANCE_WEIGHT,
+                     min_price: float = None, max_price: float = None, free: bool = None):
         """
         Perform base search without user interest annotation.
         This method is used internally and can be used for caching base results.
         """
+        with search_stage("cache_key"):
+            cache_key = self._generate_cache_key(text, city, limit, offset, extra_filter,
+                                                 startDate, endDate, min_lat, max_lat,
+                                                 min_lon, max_lon, score_thresholds,
+                                                 lat, lon, radius_km, sort, distance_weight,
+                                                 min_price, max_price, free)
+
         # Try to get results from cache first
-        if self.redis_client:
-            try:
-                cache_key = self._generate_cache_key(text, city, limit, offset, extra_filter, 
-                                                   startDate, endDate, min_lat, max_lat, 
-                                                   min_lon, max_lon, score_thresholds)
-                cached_results = self.redis_client.get(cache_key)
-                if cached_results:
-                    return json.loads(cached_results)
-            except Exception as e:
-                logging.warning(f"Cache retrieval failed: {e}")
+        try:
+            with search_stage("cache_lookup"):
+                cached_results = self.result_cache.get(cache_key)
+            if cached_results is not None:
+                return cached_results
+        except Exception as e:
+            logging.warning(f"Cache retrieval failed: {e}")
 
         # If no cache hit, perform the actual search
-        query_filter_final = self._build_query_filter(city, extra_filter, startDate, endDate, min_lat, max_lat, min_lon, max_lon)
+        with search_stage("build_filter"):
+            query_filter_final = self._build_query_filter(city, extra_filter, startDate, endDate, min_lat, max_lat, min_lon, max_lon,
+                                                          lat, lon, radius_km, min_price, max_price, free)
+
+        try:
+            results = self._query_results(text, query_filter_final, limit, offset, score_thresholds,
+                                          lat, lon, radius_km, sort, distance_weight)
+        except QDRANT_FAILURES as e:
+            stale = self.result_cache.get_stale(cache_key)
+            if stale is None:
+                raise
+            logging.warning(f"Qdrant unavailable, serving stale search results: {e}")
+            record_degraded("search_stale_cache")
+            return stale
 
-        search_result = self.qdrant_client.query(
-            collection_name=self.collection_name,
-            query_text=text,
-            query_filter=query_filter_final,
-            limit=limit,
-            offset=offset
-        )
-
-        results = []
-        for hit in search_result:
-            if score_thresholds and text != "" and hit.score < score_thresholds:
-                continue
-            filtered = {k: v for k, v in hit.metadata.items() if k != "document"}
-            results.append(filtered)
-        
         # Cache the results
-        if self.redis_client:
-            try:
-                cache_key = self._generate_cache_key(text, city, limit, offset, extra_filter, 
-                                                   startDate, endDate, min_lat, max_lat, 
-                                                   min_lon, max_lon, score_thresholds)
-                self.redis_client.setex(
-                    cache_key,
-                    self.CACHE_DURATION,
-                    json.dumps(results)
-                )
-            except Exception as e:
-                logging.warning(f"Cache storage failed: {e}")
+        try:
+            with search_stage("cache_store"):
+                self.result_cache.set(cache_key, results)
+        except Exception as e:
+            logging.warning(f"Cache storage failed: {e}")
             
         return results
+
+    def _query_results(self, text, query_filter_final, limit, offset, score_thresholds, lat, lon, radius_km, sort, distance_weight):
+        """One page of results from Qdrant for an already built filter"""
+        has_origin = lat is not None and lon is not None
+
+        if sort in ORDER_FIELDS:
+            if text:
+                # Order the relevant candidates, not the whole collection
+                candidates = self._fetch_candidates(text, query_filter_final, SORT_CANDIDATE_LIMIT, 0, score_thresholds)
+                with search_stage("rank"):
+                    now = time.time()
+                    candidates.sort(key=lambda c: self._order_key(c[0], sort, now))
+                results = [result for result, _ in candidates[offset:offset + limit]]
+            else:
+                results = self._ordered_results(query_filter_final, sort, limit, offset)
+            if has_origin:
+                for result in results:
+                    result["distanceKm"] = self._distance_to(result, lat, lon)
+        elif has_origin and sort in ("distance", "blend"):
+            # Qdrant cannot order by distance, so rank a bounded candidate window here
+            if text:
+                candidates = self._fetch_candidates(text, query_filter_final, SORT_CANDIDATE_LIMIT, 0, score_thresholds)
+            else:
+                # Every event that can land on this page, not an arbitrary id-ordered window
+                candidates = self._nearest_candidates(query_filter_final, lat, lon, radius_km, offset + limit)
+            with search_stage("rank"):
+                for result, score in candidates:
+                    result["distanceKm"] = self._distance_to(result, lat, lon)
+                if sort == "distance" or not text:
+                    candidates.sort(key=lambda c: (c[0]["distanceKm"] is None, c[0]["distanceKm"] or 0))
+                else:
+                    candidates.sort(key=lambda c: self._blended_score(c[1], c[0]["distanceKm"], distance_weight), reverse=True)
+            results = [result for result, _ in candidates[offset:offset + limit]]
+        else:
+            results = [result for result, _ in self._fetch_candidates(text, query_filter_final, limit, offset, score_thresholds)]
+            if has_origin:
+                for result in results:
+                    result["distanceKm"] = self._distance_to(result, lat, lon)
+        return results
+
+    def embed_query(self, text):
+        """Dense query vector for `text`, memoized so repeated queries skip model inference"""
+        vector = self.embedding_cache.get(text)
+        record_cache("embedding", vector is not None, tier="local")
+        if vector is None:
+            # Encoded together with other requests' queries arriving at the same time
+            with search_stage("embed"):
+                vector = query_batcher(self.qdrant_client, self.DENSE_MODEL).embed(text)
+            self.embedding_cache.set(text, vector)
+        return vector
+
+    def _fetch_candidates(self, text, query_filter, limit, offset, score_thresholds):
+        """Run the Qdrant query and return (result, score) pairs above the threshold"""
+        query_vector = self.embed_query(text)
+        with search_stage("qdrant"), qdrant_request("query_points"):
+            response = self.qdrant_client.query_points(
+                collection_name=self.collection_name,
+                query=query_vector,
+                using=self.qdrant_client.get_vector_field_name(),
+                query_filter=query_filter,
+                limit=limit,
+                offset=offset,
+                with_payload=True
+            )
+
+        with search_stage("shape"):
+            candidates = []
+            for hit in response.points:
+                if score_thresholds and text != "" and hit.score < score_thresholds:
+                    continue
+                candidates.append((self._payload_to_result(hit.payload), hit.score))
+        return candidates
+
+    def _nearest_candidates(self, query_filter, lat, lon, radius_km, needed):
+        """
+        Filter-only candidates containing the `needed` matches nearest to lat/lon.
+        A circle around the origin is doubled (up to radius_km) until it holds at
+        least `needed` matches, which are then necessarily the nearest ones; only
+        that circle is scrolled and ranked.
+        """
+        max_radius = min(radius_km or NEAREST_MAX_RADIUS_KM, NEAREST_MAX_RADIUS_KM)
+        radius = min(NEAREST_START_RADIUS_KM, max_radius)
+        while radius < max_radius:
+            circle = self._within_radius(query_filter, lat, lon, radius)
+            with search_stage("qdrant"), qdrant_request("count"):
+                count = self.qdrant_client.count(
+                    collection_name=self.collection_name,
+                    count_filter=circle,
+                    exact=True
+                ).count
+            if count >= needed:
+                return self._scroll_candidates(circle)
+            radius *= 2
+        # query_filter already holds the radius_km circle, if any
+        return self._scroll_candidates(query_filter)
+
+    @staticmethod
+    def _within_radius(query_filter, lat, lon, radius_km):
+        conditions = list(query_filter.must) if query_filter and query_filter.must else []
+        conditions.append(models.FieldCondition(
+            key="location",
+            geo_radius=models.GeoRadius(center=models.GeoPoint(lat=lat, lon=lon), radius=radius_km * 1000)
+        ))
+        return models.Filter(must=conditions)
+
+    def _scroll_candidates(self, query_filter):
+        """Every event matching a filter-only query (no text, so nothing to embed or score)"""
+        candidates = []
+        offset = None
+        while True:
+            with search_stage("qdrant"), qdrant_request("scroll"):
+                points, offset = self.qdrant_client.scroll(
+                    collection_name=self.collection_name,
+                    scroll_filter=query_filter,
+                    limit=SCROLL_BATCH_SIZE,
+                    offset=offset,
+                    with_payload=True,
+                    with_vectors=False
+                )
+            candidates.extend((self._payload_to_result(point.payload), 0.0) for point in points)
+            if offset is None:
+                return candidates
+
+    def _ordered_results(self, query_filter, sort, limit, offset):
+        """
+        Filter-only page ordered by a float payload index; events without the field
+        are skipped. Before startTimes is backfilled, sort="date" orders by the first show.
+        """
+        if sort == "date" and SHOW_TIMES_BACKFILLED:
+            return self._upcoming_results(query_filter, limit, offset)
+        with search_stage("qdrant"), qdrant_request("order_by"):
+            response = self.qdrant_client.query_points(
+                collection_name=self.collection_name,
+                query=models.OrderByQuery(order_by=models.OrderBy(key=ORDER_FIELDS[sort], direction=models.Direction.ASC)),
+                query_filter=query_filter,
+                limit=limit,
+                offset=offset,
+                with_payload=True
+            )
+        return [self._payload_to_result(point.payload) for point in response.points]
+
+    def _upcoming_results(self, query_filter, limit, offset):
+        """
+        Events ranked by their next show from now on; events with only past shows are left out.
+
+        Ordering by the multi-valued startTimes can return an event once per upcoming
+        show, so Qdrant's offset counts shows, not events. Pages are cut from the
+        distinct events in order instead, reading ordered shows in batches from the
+        start until offset + limit events are seen.
+        """
+        order_by = models.OrderBy(key="startTimes", direction=models.Direction.ASC, start_from=time.time())
+        events = {}
+        position = 0
+        while len(events) < offset + limit:
+            with search_stage("qdrant"), qdrant_request("order_by"):
+                points = self.qdrant_client.query_points(
+                    collection_name=self.collection_name,
+                    query=models.OrderByQuery(order_by=order_by),
+                    query_filter=query_filter,
+                    limit=SCROLL_BATCH_SIZE,
+                    offset=position,
+                    with_payload=True
+                ).points
+            for point in points:
+                # The first occurrence is the event's next show
+                events.setdefault(point.id, point.payload)
+            if len(points) < SCROLL_BATCH_SIZE:
+                break
+            position += SCROLL_BATCH_SIZE
+        return [self._payload_to_result(payload) for payload in list(events.values())[offset:offset + limit]]
+
+    @staticmethod
+    def _order_key(result, sort, now):
+        """Ascending sort key for sort=price/date; events without a value go last"""
+        if sort == "date":
+            shows = result.get("startTimes") or ([result["startTime"]] if result.get("startTime") is not None else [])
+            value = min((t for t in shows if t >= now), default=None)
+        else:
+            value = result.get(ORDER_FIELDS[sort])
+        return value is None, value or 0
+
+    @staticmethod
+    def _distance_to(result, lat, lon):
+        location = result.get("location") or {}
+        if location.get("lat") is None or location.get("lon") is None:
+            return None
+        return round(haversine_km(lat, lon, location["lat"], location["lon"]), 3)
+
+    @staticmethod
+    def _blended_score(relevance, distance_km, distance_weight):
+        """Mix text relevance with proximity, which decays from 1 at the origin"""
+        proximity = math.exp(-distance_km / DISTANCE_DECAY_KM) if distance_km is not None else 0.0
+        return (1 - distance_weight) * relevance + distance_weight * proximity
     
-    def _build_query_filter(self, city, extra_filter, startDate, endDate, min_lat, max_lat, min_lon, max_lon):
+    def _build_query_filter(self, city, extra_filter, startDate, endDate, min_lat, max_lat, min_lon, max_lon,
+                            lat=None, lon=None, radius_km=None, min_price=None, max_price=None, free=None):
         query_filter = None
         if city:
             city = city.lower()
@@ -188,11 +566,8 @@ class HybridSearcher:
                 must=[models.FieldCondition(key="city", match=models.MatchValue(value=city))]
             )
 
-        if extra_filter and hasattr(extra_filter, 'must'):
-            for cond in extra_filter.must:
-                if hasattr(cond, 'key') and cond.key == "categories":
-                    if hasattr(cond.match, 'values'):
-                        cond.match.values = [v.lower() for v in cond.match.values]
+        # Lowercased copies; the caller's filter may be shared and is left untouched
+        extra_conditions = self._normalized_conditions(extra_filter)
 
         date_filter = None
         if startDate or endDate:
@@ -209,10 +584,8 @@ class HybridSearcher:
                     date_range['lte'] = end_timestamp + (24 * 3600 - 1)
 
             if date_range:
-                date_filter = models.FieldCondition(
-                    key="startTime",
-                    range=models.Range(**date_range)
-                )
+                # An event matches if any of its shows is in range
+                date_filter = show_time_condition(models.Range(**date_range))
 
         # Bounding box geo filter - leverages Qdrant's native spatial index for efficient map-based querying
         geo_filter = None
@@ -228,19 +601,66 @@ class HybridSearcher:
             except Exception as e:
                 raise
 
+        # Radius filter for "near me" searches, served by the same geo index
+        radius_filter = None
+        if lat is not None and lon is not None and radius_km:
+            radius_filter = models.FieldCondition(
+                key="location",
+                geo_radius=models.GeoRadius(
+                    center=models.GeoPoint(lat=lat, lon=lon),
+                    radius=radius_km * 1000  # meters
+                )
+            )
+
+        # Price filters on the float-indexed minimumPrice
+        price_filter = None
+        if free:
+            price_filter = models.FieldCondition(key="minimumPrice", range=models.Range(lte=0))
+        elif free is not None or min_price is not None or max_price is not None:
+            price_range = {}
+            if free is False:
+                price_range['gt'] = 0
+            if min_price is not None:
+                price_range['gte'] = min_price
+            if max_price is not None:
+                price_range['lte'] = max_price
+            price_filter = models.FieldCondition(key="minimumPrice", range=models.Range(**price_range))
+
         combined_filters = []
         if query_filter and hasattr(query_filter, 'must'):
             combined_filters += query_filter.must
-        if extra_filter and hasattr(extra_filter, 'must'):
-            combined_filters += extra_filter.must
+        combined_filters += extra_conditions
         if date_filter:
             combined_filters.append(date_filter)
         if geo_filter:
             combined_filters.append(geo_filter)
+        if radius_filter:
+            combined_filters.append(radius_filter)
+        if price_filter:
+            combined_filters.append(price_filter)
 
         final_filter = models.Filter(must=combined_filters) if combined_filters else None
         return final_filter
 
+    @staticmethod
+    def _normalized_conditions(extra_filter):
+        """`extra_filter.must` as a list, with category match values lowercased"""
+        must = getattr(extra_filter, 'must', None) if extra_filter else None
+        if not must:
+            return []
+        conditions = []
+        for cond in must if isinstance(must, list) else [must]:
+            if getattr(cond, 'key', None) == "categories":
+                match = cond.match
+                if isinstance(match, models.MatchAny):
+                    match = models.MatchAny(any=[v.lower() if isinstance(v, str) else v for v in match.any])
+                elif isinstance(match, models.MatchValue) and isinstance(match.value, str):
+                    match = models.MatchValue(value=match.value.lower())
+                if match is not cond.match:
+                    cond = cond.model_copy(update={"match": match})
+            conditions.append(cond)
+        return conditions
+
     def _parse_date_to_timestamp(self, date_str):
         """Parse date string to UTC timestamp"""
         if not date_str:
@@ -261,18 +681,24 @@ class HybridSearcher:
         return dt.astimezone(timezone.utc).timestamp()
 
     def _fetch_bookmarked_ids(self, user_id):
-        conn = None
-        try:
-            conn = self.db_pool.get_connection()
+        with self.db_pool.connection() as conn:
             cursor = conn.cursor(cursor_factory=RealDictCursor)
             cursor.execute("""
                 SELECT event_id FROM interests WHERE user_id = %s
             """, (user_id,))
-            bookmarked_ids = {row["event_id"] for row in cursor.fetchall()}
-            return bookmarked_ids
-        finally:
-            if conn:
-                self.db_pool.release_connection(conn)
+            return {row["event_id"] for row in cursor.fetchall()}
+
+    def _bookmarks_if_available(self, user_id):
+        """
+        The user's bookmarked ids, or an empty set when Postgres is slow or down, so
+        results keep their isInterested field (all False) whatever the backend's health
+        """
+        try:
+            return self._fetch_bookmarked_ids(user_id)
+        except POSTGRES_FAILURES as e:
+            logging.warning(f"Skipping interest annotation: {e}")
+            record_degraded("interests_skipped")
+            return set()
 
     def _annotate_with_bookmarks(self, results, bookmarked_ids):
         for item in results:
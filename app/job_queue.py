@@ -0,0 +1,241 @@
+import os
+import json
+import uuid
+import logging
+from datetime import datetime, timezone
+from typing import Optional, Tuple
+import redis
+
+JOB_KEY_PREFIX = "jobs:job:"
+QUEUE_KEY = "jobs:queue"
+ACTIVE_KEY_PREFIX = "jobs:active:"
+LOCK_KEY_PREFIX = "jobs:lock:"
+# Job ids a worker has taken off the queue and not yet finished, one list per worker
+PROCESSING_KEY_PREFIX = "jobs:processing:"
+WORKERS_KEY = "jobs:workers"
+WORKER_KEY_PREFIX = "jobs:worker:"
+JOB_TTL_SECONDS = int(os.getenv("JOB_TTL_SECONDS", 7 * 24 * 3600))
+LOCK_TTL_SECONDS = int(os.getenv("JOB_LOCK_TTL_SECONDS", 300))
+# A worker whose heartbeat is older than this is dead and its taken jobs are reclaimed
+WORKER_TTL_SECONDS = int(os.getenv("JOB_WORKER_TTL_SECONDS", 30))
+
+PROGRESS_FIELDS = ("rows_read", "rows_embedded", "rows_upserted", "rows_deleted")
+
+# Only delete the lock if we still own it
+_RELEASE_LOCK_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+# Take over the active pointer only if it still names the stale job we inspected
+_REPLACE_ACTIVE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('set', KEYS[1], ARGV[2], 'EX', ARGV[3])
+end
+return false
+"""
+
+_EXTEND_LOCK_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('expire', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+
+class JobCancelled(Exception):
+    """Raised inside a running job when cancellation was requested"""
+
+
+def _now():
+    return datetime.now(timezone.utc).isoformat()
+
+
+class JobQueue:
+    """
+    Redis-backed job store and queue.
+
+    Jobs are hashes under `jobs:job:<id>` so the API and any worker process see
+    the same status. A per-type lock guarantees that only one job of a type runs
+    at a time, and an "active" pointer de-duplicates triggers while one is pending.
+    Dequeued ids move onto the worker's processing list until it finishes them, so
+    a job taken by a worker that died is requeued by `reap_dead_workers` instead
+    of staying pending (and blocking new triggers) until JOB_TTL_SECONDS.
+    """
+
+    def __init__(self, redis_client=None):
+        self.redis = redis_client or redis.Redis(
+            host=os.getenv('REDIS_HOST', 'redis'),
+            port=int(os.getenv('REDIS_PORT', 6379)),
+            decode_responses=True,
+            socket_connect_timeout=5,
+            retry_on_timeout=True
+        )
+        self._release_lock = self.redis.register_script(_RELEASE_LOCK_SCRIPT)
+        self._extend_lock = self.redis.register_script(_EXTEND_LOCK_SCRIPT)
+        self._replace_active = self.redis.register_script(_REPLACE_ACTIVE_SCRIPT)
+
+    # ----- job records -----
+
+    def enqueue(self, job_type: str, params: Optional[dict] = None) -> Tuple[dict, bool]:
+        """
+        Queue a job of `job_type`. Returns (job, created); when a job of the same
+        type is already pending or running, that job is returned instead.
+
+        The job record is written first and then claims `jobs:active:<type>` with
+        SET NX, so of several concurrent triggers exactly one is queued. A pointer
+        left behind by a finished or dead job is replaced atomically.
+        """
+        job_id = str(uuid.uuid4())
+        job_key = JOB_KEY_PREFIX + job_id
+        active_key = ACTIVE_KEY_PREFIX + job_type
+        pipe = self.redis.pipeline()
+        pipe.hset(job_key, mapping={
+            "id": job_id,
+            "type": job_type,
+            "status": "pending",
+            "created_at": _now(),
+            "params": json.dumps(params or {}),
+            **{name: 0 for name in PROGRESS_FIELDS},
+        })
+        pipe.expire(job_key, JOB_TTL_SECONDS)
+        pipe.execute()
+
+        while not self.redis.set(active_key, job_id, nx=True, ex=JOB_TTL_SECONDS):
+            active_id = self.redis.get(active_key)
+            if not active_id:
+                continue  # expired or finished since the SET; claim again
+            active = self._live_job(job_type, active_id)
+            if active:
+                self.redis.delete(job_key)
+                return active, False
+            if self._replace_active(keys=[active_key], args=[active_id, job_id, JOB_TTL_SECONDS]):
+                break
+
+        self.redis.lpush(QUEUE_KEY, job_id)
+        return self.get(job_id), True
+
+    def get(self, job_id: str) -> Optional[dict]:
+        job = self.redis.hgetall(JOB_KEY_PREFIX + job_id)
+        if not job:
+            return None
+        for name in ("params", "result"):
+            if name in job:
+                job[name] = json.loads(job[name])
+        job["progress"] = {name: int(job.pop(name, 0)) for name in PROGRESS_FIELDS}
+        job["cancel_requested"] = job.get("cancel_requested") == "1"
+        return job
+
+    def get_active(self, job_type: str) -> Optional[dict]:
+        """Return the pending/running job of this type, ignoring stale pointers"""
+        job_id = self.redis.get(ACTIVE_KEY_PREFIX + job_type)
+        return self._live_job(job_type, job_id) if job_id else None
+
+    def _live_job(self, job_type: str, job_id: str) -> Optional[dict]:
+        job = self.get(job_id)
+        if not job:
+            return None
+        if job["status"] == "pending":
+            return job
+        # A running job whose lock expired belongs to a dead worker
+        if job["status"] == "running" and self.redis.exists(LOCK_KEY_PREFIX + job_type):
+            return job
+        return None
+
+    def update(self, job_id: str, **fields):
+        mapping = {k: json.dumps(v) if isinstance(v, (dict, list)) else v for k, v in fields.items()}
+        self.redis.hset(JOB_KEY_PREFIX + job_id, mapping=mapping)
+
+    def finish(self, job_id: str, job_type: str, status: str, **fields):
+        """Record a terminal status and clear the active pointer if it is ours"""
+        self.update(job_id, status=status, completed_at=_now(), **fields)
+        active_key = ACTIVE_KEY_PREFIX + job_type
+        if self.redis.get(active_key) == job_id:
+            self.redis.delete(active_key)
+
+    def report_progress(self, job_id: str, **counters):
+        """Set absolute progress counters, e.g. rows_read=1200"""
+        self.redis.hset(JOB_KEY_PREFIX + job_id, mapping={
+            k: int(v) for k, v in counters.items() if k in PROGRESS_FIELDS
+        })
+
+    def request_cancel(self, job_id: str) -> Optional[dict]:
+        job = self.get(job_id)
+        if not job:
+            return None
+        if job["status"] in ("pending", "running"):
+            self.redis.hset(JOB_KEY_PREFIX + job_id, "cancel_requested", "1")
+            if job["status"] == "pending":
+                # Not picked up yet: the worker will skip it when dequeued
+                self.finish(job_id, job["type"], "cancelled")
+            job = self.get(job_id)
+        return job
+
+    def is_cancel_requested(self, job_id: str) -> bool:
+        return self.redis.hget(JOB_KEY_PREFIX + job_id, "cancel_requested") == "1"
+
+    # ----- queue -----
+
+    def dequeue(self, worker_id: str, timeout: int = 5) -> Optional[str]:
+        """Block up to `timeout` seconds for the next job id, moving it onto this worker's processing list"""
+        return self.redis.blmove(QUEUE_KEY, PROCESSING_KEY_PREFIX + worker_id, timeout, "RIGHT", "LEFT")
+
+    def ack(self, worker_id: str, job_id: str):
+        """Drop a job the worker is done with from its processing list"""
+        self.redis.lrem(PROCESSING_KEY_PREFIX + worker_id, 0, job_id)
+
+    def requeue(self, job_id: str, worker_id: Optional[str] = None):
+        """Put a job back at the head of the queue, e.g. after a worker shutdown"""
+        pipe = self.redis.pipeline()
+        if worker_id:
+            pipe.lrem(PROCESSING_KEY_PREFIX + worker_id, 0, job_id)
+        pipe.rpush(QUEUE_KEY, job_id)
+        pipe.execute()
+
+    # ----- workers -----
+
+    def heartbeat(self, worker_id: str, ttl: int = WORKER_TTL_SECONDS):
+        pipe = self.redis.pipeline()
+        pipe.sadd(WORKERS_KEY, worker_id)
+        pipe.set(WORKER_KEY_PREFIX + worker_id, _now(), ex=ttl)
+        pipe.execute()
+
+    def reap_dead_workers(self) -> int:
+        """
+        Reclaim the processing lists of workers whose heartbeat expired: jobs they
+        had not started go back on the queue, jobs they were running are failed.
+        Returns the number of jobs requeued.
+        """
+        requeued = 0
+        for worker_id in self.redis.smembers(WORKERS_KEY):
+            if self.redis.exists(WORKER_KEY_PREFIX + worker_id):
+                continue
+            processing_key = PROCESSING_KEY_PREFIX + worker_id
+            # RPOP hands each id to exactly one reaper when several run at once
+            while (job_id := self.redis.rpop(processing_key)) is not None:
+                job = self.get(job_id)
+                if not job:
+                    continue
+                if job["status"] == "pending":
+                    self.redis.rpush(QUEUE_KEY, job_id)
+                    requeued += 1
+                elif job["status"] == "running":
+                    self.finish(job_id, job["type"], "failed", error=f"Worker {worker_id} died while running the job")
+            self.redis.srem(WORKERS_KEY, worker_id)
+        return requeued
+
+    # ----- run lock -----
+
+    def acquire_lock(self, job_type: str, job_id: str, ttl: int = LOCK_TTL_SECONDS) -> bool:
+        return bool(self.redis.set(LOCK_KEY_PREFIX + job_type, job_id, nx=True, ex=ttl))
+
+    def extend_lock(self, job_type: str, job_id: str, ttl: int = LOCK_TTL_SECONDS) -> bool:
+        return bool(self._extend_lock(keys=[LOCK_KEY_PREFIX + job_type], args=[job_id, ttl]))
+
+    def release_lock(self, job_type: str, job_id: str):
+        try:
+            self._release_lock(keys=[LOCK_KEY_PREFIX + job_type], args=[job_id])
+        except redis.RedisError as e:
+            logging.warning(f"Failed to release lock for {job_type}: {e}")
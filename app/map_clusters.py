@@ -0,0 +1,210 @@
+import os
+import logging
+from datetime import timedelta
+from qdrant_client import models
+from app import geohash
+from app.metrics import record_cache
+from app.backends import qdrant_request
+from app.cache_keys import digest
+from app.redis_pool import mget_json, setex_many_json
+
+TILE_CACHE_DURATION = timedelta(minutes=5)
+TILE_CACHE_PREFIX = "map_tile:"
+# Viewports needing more tiles than this are rejected rather than scanned
+MAX_TILES = int(os.getenv("MAP_MAX_TILES", 64))
+# Only the scan path reads points; it stops here and flags the tile's clusters as truncated
+MAX_POINTS_PER_TILE = int(os.getenv("MAP_MAX_POINTS_PER_TILE", 5000))
+# Count cells with facets over the geohashN payload fields; needs a full rebuild that wrote them
+MAP_GEOHASH_INDEXED = os.getenv("MAP_GEOHASH_INDEXED", "false").lower() == "true"
+GEOHASH_PRECISIONS = range(1, 9)
+MAX_REPRESENTATIVES = 3
+# Cluster cells are this many geohash characters finer than the cached tiles
+TILE_DEPTH = 2
+
+CLUSTER_PAYLOAD = ["id", "eventName", "eventLogoUrl", "location", "startTime", "minimumPrice"]
+
+# (max zoom, geohash precision): ~5000km, 1250km, 156km, 39km, 4.9km, 1.2km, 153m, 38m cells
+_ZOOM_PRECISION = [(2, 1), (4, 2), (6, 3), (8, 4), (11, 5), (13, 6), (15, 7)]
+
+
+def geohash_payload(lat, lon) -> dict:
+    """Keyword payload fields geohash1..geohash8 holding the event's cell at each precision"""
+    if lat is None or lon is None:
+        return {}
+    cell = geohash.encode(lat, lon, GEOHASH_PRECISIONS[-1])
+    return {f"geohash{precision}": cell[:precision] for precision in GEOHASH_PRECISIONS}
+
+
+def precision_for_zoom(zoom: int) -> int:
+    for max_zoom, precision in _ZOOM_PRECISION:
+        if zoom <= max_zoom:
+            return precision
+    return 8
+
+
+def viewport_clusters(searcher, min_lat, max_lat, min_lon, max_lon, zoom, city=None, extra_filter=None,
+                      startDate=None, endDate=None, representatives=1):
+    """
+    Per-geohash-cell event counts for a map viewport.
+
+    The viewport is covered by coarser geohash tiles; each tile's clusters are
+    computed once and cached by (filters, precision, tile), so panning mostly
+    hits cached tiles. Clusters of a tile that hit MAX_POINTS_PER_TILE are
+    marked `truncated`, as their counts are then lower bounds.
+    """
+    precision = precision_for_zoom(zoom)
+    tile_precision = max(1, precision - TILE_DEPTH)
+    tiles = geohash.covering(min_lat, max_lat, min_lon, max_lon, tile_precision)
+    if len(tiles) > MAX_TILES:
+        raise ValueError(f"Viewport spans {len(tiles)} tiles at zoom {zoom}; zoom in or shrink the viewport")
+
+    base_filter = searcher._build_query_filter(city, extra_filter, startDate, endDate, None, None, None, None)
+    filter_hash = digest(base_filter)
+    keys = [f"{TILE_CACHE_PREFIX}{searcher.collection_name}:{filter_hash}:{precision}:{tile}" for tile in tiles]
+
+    cached = [None] * len(tiles)
+    if searcher.redis_client:
+        try:
+            cached = mget_json(keys, searcher.redis_client)
+        except Exception as e:
+            logging.warning(f"Map tile cache retrieval failed: {e}")
+
+    clusters = []
+    computed = {}
+    for tile, key, tile_clusters in zip(tiles, keys, cached):
+        record_cache("map_tile", tile_clusters is not None)
+        if tile_clusters is None:
+            tile_clusters = computed[key] = _compute_tile(searcher, tile, precision, base_filter)
+        clusters.extend(tile_clusters)
+
+    # Write the missing tiles back in one round trip
+    if computed and searcher.redis_client:
+        try:
+            setex_many_json(computed, TILE_CACHE_DURATION, searcher.redis_client)
+        except Exception as e:
+            logging.warning(f"Map tile cache storage failed: {e}")
+
+    visible = []
+    for cluster in clusters:
+        cell_min_lat, cell_max_lat, cell_min_lon, cell_max_lon = geohash.bounds(cluster["geohash"])
+        if cell_max_lat < min_lat or cell_min_lat > max_lat or cell_max_lon < min_lon or cell_min_lon > max_lon:
+            continue
+        visible.append({**cluster, "events": cluster["events"][:representatives]})
+
+    return {
+        "precision": precision,
+        "total": sum(cluster["count"] for cluster in visible),
+        "truncated": any(cluster.get("truncated", False) for cluster in visible),
+        "clusters": visible,
+    }
+
+
+def _compute_tile(searcher, tile, precision, base_filter):
+    if MAP_GEOHASH_INDEXED:
+        return _facet_tile(searcher, tile, precision, base_filter)
+    return _scan_tile(searcher, tile, precision, base_filter)
+
+
+def _facet_tile(searcher, tile, precision, base_filter):
+    """Exact cell counts from a facet over the geohash payload, plus the soonest events per cell"""
+    conditions = list(base_filter.must) if base_filter else []
+    conditions.append(models.FieldCondition(key=f"geohash{len(tile)}", match=models.MatchValue(value=tile)))
+    tile_filter = models.Filter(must=conditions)
+    cell_field = f"geohash{precision}"
+
+    with qdrant_request("facet"):
+        counts = searcher.qdrant_client.facet(
+            collection_name=searcher.collection_name,
+            key=cell_field,
+            facet_filter=tile_filter,
+            limit=32 ** (precision - len(tile)),
+            exact=True
+        ).hits
+    if not counts:
+        return []
+
+    with qdrant_request("query_groups"):
+        groups = searcher.qdrant_client.query_points_groups(
+            collection_name=searcher.collection_name,
+            group_by=cell_field,
+            query=models.OrderByQuery(order_by=models.OrderBy(key="startTime", direction=models.Direction.ASC)),
+            query_filter=tile_filter,
+            limit=len(counts),
+            group_size=MAX_REPRESENTATIVES,
+            with_payload=CLUSTER_PAYLOAD
+        ).groups
+    representatives = {group.id: [hit.payload for hit in group.hits] for group in groups}
+
+    clusters = []
+    for hit in counts:
+        cell_min_lat, cell_max_lat, cell_min_lon, cell_max_lon = geohash.bounds(hit.value)
+        clusters.append({
+            "geohash": hit.value,
+            "count": hit.count,
+            # Cell centre; the facet has no coordinates to average
+            "lat": (cell_min_lat + cell_max_lat) / 2,
+            "lon": (cell_min_lon + cell_max_lon) / 2,
+            "truncated": False,
+            "events": representatives.get(hit.value, []),
+        })
+    return clusters
+
+
+def _scan_tile(searcher, tile, precision, base_filter):
+    """Bucket the matching events inside one tile into cells at `precision`, reading up to MAX_POINTS_PER_TILE"""
+    tile_min_lat, tile_max_lat, tile_min_lon, tile_max_lon = geohash.bounds(tile)
+    conditions = list(base_filter.must) if base_filter else []
+    conditions.append(models.FieldCondition(
+        key="location",
+        geo_bounding_box=models.GeoBoundingBox(
+            top_left=models.GeoPoint(lat=tile_max_lat, lon=tile_min_lon),
+            bottom_right=models.GeoPoint(lat=tile_min_lat, lon=tile_max_lon)
+        )
+    ))
+    tile_filter = models.Filter(must=conditions)
+
+    buckets = {}
+    offset = None
+    scanned = 0
+    while scanned < MAX_POINTS_PER_TILE:
+        with qdrant_request("scroll"):
+            points, offset = searcher.qdrant_client.scroll(
+                collection_name=searcher.collection_name,
+                scroll_filter=tile_filter,
+                limit=min(1000, MAX_POINTS_PER_TILE - scanned),
+                offset=offset,
+                with_payload=CLUSTER_PAYLOAD,
+                with_vectors=False
+            )
+        scanned += len(points)
+        for point in points:
+            location = (point.payload or {}).get("location") or {}
+            lat, lon = location.get("lat"), location.get("lon")
+            if lat is None or lon is None:
+                continue
+            cell = geohash.encode(lat, lon, precision)
+            # Points on a shared edge match two tiles; count them in their own tile only
+            if not cell.startswith(tile):
+                continue
+            bucket = buckets.setdefault(cell, {"count": 0, "lat": 0.0, "lon": 0.0, "events": []})
+            bucket["count"] += 1
+            bucket["lat"] += lat
+            bucket["lon"] += lon
+            bucket["events"].append(point.payload)
+        if offset is None:
+            break
+
+    clusters = []
+    for cell, bucket in buckets.items():
+        # Representatives: the soonest events in the cell
+        events = sorted(bucket["events"], key=lambda e: (e.get("startTime") is None, e.get("startTime") or 0))
+        clusters.append({
+            "geohash": cell,
+            "count": bucket["count"],
+            "lat": bucket["lat"] / bucket["count"],
+            "lon": bucket["lon"] / bucket["count"],
+            # More points matched than were read, so the count is a lower bound
+            "truncated": offset is not None,
+            "events": events[:MAX_REPRESENTATIVES],
+        })
+    return clusters
@@ -0,0 +1,106 @@
+"""
+Prometheus metrics shared by the API and the job worker.
+
+Everything here is a module-level collector on the default registry; the API
+serves it at /metrics and the worker through its own HTTP exporter.
+"""
+import time
+from contextlib import contextmanager
+from prometheus_client import Counter, Gauge, Histogram
+from app.tracing import span
+
+# Search stages are mostly sub-millisecond; Qdrant and Postgres calls reach seconds
+_STAGE_BUCKETS = (.0005, .001, .0025, .005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5)
+
+REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template",
+    ["method", "route", "status"]
+)
+SEARCH_STAGE_SECONDS = Histogram(
+    "search_stage_duration_seconds", "Time spent in each stage of the search pipeline",
+    ["stage"], buckets=_STAGE_BUCKETS
+)
+CACHE_REQUESTS = Counter(
+    "cache_requests_total", "Cache lookups by namespace, tier (local/redis) and result (hit/miss)",
+    ["namespace", "tier", "result"]
+)
+LOCAL_CACHE_BYTES = Gauge(
+    "local_cache_bytes", "Approximate size of in-process cache tiers (serialized bytes)", ["namespace"]
+)
+LOCAL_CACHE_ENTRIES = Gauge("local_cache_entries", "Entries held by in-process cache tiers", ["namespace"])
+EMBEDDING_BATCH = Histogram(
+    "embedding_batch_size", "Distinct texts per query embedding batch",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128)
+)
+QDRANT_SECONDS = Histogram(
+    "qdrant_request_duration_seconds", "Qdrant client call latency by operation",
+    ["operation"], buckets=_STAGE_BUCKETS
+)
+QDRANT_IN_FLIGHT = Gauge("qdrant_requests_in_flight", "Qdrant client calls currently running")
+QDRANT_ERRORS = Counter("qdrant_errors_total", "Failed Qdrant client calls by operation", ["operation"])
+DB_POOL_CONNECTIONS = Gauge(
+    "db_pool_connections", "Postgres pool connections by state (in_use/idle) and the pool maximum",
+    ["state"]
+)
+CIRCUIT_STATE = Gauge("circuit_breaker_state", "Circuit state per backend (0 closed, 1 half-open, 2 open)", ["name"])
+CIRCUIT_REJECTIONS = Counter("circuit_breaker_rejections_total", "Calls failed fast by an open circuit", ["name"])
+DEGRADED_RESPONSES = Counter(
+    "degraded_responses_total", "Responses served in a degraded mode because a backend failed", ["reason"]
+)
+SYNC_ROWS = Counter("sync_rows_total", "Rows processed by the events sync job", ["stage"])
+JOBS = Counter("jobs_total", "Background jobs finished by type and outcome", ["type", "outcome"])
+JOB_SECONDS = Histogram(
+    "job_duration_seconds", "Background job run time", ["type"],
+    buckets=(1, 5, 15, 30, 60, 120, 300, 600, 1200, 1800, 3600)
+)
+
+
+@contextmanager
+def timed(histogram, *labels):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        histogram.labels(*labels).observe(time.perf_counter() - start)
+
+
+@contextmanager
+def search_stage(stage: str):
+    """`with search_stage("embed"): ...` records the block's duration, and a span when tracing"""
+    with span(f"search.{stage}"), timed(SEARCH_STAGE_SECONDS, stage):
+        yield
+
+
+@contextmanager
+def qdrant_call(operation: str):
+    """Latency, in-flight and error accounting (and a span) around one Qdrant client call"""
+    QDRANT_IN_FLIGHT.inc()
+    start = time.perf_counter()
+    try:
+        with span(f"qdrant.{operation}"):
+            yield
+    except Exception:
+        QDRANT_ERRORS.labels(operation).inc()
+        raise
+    finally:
+        QDRANT_IN_FLIGHT.dec()
+        QDRANT_SECONDS.labels(operation).observe(time.perf_counter() - start)
+
+
+def record_cache(namespace: str, hit: bool, count: int = 1, tier: str = "redis"):
+    if count:
+        CACHE_REQUESTS.labels(namespace, tier, "hit" if hit else "miss").inc(count)
+
+
+def track_local_cache(namespace: str, cache):
+    """Expose a TTLCache's size; read only when scraped"""
+    LOCAL_CACHE_BYTES.labels(namespace).set_function(lambda: cache.bytes)
+    LOCAL_CACHE_ENTRIES.labels(namespace).set_function(lambda: len(cache))
+
+
+def track_db_pool(pg_pool):
+    """Expose a psycopg2 ThreadedConnectionPool's usage; read only when scraped"""
+    # psycopg2 keeps no public counters, so read the pool's bookkeeping lists
+    DB_POOL_CONNECTIONS.labels("in_use").set_function(lambda: len(pg_pool._used))
+    DB_POOL_CONNECTIONS.labels("idle").set_function(lambda: len(pg_pool._pool))
+    DB_POOL_CONNECTIONS.labels("max").set_function(lambda: pg_pool.maxconn)
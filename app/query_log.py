@@ -0,0 +1,208 @@
+import os
+import json
+import time
+import heapq
+import queue
+import hashlib
+import logging
+import threading
+from typing import Callable, Optional
+from app.redis_pool import get_redis
+from app.text_normalization import match_key
+
+STREAM_KEY = "search:query_log"
+# Approximate cap on the Redis stream (XADD MAXLEN ~)
+STREAM_MAXLEN = int(os.getenv("QUERY_LOG_STREAM_MAXLEN", 100000))
+FLUSH_INTERVAL_SECONDS = float(os.getenv("QUERY_LOG_FLUSH_SECONDS", 2))
+MAX_PENDING = 10000
+# Number of distinct queries tracked by the heavy-hitters sketch
+TRACKED_QUERIES = int(os.getenv("TRENDING_TRACKED_QUERIES", 500))
+# Counts halve every half-life, so "trending" favours recent traffic
+TRENDING_HALF_LIFE_SECONDS = int(os.getenv("TRENDING_HALF_LIFE_SECONDS", 6 * 3600))
+TRENDING_SIZE = int(os.getenv("TRENDING_SIZE", 10))
+PREWARM_TOP_K = int(os.getenv("PREWARM_TOP_K", 20))
+PREWARM_INTERVAL_SECONDS = int(os.getenv("PREWARM_INTERVAL_SECONDS", 300))
+MAX_QUERY_LENGTH = 100
+
+
+class SpaceSaving:
+    """
+    Space-saving top-K sketch: at most `capacity` counters. An unseen key replaces
+    the smallest counter and inherits its count, so counts are over-estimates
+    bounded by the evicted minimum; frequent keys are never lost.
+
+    The smallest counter comes from a lazy min-heap of (count, key) entries: an
+    entry is stale once its key's count has moved on, and is skipped when popped.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.counts = {}
+        self._heap = []
+
+    def add(self, key, weight: float = 1.0):
+        if key in self.counts:
+            self.counts[key] += weight
+        elif len(self.counts) < self.capacity:
+            self.counts[key] = weight
+        else:
+            self.counts[key] = self._pop_smallest() + weight
+        heapq.heappush(self._heap, (self.counts[key], key))
+        if len(self._heap) > 4 * self.capacity:
+            self._rebuild_heap()
+
+    def decay(self, factor: float):
+        for key in self.counts:
+            self.counts[key] *= factor
+        self._rebuild_heap()
+
+    def top(self, k: int):
+        return sorted(self.counts.items(), key=lambda item: item[1], reverse=True)[:k]
+
+    def _pop_smallest(self) -> float:
+        """Evict the smallest counter and return its count"""
+        while True:
+            count, key = heapq.heappop(self._heap)
+            if self.counts.get(key) == count:
+                del self.counts[key]
+                return count
+
+    def _rebuild_heap(self):
+        # Drops the stale entries; also needed after decay, which changes every count
+        self._heap = [(count, key) for key, count in self.counts.items()]
+        heapq.heapify(self._heap)
+
+
+class QueryLog:
+    """
+    Records search queries without touching the request path: `record` only puts
+    onto an in-memory queue. A background thread drains it in batches, appends them
+    to a Redis stream and feeds a decaying space-saving sketch that provides the
+    trending keywords and the queries to pre-warm caches for.
+    """
+
+    def __init__(self):
+        self._pending = queue.Queue(maxsize=MAX_PENDING)
+        self._sketch = SpaceSaving(TRACKED_QUERIES)
+        # Folded key -> the most recent spelling users typed
+        self._display = {}
+        self._lock = threading.Lock()
+        self._last_decay = time.monotonic()
+        # (trending queries, version) swapped as one tuple so readers never pair a list with another's version
+        self._trending = ([], "")
+        self._prewarm: Optional[Callable[[list], None]] = None
+        self._last_prewarm = 0.0
+        self._redis = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def record(self, query: str):
+        """Log a user query; never blocks and drops entries if the writer falls behind"""
+        if not query or not query.strip():
+            return
+        try:
+            self._pending.put_nowait((query, time.time()))
+        except queue.Full:
+            pass
+
+    def trending(self, k: int = TRENDING_SIZE):
+        return self._trending[0][:k]
+
+    def trending_snapshot(self):
+        """(trending queries, version) from the same update; the version changes whenever the list does"""
+        return self._trending
+
+    def top_queries(self, k: int = TRACKED_QUERIES):
+        """[(query, approximate count), ...] most frequent first"""
+        with self._lock:
+            return [(self._display[key], count) for key, count in self._sketch.top(k)]
+
+    def start(self, prewarm: Optional[Callable[[list], None]] = None):
+        """Connect to Redis, seed the sketch from the recent stream and start the writer"""
+        self._prewarm = prewarm
+        # Shared client: writes resume by themselves once an unavailable Redis recovers
+        self._redis = get_redis()
+        try:
+            self._seed()
+        except Exception as e:
+            logging.warning(f"Query log Redis unavailable: {e}. Trending starts from this process's queries.")
+
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="query-log", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=FLUSH_INTERVAL_SECONDS * 2)
+
+    def _seed(self):
+        # A fresh worker starts with the recent fleet-wide trend instead of nothing
+        entries = self._redis.xrevrange(STREAM_KEY, count=TRACKED_QUERIES * 20)
+        self._add([fields.get("q", "") for _, fields in entries])
+
+    def _run(self):
+        while True:
+            stopping = self._stop.wait(FLUSH_INTERVAL_SECONDS)
+            try:
+                self._flush()
+                self._maybe_prewarm()
+            except Exception as e:
+                logging.warning(f"Query log flush failed: {e}")
+            if stopping:
+                break
+
+    def _flush(self):
+        batch = []
+        while len(batch) < MAX_PENDING:
+            try:
+                batch.append(self._pending.get_nowait())
+            except queue.Empty:
+                break
+        if not batch:
+            return
+
+        queries = [" ".join(query.split())[:MAX_QUERY_LENGTH] for query, _ in batch]
+        self._add(queries)
+
+        if self._redis:
+            try:
+                pipe = self._redis.pipeline(transaction=False)
+                for query, (_, logged_at) in zip(queries, batch):
+                    pipe.xadd(STREAM_KEY, {"q": query, "ts": f"{logged_at:.3f}"}, maxlen=STREAM_MAXLEN, approximate=True)
+                pipe.execute()
+            except Exception as e:
+                logging.warning(f"Query log write failed: {e}")
+
+    def _add(self, queries):
+        with self._lock:
+            now = time.monotonic()
+            elapsed = now - self._last_decay
+            if elapsed >= 60:
+                self._sketch.decay(0.5 ** (elapsed / TRENDING_HALF_LIFE_SECONDS))
+                self._last_decay = now
+
+            for query in queries:
+                key = match_key(query)
+                if len(key) < 2:
+                    continue
+                self._sketch.add(key)
+                self._display[key] = query
+            # Drop spellings of keys the sketch has evicted
+            for key in [k for k in self._display if k not in self._sketch.counts]:
+                del self._display[key]
+
+            trending = [self._display[key] for key, _ in self._sketch.top(TRENDING_SIZE)]
+            if trending != self._trending[0]:
+                self._trending = (trending, hashlib.md5(json.dumps(trending).encode()).hexdigest()[:8])
+
+    def _maybe_prewarm(self):
+        if not self._prewarm or time.monotonic() - self._last_prewarm < PREWARM_INTERVAL_SECONDS:
+            return
+        self._last_prewarm = time.monotonic()
+        queries = [query for query, _ in self.top_queries(PREWARM_TOP_K)]
+        if queries:
+            self._prewarm(queries)
+
+
+query_log = QueryLog()
@@ -0,0 +1,107 @@
+"""
+Shared Redis client for the API process.
+
+Every module gets the same client, and so the same bounded connection pool, via
+`get_redis()`. Connections are health-checked when idle for
+REDIS_HEALTH_CHECK_INTERVAL seconds instead of pinging on every construction.
+Short socket timeouts and a circuit breaker keep a degraded Redis from adding
+timeout latency to every request: after REDIS_BREAKER_FAILURES consecutive
+connection errors or timeouts, commands fail immediately with RedisUnavailable
+(a redis.ConnectionError) for REDIS_BREAKER_RESET_SECONDS, and callers fall back
+as they do for any Redis error.
+
+The job queue and sync job keep their own clients: they use blocking commands
+and long-running pipelines that these timeouts would cut short.
+"""
+import os
+import json
+import threading
+import redis
+from redis.client import Pipeline
+from app.circuit_breaker import CircuitBreaker
+
+REDIS_HOST = os.getenv('REDIS_HOST', 'redis')
+REDIS_PORT = int(os.getenv('REDIS_PORT', 6379))
+REDIS_MAX_CONNECTIONS = int(os.getenv("REDIS_MAX_CONNECTIONS", 50))
+# How long a request waits for a free pooled connection
+REDIS_POOL_TIMEOUT = float(os.getenv("REDIS_POOL_TIMEOUT", 0.5))
+REDIS_SOCKET_TIMEOUT = float(os.getenv("REDIS_SOCKET_TIMEOUT", 0.5))
+REDIS_CONNECT_TIMEOUT = float(os.getenv("REDIS_CONNECT_TIMEOUT", 0.5))
+REDIS_HEALTH_CHECK_INTERVAL = int(os.getenv("REDIS_HEALTH_CHECK_INTERVAL", 30))
+REDIS_BREAKER_FAILURES = int(os.getenv("REDIS_BREAKER_FAILURES", 5))
+REDIS_BREAKER_RESET_SECONDS = float(os.getenv("REDIS_BREAKER_RESET_SECONDS", 10))
+
+
+class RedisUnavailable(redis.ConnectionError):
+    """Raised without touching the network while the Redis circuit is open"""
+
+
+redis_breaker = CircuitBreaker(
+    "redis", REDIS_BREAKER_FAILURES, REDIS_BREAKER_RESET_SECONDS,
+    # Server-side errors (wrong type, script errors) say nothing about availability
+    error_types=(redis.ConnectionError, redis.TimeoutError),
+    open_error=RedisUnavailable
+)
+
+
+class GuardedPipeline(Pipeline):
+    def execute(self, raise_on_error=True):
+        with redis_breaker.guard():
+            return super().execute(raise_on_error)
+
+
+class GuardedRedis(redis.Redis):
+    """redis.Redis whose commands and pipelines go through the circuit breaker"""
+
+    def execute_command(self, *args, **options):
+        with redis_breaker.guard():
+            return super().execute_command(*args, **options)
+
+    def pipeline(self, transaction=True, shard_hint=None):
+        return GuardedPipeline(self.connection_pool, self.response_callbacks, transaction, shard_hint)
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_redis() -> GuardedRedis:
+    """The process-wide Redis client; connecting is lazy, so this never blocks or raises"""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = GuardedRedis(connection_pool=redis.BlockingConnectionPool(
+                    host=REDIS_HOST,
+                    port=REDIS_PORT,
+                    max_connections=REDIS_MAX_CONNECTIONS,
+                    timeout=REDIS_POOL_TIMEOUT,
+                    socket_timeout=REDIS_SOCKET_TIMEOUT,
+                    socket_connect_timeout=REDIS_CONNECT_TIMEOUT,
+                    health_check_interval=REDIS_HEALTH_CHECK_INTERVAL,
+                    decode_responses=True
+                ))
+    return _client
+
+
+def mget_json(keys, client=None) -> list:
+    """Values for `keys` in one MGET, JSON-decoded; None where missing or undecodable"""
+    if not keys:
+        return []
+    values = []
+    for raw in (client or get_redis()).mget(keys):
+        try:
+            values.append(json.loads(raw) if raw else None)
+        except json.JSONDecodeError:
+            values.append(None)
+    return values
+
+
+def setex_many_json(items: dict, ttl, client=None):
+    """SETEX every key -> JSON value in `items` in one pipelined round trip"""
+    if not items:
+        return
+    pipe = (client or get_redis()).pipeline(transaction=False)
+    for key, value in items.items():
+        pipe.setex(key, ttl, json.dumps(value))
+    pipe.execute()
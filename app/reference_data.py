@@ -0,0 +1,156 @@
+import os
+import json
+import hashlib
+import logging
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import List, Optional
+from psycopg2.extras import RealDictCursor
+from app.hybrid_searcher import DatabasePool
+from app.text_normalization import city_key, normalize_query
+
+REFRESH_INTERVAL_SECONDS = int(os.getenv("REFERENCE_DATA_REFRESH_SECONDS", 600))
+
+
+@dataclass(frozen=True)
+class ReferenceSnapshot:
+    """Immutable view of categories and cities; swapped wholesale on refresh"""
+    categories: List[dict]
+    cities: List[dict]
+    version: str
+    loaded_at: str
+    category_by_code: dict = field(default_factory=dict)
+    # city_key() of every English/Vietnamese name -> the `city` value stored in event payloads
+    city_by_key: dict = field(default_factory=dict)
+
+    @property
+    def etag(self) -> str:
+        return f'"{self.version}"'
+
+
+class ReferenceDataCache:
+    """
+    In-process cache for rarely changing reference data (categories and cities).
+
+    Data is loaded once, then refreshed by a background thread. Request handlers
+    only read the current snapshot, so they never wait on Postgres.
+    """
+
+    def __init__(self, refresh_interval: int = REFRESH_INTERVAL_SECONDS):
+        self.refresh_interval = refresh_interval
+        self._snapshot: Optional[ReferenceSnapshot] = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def get(self) -> ReferenceSnapshot:
+        snapshot = self._snapshot
+        if snapshot is None:
+            # Only happens if startup loading failed; load inline once
+            with self._lock:
+                if self._snapshot is None:
+                    self.refresh()
+            snapshot = self._snapshot
+        return snapshot
+
+    def refresh(self) -> ReferenceSnapshot:
+        """Reload from Postgres and swap the snapshot if the content changed"""
+        categories, cities = self._load()
+        version = hashlib.sha256(
+            json.dumps([categories, cities], sort_keys=True, default=str).encode()
+        ).hexdigest()[:16]
+
+        current = self._snapshot
+        if current is not None and current.version == version:
+            return current
+
+        self._snapshot = ReferenceSnapshot(
+            categories=categories,
+            cities=cities,
+            version=version,
+            loaded_at=datetime.now(timezone.utc).isoformat(),
+            category_by_code={c["code"].lower(): c for c in categories if c.get("code")},
+            city_by_key=self._city_keys(cities),
+        )
+        logging.info(f"Reference data loaded: {len(categories)} categories, {len(cities)} cities (version {version})")
+        return self._snapshot
+
+    @staticmethod
+    def _city_keys(cities):
+        city_by_key = {}
+        for city in cities:
+            # Matches how jobs/upload_events.py fills the `city` payload
+            canonical = (city["name"]["en"] or city["name"]["vi"] or "").lower()
+            for name in (city["name"]["en"], city["name"]["vi"]):
+                if name:
+                    city_by_key.setdefault(city_key(name), canonical)
+        return city_by_key
+
+    def start(self):
+        """Load the initial snapshot and start the background refresher"""
+        try:
+            self.refresh()
+        except Exception as e:
+            logging.warning(f"Initial reference data load failed: {e}. Will retry in background.")
+
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._refresh_loop, name="reference-data-refresh", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _refresh_loop(self):
+        while not self._stop.wait(self.refresh_interval):
+            try:
+                self.refresh()
+            except Exception as e:
+                # Keep serving the previous snapshot
+                logging.warning(f"Reference data refresh failed: {e}")
+
+    def _load(self):
+        with DatabasePool.get_instance().connection() as conn:
+            cursor = conn.cursor(cursor_factory=RealDictCursor)
+            cursor.execute("SELECT id, code, name_en, name_vi, image FROM categories ORDER BY name_en ASC")
+            categories = [
+                {
+                    "name": {"en": row["name_en"], "vi": row["name_vi"]},
+                    "id": row["id"],
+                    "code": row["code"],
+                    "image": row["image"],
+                    "deeplink": f"https://ticketbox.vn/search?cate={row['code']}&utm_medium=cate-{row['code']}&utm_source=tkb-view-search"
+                }
+                for row in cursor.fetchall()
+            ]
+            cursor.execute("SELECT id, origin_id, name, name_en FROM cities WHERE status=1 ORDER BY sort ASC, name_en ASC")
+            cities = [
+                {
+                    "id": row["origin_id"],
+                    "code": row["origin_id"],
+                    "name": {"en": row["name_en"], "vi": row["name"]},
+                    "image": "",  # You can add image URLs if you have them
+                    "deeplink": f"https://ticketbox.vn/search?local={row['origin_id']}&utm_medium={row['origin_id']}&utm_source=tkb-view-search"
+                }
+                for row in cursor.fetchall()
+            ]
+            cursor.close()
+            return categories, cities
+
+
+reference_data = ReferenceDataCache()
+
+
+def normalize_city(city: Optional[str]) -> Optional[str]:
+    """
+    Map user spellings of a city ("TP.HCM", "Hồ Chí Minh", "saigon") to the value
+    stored in the `city` payload; unknown cities are only case/whitespace normalized.
+    """
+    if not city:
+        return None
+    try:
+        canonical = reference_data.get().city_by_key.get(city_key(city))
+    except Exception as e:
+        logging.warning(f"City lookup unavailable: {e}")
+        canonical = None
+    return canonical or normalize_query(city)
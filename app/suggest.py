@@ -0,0 +1,153 @@
+import os
+import math
+import logging
+import threading
+from bisect import bisect_left
+from typing import Callable, List, Optional
+from qdrant_client import QdrantClient
+from app.hybrid_searcher import EVENTS_COLLECTION
+from app.reference_data import reference_data
+from app.text_normalization import match_key
+
+REFRESH_INTERVAL_SECONDS = int(os.getenv("SUGGEST_REFRESH_SECONDS", 300))
+# Prefixes up to this length have their top suggestions precomputed; longer ones are scanned
+TOP_PREFIX_LENGTH = 3
+TOP_PER_PREFIX = 20
+MAX_SCAN = 500
+
+# Base ranking per suggestion type; popular queries add their own weight on top
+TYPE_WEIGHTS = {"city": 3.0, "category": 2.0, "query": 1.5, "event": 1.0}
+
+
+class SuggestIndex:
+    """
+    Immutable prefix index over suggestion entries.
+
+    Every entry is keyed by its diacritic-folded text and by each word suffix
+    ("dem nhac jazz" also matches "jazz..."). Keys live in one sorted list, so a
+    prefix is a bisect plus a short scan; the hot 1-3 character prefixes are answered
+    from a precomputed table.
+    """
+
+    def __init__(self, entries: List[dict]):
+        self.entries = entries
+        keyed = []
+        for position, entry in enumerate(entries):
+            words = match_key(entry["text"]).split()
+            for start in range(len(words)):
+                keyed.append((" ".join(words[start:]), position))
+        keyed.sort()
+        self._keys = [key for key, _ in keyed]
+        self._positions = [position for _, position in keyed]
+
+        top = {}
+        for key, position in keyed:
+            for length in range(1, min(len(key), TOP_PREFIX_LENGTH) + 1):
+                top.setdefault(key[:length], set()).add(position)
+        self._top = {prefix: self._rank(positions)[:TOP_PER_PREFIX] for prefix, positions in top.items()}
+
+    def __len__(self):
+        return len(self.entries)
+
+    def lookup(self, text: str, limit: int = 8) -> List[dict]:
+        prefix = match_key(text)
+        if not prefix:
+            return []
+        if len(prefix) <= TOP_PREFIX_LENGTH and limit <= TOP_PER_PREFIX:
+            positions = self._top.get(prefix, [])
+        else:
+            matched = set()
+            index = bisect_left(self._keys, prefix)
+            while index < len(self._keys) and len(matched) < MAX_SCAN and self._keys[index].startswith(prefix):
+                matched.add(self._positions[index])
+                index += 1
+            positions = self._rank(matched)
+        return [self.entries[position] for position in positions[:limit]]
+
+    def _rank(self, positions):
+        return sorted(positions, key=lambda p: (-self.entries[p]["weight"], len(self.entries[p]["text"]), p))
+
+
+class SuggestIndexCache:
+    """
+    Holds the current SuggestIndex and rebuilds it in the background from event
+    names in Qdrant, the reference categories/cities and (when a source is
+    set) popular past queries.
+    """
+
+    def __init__(self, refresh_interval: int = REFRESH_INTERVAL_SECONDS):
+        self.refresh_interval = refresh_interval
+        # Optional callable returning [(query, count), ...] of popular searches
+        self.query_source: Optional[Callable[[], list]] = None
+        self._index: Optional[SuggestIndex] = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def get(self) -> SuggestIndex:
+        # Never build on the request path; an empty index until the first build finishes
+        return self._index or SuggestIndex([])
+
+    def refresh(self) -> SuggestIndex:
+        entries = self._reference_entries() + self._event_entries() + self._query_entries()
+        self._index = SuggestIndex(entries)
+        logging.info(f"Suggest index built with {len(entries)} entries")
+        return self._index
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._refresh_loop, name="suggest-index-refresh", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _refresh_loop(self):
+        while True:
+            try:
+                self.refresh()
+            except Exception as e:
+                # Keep serving the previous index
+                logging.warning(f"Suggest index build failed: {e}")
+            if self._stop.wait(self.refresh_interval):
+                break
+
+    def _reference_entries(self):
+        snapshot = reference_data.get()
+        entries = []
+        for kind, items in (("category", snapshot.categories), ("city", snapshot.cities)):
+            for item in items:
+                names = {name for name in (item["name"].get("vi"), item["name"].get("en")) if name}
+                for name in names:
+                    entries.append({"text": name, "type": kind, "code": item["code"], "weight": TYPE_WEIGHTS[kind]})
+        return entries
+
+    def _event_entries(self):
+        client = QdrantClient(os.getenv("QDRANT_URL"), api_key=os.getenv("QDRANT_API_KEY"))
+        entries = []
+        offset = None
+        while True:
+            points, offset = client.scroll(
+                collection_name=EVENTS_COLLECTION,
+                limit=1000,
+                offset=offset,
+                with_payload=["id", "eventName"],
+                with_vectors=False
+            )
+            for point in points:
+                name = (point.payload or {}).get("eventName")
+                if name:
+                    entries.append({"text": name, "type": "event", "id": point.id, "weight": TYPE_WEIGHTS["event"]})
+            if offset is None:
+                break
+        return entries
+
+    def _query_entries(self):
+        if not self.query_source:
+            return []
+        return [
+            {"text": query, "type": "query", "weight": TYPE_WEIGHTS["query"] + math.log10(1 + count)}
+            for query, count in self.query_source()
+        ]
+
+
+suggest_index = SuggestIndexCache()
@@ -0,0 +1,64 @@
+import os
+import re
+import unicodedata
+
+# Fold diacritics in search queries, so "Hà Nội" and "ha noi" share cached results and
+# embeddings. Off by default: in Vietnamese "bán", "bạn" and "ban" are different words
+QUERY_FOLD_DIACRITICS = os.getenv("QUERY_FOLD_DIACRITICS", "false").lower() == "true"
+
+# Common spellings that do not match the city names in the reference data
+CITY_ALIASES = {
+    "hcm": "ho chi minh",
+    "hcmc": "ho chi minh",
+    "tphcm": "ho chi minh",
+    "sai gon": "ho chi minh",
+    "saigon": "ho chi minh",
+    "hn": "ha noi",
+    "hanoi": "ha noi",
+    "danang": "da nang",
+    "dn": "da nang",
+}
+_CITY_PREFIXES = ("thanh pho ", "tp ")
+_CITY_SUFFIX = " city"
+
+_NON_WORD = re.compile(r"[^\w]+")
+
+
+def fold_diacritics(text: str) -> str:
+    """
+    Lowercase and strip Vietnamese (and other Latin) diacritics: "Hà Nội" -> "ha noi".
+    `đ` has no Unicode decomposition, so it is mapped explicitly.
+    """
+    decomposed = unicodedata.normalize("NFD", text.lower().replace("đ", "d"))
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+
+def match_key(text: str) -> str:
+    """Diacritic-insensitive form for prefix matching: folded, punctuation dropped, single spaces"""
+    return " ".join(_NON_WORD.sub(" ", fold_diacritics(text or "")).split())
+
+
+def normalize_query(text: str) -> str:
+    """
+    Canonical form of a query before caching and embedding: Unicode NFC (composed
+    and decomposed Vietnamese input look identical but differ in bytes), case
+    folded, whitespace collapsed.
+    """
+    return " ".join(unicodedata.normalize("NFC", text or "").casefold().split())
+
+
+def query_key(text: str) -> str:
+    """Form of a query that is both embedded and cached; also diacritic-folded with QUERY_FOLD_DIACRITICS"""
+    normalized = normalize_query(text)
+    return fold_diacritics(normalized) if QUERY_FOLD_DIACRITICS else normalized
+
+
+def city_key(name: str) -> str:
+    """Lookup key for a city name: "TP.HCM", "Hồ Chí Minh" and "Ho Chi Minh City" all give "ho chi minh" """
+    key = match_key(name)
+    for prefix in _CITY_PREFIXES:
+        if key.startswith(prefix):
+            key = key[len(prefix):]
+    if key.endswith(_CITY_SUFFIX):
+        key = key[:-len(_CITY_SUFFIX)]
+    return CITY_ALIASES.get(key, key)
@@ -0,0 +1,129 @@
+"""
+Two-tier cache for JSON-serializable results: a bounded in-process L1 (TTLCache
+with memory accounting) in front of Redis (L2).
+
+Both tiers use the same keys, suffixed with the cache generation stored in Redis
+under CACHE_VERSION_KEY. The sync job bumps the generation after it changes the
+index, which retires every entry in both tiers at once. Each process re-reads the
+generation at most every CACHE_VERSION_CHECK_SECONDS, so an L1 hit costs no
+network round trip and serves pre-sync results for at most that long.
+
+With `stale_ttl`, each value is also kept in Redis under an unversioned stale
+key for that long, so `get_stale` can still answer when the backend that
+computes the values is down.
+"""
+import os
+import json
+import time
+import logging
+import threading
+from app.metrics import record_cache
+from app.tracing import span
+
+CACHE_VERSION_KEY = "cache:version"
+CACHE_VERSION_CHECK_SECONDS = float(os.getenv("CACHE_VERSION_CHECK_SECONDS", 2))
+
+
+class CacheVersion:
+    """The process's view of the cache generation, refreshed lazily from Redis"""
+
+    def __init__(self, check_interval: float = CACHE_VERSION_CHECK_SECONDS):
+        self.check_interval = check_interval
+        self._value = "0"
+        self._checked_at = float("-inf")
+        self._lock = threading.Lock()
+
+    def current(self, redis_client) -> str:
+        if redis_client is None or time.monotonic() - self._checked_at < self.check_interval:
+            return self._value
+        with self._lock:
+            if time.monotonic() - self._checked_at < self.check_interval:
+                return self._value
+            self._checked_at = time.monotonic()
+            try:
+                self._value = redis_client.get(CACHE_VERSION_KEY) or "0"
+            except Exception as e:
+                logging.warning(f"Cache version check failed: {e}")
+        return self._value
+
+
+cache_version = CacheVersion()
+
+
+def bump_cache_version(redis_client) -> int:
+    """Invalidate every tiered cache entry in all processes"""
+    return redis_client.incr(CACHE_VERSION_KEY)
+
+
+class TieredCache:
+    """
+    `get`/`set` of one namespace through L1 then Redis. `l1` may be shared between
+    instances (e.g. per-searcher caches of the same namespace). `copy` is applied to
+    values handed out of or into L1, for callers that modify results in place.
+    Redis errors propagate to the caller after L1 has been consulted.
+    """
+
+    def __init__(self, namespace: str, redis_client, l1, ttl, copy=None, stale_ttl=None):
+        self.namespace = namespace
+        self.redis_client = redis_client
+        self.l1 = l1
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._copy = copy or (lambda value: value)
+
+    def versioned_key(self, key: str) -> str:
+        # Entries of older generations are never hit again and age out of L1 by LRU/TTL
+        return f"{key}:v{cache_version.current(self.redis_client)}"
+
+    def get(self, key: str):
+        key = self.versioned_key(key)
+        value = self.l1.get(key)
+        record_cache(self.namespace, value is not None, tier="local")
+        if value is not None:
+            return self._copy(value)
+        if self.redis_client is None:
+            return None
+
+        with span("redis.get", cache_namespace=self.namespace):
+            raw = self.redis_client.get(key)
+        record_cache(self.namespace, bool(raw), tier="redis")
+        if not raw:
+            return None
+        value = json.loads(raw)
+        # Serialized length stands in for the entry's memory cost
+        self.l1.set(key, self._copy(value), size=len(raw))
+        return value
+
+    def set(self, key: str, value):
+        stale_key = self._stale_key(key)
+        key = self.versioned_key(key)
+        raw = json.dumps(value)
+        self.l1.set(key, self._copy(value), size=len(raw))
+        if self.redis_client is None:
+            return
+        with span("redis.setex", cache_namespace=self.namespace):
+            if not self.stale_ttl:
+                self.redis_client.setex(key, self.ttl, raw)
+                return
+            pipe = self.redis_client.pipeline(transaction=False)
+            pipe.setex(key, self.ttl, raw)
+            pipe.setex(stale_key, self.stale_ttl, raw)
+            pipe.execute()
+
+    def get_stale(self, key: str):
+        """The last value stored for `key` in any generation, or None; never raises"""
+        if self.redis_client is None or not self.stale_ttl:
+            return None
+        try:
+            with span("redis.get", cache_namespace=self.namespace):
+                raw = self.redis_client.get(self._stale_key(key))
+        except Exception as e:
+            logging.warning(f"Stale cache retrieval failed: {e}")
+            return None
+        record_cache(self.namespace, bool(raw), tier="stale")
+        return json.loads(raw) if raw else None
+
+    @staticmethod
+    def _stale_key(key: str) -> str:
+        # Unversioned: a stale answer from before the last sync beats no answer
+        return f"{key}:stale"
@@ -0,0 +1,84 @@
+"""
+Opt-in OpenTelemetry tracing.
+
+Set TRACING_ENABLED=true to export spans. TRACING_EXPORTER selects `otlp` (default,
+configured by the standard OTEL_EXPORTER_OTLP_* variables), `console` or `memory`.
+Until configure_tracing() runs, the OpenTelemetry API hands out no-op spans, so the
+instrumentation can stay in place at negligible cost.
+"""
+import os
+import functools
+from opentelemetry import trace, context, propagate
+from opentelemetry.trace import SpanKind
+
+TRACING_ENABLED = os.getenv("TRACING_ENABLED", "false").lower() == "true"
+TRACING_EXPORTER = os.getenv("TRACING_EXPORTER", "otlp")
+SERVICE_NAME = os.getenv("OTEL_SERVICE_NAME", "search-service")
+
+# Proxy tracer: resolves to whatever provider configure_tracing() installs
+tracer = trace.get_tracer("search-service")
+
+
+def configure_tracing(exporter: str = None):
+    """
+    Install the SDK tracer provider and return its span exporter. With
+    exporter="memory" that is an InMemorySpanExporter whose finished spans
+    can be read back with get_finished_spans().
+    """
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor, SimpleSpanProcessor, ConsoleSpanExporter
+    from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+
+    exporter = exporter or TRACING_EXPORTER
+    provider = TracerProvider(resource=Resource.create({"service.name": SERVICE_NAME}))
+    if exporter == "memory":
+        span_exporter = InMemorySpanExporter()
+        provider.add_span_processor(SimpleSpanProcessor(span_exporter))
+    elif exporter == "console":
+        span_exporter = ConsoleSpanExporter()
+        provider.add_span_processor(BatchSpanProcessor(span_exporter))
+    else:
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        span_exporter = OTLPSpanExporter()
+        provider.add_span_processor(BatchSpanProcessor(span_exporter))
+    trace.set_tracer_provider(provider)
+    return span_exporter
+
+
+def span(name: str, **attributes):
+    """`with span("qdrant.query_points", collection=...):` opens a child of the current span"""
+    return tracer.start_as_current_span(name, attributes={k: v for k, v in attributes.items() if v is not None})
+
+
+def server_span(name: str, headers):
+    """Root span for an incoming request, continuing the caller's trace from `traceparent`"""
+    return tracer.start_as_current_span(name, context=propagate.extract(headers), kind=SpanKind.SERVER)
+
+
+def traced(name: str):
+    """Decorator form of `span`"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def with_context(func):
+    """
+    Bind `func` to the caller's trace context. Thread pool workers do not inherit
+    it, so wrap work before `executor.submit` to keep its spans in the request trace.
+    """
+    ctx = context.get_current()
+
+    @functools.wraps(func)
+    def run(*args, **kwargs):
+        token = context.attach(ctx)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            context.detach(token)
+    return run
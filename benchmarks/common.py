@@ -0,0 +1,69 @@
+"""Timing statistics and the JSON result format shared by the benchmark scripts."""
+import os
+import sys
+import json
+import time
+import platform
+import subprocess
+from datetime import datetime, timezone
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+
+def summarize(samples):
+    """p50/p95/p99/mean/max in milliseconds for a list of durations in seconds"""
+    if not samples:
+        return {"count": 0}
+    ordered = sorted(samples)
+
+    def pct(p):
+        return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))] * 1000
+
+    return {
+        "count": len(ordered),
+        "mean_ms": sum(ordered) / len(ordered) * 1000,
+        "p50_ms": pct(50),
+        "p95_ms": pct(95),
+        "p99_ms": pct(99),
+        "max_ms": ordered[-1] * 1000,
+    }
+
+
+def git_sha():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=os.path.dirname(__file__), stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except Exception:
+        return None
+
+
+def run_meta(kind: str, args) -> dict:
+    return {
+        "kind": kind,
+        "git_sha": git_sha(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "args": vars(args),
+    }
+
+
+def save_results(kind: str, meta: dict, results: dict, output: str = None) -> str:
+    """Write {"meta": ..., "results": ...} to `output` or benchmarks/results/<kind>-<sha>-<time>.json"""
+    if not output:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        output = os.path.join(RESULTS_DIR, f"{kind}-{meta.get('git_sha') or 'nogit'}-{stamp}.json")
+    with open(output, "w") as f:
+        json.dump({"meta": meta, "results": results}, f, indent=2)
+    return output
+
+
+def print_table(results: dict):
+    print(f"{'name':<40} {'count':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'ops/s':>10}")
+    for name, stats in results.items():
+        if not stats.get("count"):
+            continue
+        print(f"{name:<40} {stats['count']:>7} {stats['p50_ms']:>9.3f} {stats['p95_ms']:>9.3f} "
+              f"{stats['p99_ms']:>9.3f} {stats.get('ops_per_sec', 0):>10.1f}")
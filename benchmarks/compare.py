@@ -0,0 +1,58 @@
+"""
+Compare two benchmark result files and flag regressions.
+
+    python -m benchmarks.compare baseline.json candidate.json --threshold 10
+
+Exits with status 1 when any benchmark's p50/p95/p99 got slower, or its
+throughput dropped, by more than --threshold percent.
+"""
+import sys
+import json
+import argparse
+
+LATENCY_FIELDS = ("p50_ms", "p95_ms", "p99_ms")
+
+
+def compare(baseline: dict, candidate: dict, threshold: float):
+    """Rows of (name, field, before, after, change %, regressed)"""
+    rows = []
+    for name, before in baseline["results"].items():
+        after = candidate["results"].get(name)
+        if not after or not before.get("count") or not after.get("count"):
+            continue
+        for field in LATENCY_FIELDS + ("ops_per_sec",):
+            if field not in before or field not in after or not before[field]:
+                continue
+            change = (after[field] - before[field]) / before[field] * 100
+            # Higher latency is worse; lower throughput is worse
+            worse = change if field != "ops_per_sec" else -change
+            rows.append((name, field, before[field], after[field], change, worse > threshold))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Diff two benchmark result files")
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--threshold", type=float, default=10.0, help="Regression threshold in percent")
+    args = parser.parse_args()
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.candidate) as f:
+        candidate = json.load(f)
+
+    print(f"baseline {baseline['meta'].get('git_sha')} vs candidate {candidate['meta'].get('git_sha')}")
+    rows = compare(baseline, candidate, args.threshold)
+    for name, field, before, after, change, regressed in rows:
+        flag = "  REGRESSION" if regressed else ""
+        print(f"{name:<40} {field:<12} {before:>12.3f} {after:>12.3f} {change:>+8.1f}%{flag}")
+
+    regressions = [row for row in rows if row[-1]]
+    if regressions:
+        print(f"{len(regressions)} regression(s) over {args.threshold}%")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
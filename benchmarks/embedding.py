@@ -0,0 +1,154 @@
+"""
+Embedding backend benchmark: per-query latency and batch throughput of the dense
+model across ONNX thread counts and batch sizes.
+
+    python -m benchmarks.embedding --backends fastembed,sentence-transformers --threads 1,2,4 --batch-sizes 1,8,32,64
+    python -m benchmarks.embedding --model-path models/minilm-int8     # compare a quantized export
+    python -m benchmarks.embedding quantize models/minilm-int8         # write that export
+
+`fastembed` is what the service runs (see app/embedding.py); `sentence-transformers`
+(PyTorch) is there for comparison and `hash` only checks the harness itself.
+"""
+import os
+import time
+import shutil
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from benchmarks.common import summarize, run_meta, save_results, print_table
+from benchmarks.micro import QUERIES
+from benchmarks.stand_ins import HashEmbedding, synthetic_events
+from app.embedding import DENSE_MODEL, EmbeddingBatcher
+
+
+def load_backend(name: str, threads: int, model_path: str = None):
+    """Return (embed_queries, embed_documents) callables for one backend/thread count"""
+    if name == "fastembed":
+        from fastembed import TextEmbedding
+        from app.embedding import model_options
+        model = TextEmbedding(model_name=DENSE_MODEL, **model_options(threads=threads, model_path=model_path))
+        return (
+            lambda texts: list(model.query_embed(texts)),
+            lambda texts, batch_size: list(model.embed(texts, batch_size=batch_size)),
+        )
+    if name == "sentence-transformers":
+        import torch
+        from sentence_transformers import SentenceTransformer
+        torch.set_num_threads(threads)
+        model = SentenceTransformer(DENSE_MODEL)
+        return (
+            lambda texts: model.encode(texts, batch_size=len(texts)),
+            lambda texts, batch_size: model.encode(texts, batch_size=batch_size),
+        )
+    if name == "hash":
+        model = HashEmbedding()
+        return (
+            lambda texts: list(model.query_embed(texts)),
+            lambda texts, batch_size: list(model.embed(texts, batch_size=batch_size)),
+        )
+    raise ValueError(f"Unknown backend: {name}")
+
+
+def concurrent_queries(encode, queries, concurrency: int):
+    """Encode `queries` one per call from `concurrency` threads; latency per call, ops/s overall"""
+    def timed(query):
+        start = time.perf_counter()
+        encode(query)
+        return time.perf_counter() - start
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        samples = list(executor.map(timed, queries))
+    stats = summarize(samples)
+    stats["ops_per_sec"] = len(samples) / (time.perf_counter() - started)
+    return stats
+
+
+def run(args):
+    documents = [event["document"] for event in synthetic_events(args.documents, args.seed)]
+    queries = [QUERIES[i % len(QUERIES)] + f" {i}" for i in range(args.queries)]
+    results = {}
+    for backend in args.backends.split(","):
+        for threads in (int(t) for t in args.threads.split(",")):
+            embed_queries, embed_documents = load_backend(backend, threads, args.model_path)
+            prefix = f"{backend}/threads={threads}"
+            embed_documents(documents[:64], 32)  # warm up the session
+
+            # One query at a time, as an uncached /api/search request encodes it
+            samples = []
+            for query in queries:
+                start = time.perf_counter()
+                embed_queries([query])
+                samples.append(time.perf_counter() - start)
+            results[f"{prefix}/query"] = summarize(samples)
+            results[f"{prefix}/query"]["ops_per_sec"] = len(samples) / sum(samples)
+
+            # Indexing throughput per batch size; latency is per batch, ops/s per document
+            for batch_size in (int(b) for b in args.batch_sizes.split(",")):
+                samples = []
+                for start_index in range(0, len(documents), batch_size):
+                    batch = documents[start_index:start_index + batch_size]
+                    start = time.perf_counter()
+                    embed_documents(batch, batch_size)
+                    samples.append(time.perf_counter() - start)
+                stats = summarize(samples)
+                stats["ops_per_sec"] = len(documents) / sum(samples)
+                results[f"{prefix}/batch={batch_size}"] = stats
+
+            # Concurrent single-query traffic, encoded directly vs through the micro-batcher
+            if args.concurrency:
+                results[f"{prefix}/concurrent={args.concurrency}/direct"] = concurrent_queries(
+                    lambda query: embed_queries([query]), queries, args.concurrency)
+                batcher = EmbeddingBatcher(lambda texts: iter(embed_queries(texts)),
+                                           max_batch_size=args.max_batch_size, max_wait_ms=args.max_wait_ms)
+                results[f"{prefix}/concurrent={args.concurrency}/batched"] = concurrent_queries(
+                    batcher.embed, queries, args.concurrency)
+            print_table({k: v for k, v in results.items() if k.startswith(prefix)})
+    return results
+
+
+def quantize(output_dir: str):
+    """Copy the fastembed model directory to `output_dir` with its ONNX weights quantized to int8"""
+    from fastembed import TextEmbedding
+    from onnxruntime.quantization import quantize_dynamic, QuantType
+
+    model = TextEmbedding(model_name=DENSE_MODEL)
+    source = str(model.model._model_dir)
+    shutil.copytree(source, output_dir, dirs_exist_ok=True)
+    for root, _, files in os.walk(output_dir):
+        for file in files:
+            if file.endswith(".onnx"):
+                path = os.path.join(root, file)
+                quantize_dynamic(path, path, weight_type=QuantType.QInt8)
+                print(f"Quantized {path}")
+    print(f"Set EMBEDDING_MODEL_PATH={output_dir} to serve the int8 model")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Embedding backend benchmark")
+    parser.add_argument("command", nargs="?", default="run", choices=["run", "quantize"])
+    parser.add_argument("output_dir", nargs="?", help="quantize: where to write the int8 model")
+    parser.add_argument("--backends", default="fastembed")
+    parser.add_argument("--threads", default=str(os.cpu_count() or 1), help="Comma-separated thread counts")
+    parser.add_argument("--batch-sizes", default="1,8,32,64", help="Comma-separated indexing batch sizes")
+    parser.add_argument("--queries", type=int, default=200, help="Single-query encodes per configuration")
+    parser.add_argument("--documents", type=int, default=1024, help="Synthetic documents per batch run")
+    parser.add_argument("--concurrency", type=int, default=16, help="Threads for the concurrent query run (0 skips it)")
+    parser.add_argument("--max-batch-size", type=int, default=32, help="Micro-batcher batch size for the concurrent run")
+    parser.add_argument("--max-wait-ms", type=float, default=2, help="Micro-batcher wait for the concurrent run")
+    parser.add_argument("--model-path", help="fastembed: load this ONNX export (e.g. a quantized one)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Result file (default: benchmarks/results/embedding-<sha>-<time>.json)")
+    args = parser.parse_args()
+
+    if args.command == "quantize":
+        if not args.output_dir:
+            parser.error("quantize needs an output directory")
+        quantize(args.output_dir)
+        return
+
+    results = run(args)
+    print(f"Saved {save_results('embedding', run_meta('embedding', args), results, args.output)}")
+
+
+if __name__ == "__main__":
+    main()
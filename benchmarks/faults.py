@@ -0,0 +1,221 @@
+"""
+Fault-injection harness: drives the in-process API over the local stand-ins
+while one backend misbehaves, and reports latency, status codes, degraded
+responses and circuit breaker state per scenario.
+
+    python -m benchmarks.faults
+    python -m benchmarks.faults --scenarios qdrant_down,postgres_slow --requests 400
+
+Faults are injected into the stand-ins, not the app. A "slow" backend sleeps
+for the simulated deadline and then raises the error the real client would
+(httpx read timeout for Qdrant, QueryCanceled for Postgres). That is what the
+service sees once QDRANT_TIMEOUT and POSTGRES_STATEMENT_TIMEOUT_MS cut a hung
+call short. Each scenario starts in a fresh cache generation, as right after a
+sync, so searches miss the live cache and reach Qdrant. Only the stale copies
+are left to fall back on.
+"""
+import os
+import time
+import random
+import asyncio
+import argparse
+from contextlib import contextmanager, nullcontext
+import httpx
+from benchmarks import stand_ins
+from benchmarks.common import summarize, run_meta, save_results, print_table
+
+QDRANT_METHODS = ["query_points", "scroll", "retrieve", "facet", "count"]
+DEGRADED_REASONS = ["search_stale_cache", "interests_skipped", "chat_search_only", "facets_skipped"]
+BREAKERS = ["qdrant", "postgres", "redis"]
+
+
+def _slow_or_failing(func, delay: float, error_factory):
+    def wrapper(*args, **kwargs):
+        if delay:
+            time.sleep(delay)
+        if error_factory:
+            raise error_factory()
+        return func(*args, **kwargs)
+    return wrapper
+
+
+@contextmanager
+def qdrant_fault(client, delay: float, error_factory):
+    originals = {name: getattr(client, name) for name in QDRANT_METHODS}
+    for name, func in originals.items():
+        setattr(client, name, _slow_or_failing(func, delay, error_factory))
+    try:
+        yield
+    finally:
+        for name in originals:
+            delattr(client, name)  # back to the class's methods
+
+
+@contextmanager
+def postgres_fault(delay: float, error_factory):
+    original = stand_ins._SqliteCursor.execute
+    stand_ins._SqliteCursor.execute = _slow_or_failing(original, delay, error_factory)
+    try:
+        yield
+    finally:
+        stand_ins._SqliteCursor.execute = original
+
+
+@contextmanager
+def pool_exhausted():
+    """Hold every pooled Postgres connection, as a burst of slow queries would"""
+    from app.hybrid_searcher import DatabasePool
+    db_pool = DatabasePool.get_instance()
+    held = [db_pool.get_connection() for _ in range(DatabasePool._pool.maxconn)]
+    try:
+        yield
+    finally:
+        for conn in held:
+            db_pool.release_connection(conn)
+
+
+def scenarios(env, deadline: float):
+    from psycopg2.errors import QueryCanceled
+    from qdrant_client.http.exceptions import ResponseHandlingException
+
+    def read_timeout():
+        return ResponseHandlingException(httpx.ReadTimeout("timed out"))
+
+    def refused():
+        return ResponseHandlingException(httpx.ConnectError("connection refused"))
+
+    def statement_timeout():
+        return QueryCanceled("canceling statement due to statement timeout")
+
+    return {
+        "baseline": nullcontext,
+        "qdrant_slow": lambda: qdrant_fault(env.qdrant_client, deadline, read_timeout),
+        "qdrant_down": lambda: qdrant_fault(env.qdrant_client, 0, refused),
+        "postgres_slow": lambda: postgres_fault(deadline, statement_timeout),
+        "pool_exhausted": pool_exhausted,
+    }
+
+
+def _counter(name, labels):
+    from prometheus_client import REGISTRY
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+def _reset():
+    """Close every breaker and retire the live cache generation (stale copies survive)"""
+    from app.backends import qdrant_breaker, postgres_breaker
+    from app.redis_pool import redis_breaker, get_redis
+    from app.tiered_cache import cache_version, bump_cache_version
+    from app.hybrid_searcher import search_l1_cache
+
+    for breaker in (qdrant_breaker, postgres_breaker, redis_breaker):
+        breaker.record_success()
+    bump_cache_version(get_redis())
+    cache_version._checked_at = float("-inf")
+    search_l1_cache.clear()
+    for key in get_redis().keys("events_by_category:*"):
+        get_redis().delete(key)
+
+
+def search_text_requests(requests):
+    """
+    Materialize a request mix, failing if a search request carries no `q`. Without
+    text, searches take the filters-only path and skip the query embedding and text
+    search that the Qdrant scenarios are meant to stress.
+    """
+    requests = list(requests)
+    searches = [params for endpoint, _, params in requests if endpoint == "search"]
+    missing = sum(1 for params in searches if not params.get("q"))
+    if missing:
+        raise SystemExit(f"{missing} of {len(searches)} search requests have no q; they would skip the text search path")
+    return iter(requests)
+
+
+async def run_scenario(client, rng, env, name, fault, args):
+    from app.backends import qdrant_breaker, postgres_breaker
+    from app.redis_pool import redis_breaker
+    from benchmarks.load import build_requests, drive, DEFAULT_MIX
+
+    event_ids = [event["id"] for event in env.events]
+    user_ids = [f"user-{u}" for u in range(100)]
+    _reset()
+    degraded_before = {r: _counter("degraded_responses_total", {"reason": r}) for r in DEGRADED_REASONS}
+    rejected_before = {b: _counter("circuit_breaker_rejections_total", {"name": b}) for b in BREAKERS}
+
+    requests = search_text_requests(build_requests(rng, args.requests, event_ids, DEFAULT_MIX, user_ids))
+    with fault():
+        latencies, statuses, elapsed = await drive(client, requests, args.concurrency)
+
+    results = {}
+    for endpoint, samples in sorted(latencies.items()):
+        stats = summarize(samples)
+        stats["ops_per_sec"] = len(samples) / elapsed
+        stats["status"] = dict(statuses[endpoint])
+        results[f"{name}/{endpoint}"] = stats
+    results[f"{name}/total"] = {
+        **summarize([s for samples in latencies.values() for s in samples]),
+        "ops_per_sec": sum(len(s) for s in latencies.values()) / elapsed,
+        "degraded": {r: _counter("degraded_responses_total", {"reason": r}) - degraded_before[r]
+                     for r in DEGRADED_REASONS},
+        "rejected": {b: _counter("circuit_breaker_rejections_total", {"name": b}) - rejected_before[b]
+                     for b in BREAKERS},
+        "breaker_state": {"qdrant": qdrant_breaker.state, "postgres": postgres_breaker.state,
+                          "redis": redis_breaker.state},
+    }
+    return results
+
+
+async def run(args):
+    # Short pool wait so exhaustion shows up within a benchmark run; must precede the app imports
+    os.environ.setdefault("DB_POOL_TIMEOUT", str(args.deadline_ms / 1000))
+    env = stand_ins.install(events=args.events, seed=args.seed)
+    from benchmarks.load import in_process_app, build_requests, drive, DEFAULT_MIX
+
+    rng = random.Random(args.seed)
+    available = scenarios(env, args.deadline_ms / 1000)
+    names = args.scenarios.split(",") if args.scenarios else list(available)
+    unknown = [name for name in names if name not in available]
+    if unknown:
+        raise SystemExit(f"Unknown scenarios: {', '.join(unknown)} (choose from {', '.join(available)})")
+
+    results = {}
+    transport = httpx.ASGITransport(app=in_process_app(), raise_app_exceptions=False)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=args.timeout) as client:
+        # Healthy traffic first, so the stale copies exist like they would in production
+        event_ids = [event["id"] for event in env.events]
+        warmup = search_text_requests(build_requests(rng, args.warmup, event_ids, DEFAULT_MIX,
+                                                     [f"user-{u}" for u in range(100)]))
+        await drive(client, warmup, args.concurrency)
+        for name in names:
+            results.update(await run_scenario(client, random.Random(args.seed), env, name, available[name], args))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Search service fault-injection harness")
+    parser.add_argument("--scenarios", help="Comma-separated subset of: baseline, qdrant_slow, qdrant_down, "
+                                            "postgres_slow, pool_exhausted (default: all)")
+    parser.add_argument("--events", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=300, help="Requests per scenario")
+    parser.add_argument("--warmup", type=int, default=600)
+    parser.add_argument("--deadline-ms", type=float, default=200,
+                        help="How long a slow backend stalls before its simulated timeout fires")
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Result file (default: benchmarks/results/faults-<sha>-<time>.json)")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    print_table(results)
+    for name, stats in results.items():
+        if "status" in stats:
+            print(f"{name}: status {stats['status']}")
+        if "degraded" in stats:
+            print(f"{name}: degraded {stats['degraded']} rejected {stats['rejected']} "
+                  f"breakers {stats['breaker_state']}")
+    print(f"Saved {save_results('faults', run_meta('faults', args), results, args.output)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""
+HTTP load generator for /api/search, /events-by-category and /events/{id}/related.
+
+In-process (default): the search routers are mounted on a fresh FastAPI app backed
+by the local stand-ins and driven through httpx's ASGI transport, so no server,
+Qdrant, Redis or Postgres is needed. With --base-url the same mix is sent to a
+running deployment instead.
+
+    python -m benchmarks.load --events 5000 --concurrency 16 --requests 2000
+    python -m benchmarks.load --base-url http://localhost:8000 --duration 60
+"""
+import time
+import random
+import asyncio
+import argparse
+import itertools
+from collections import Counter, defaultdict
+import httpx
+from benchmarks import stand_ins
+from benchmarks.common import summarize, run_meta, save_results, print_table
+from benchmarks.micro import QUERIES
+
+# endpoint -> share of requests
+DEFAULT_MIX = {"search": 0.7, "events_by_category": 0.1, "related": 0.2}
+CITIES = ["", "", "ha noi", "ho chi minh", "da nang"]
+
+
+def zipf_queries(rng: random.Random, count: int, vocabulary: int = 200, s: float = 1.1):
+    """A Zipf-distributed query stream: a few hot queries and a long tail, like real search traffic"""
+    words = stand_ins.WORDS
+    pool = QUERIES + [" ".join(rng.sample(words, rng.randint(1, 3))) for _ in range(vocabulary - len(QUERIES))]
+    weights = [1 / (rank + 1) ** s for rank in range(len(pool))]
+    return rng.choices(pool, weights=weights, k=count)
+
+
+def build_requests(rng: random.Random, count: int, event_ids, mix: dict, user_ids):
+    queries = iter(zipf_queries(rng, count))
+    names = list(mix)
+    for endpoint in rng.choices(names, weights=[mix[n] for n in names], k=count):
+        user = rng.choice(user_ids) if user_ids and rng.random() < 0.3 else None
+        params = {"userId": user} if user else {}
+        if endpoint == "search":
+            params.update(q=next(queries), limit=15, page=rng.choice([1, 1, 1, 2]))
+            city = rng.choice(CITIES)
+            if city:
+                params["city"] = city
+            yield endpoint, "/api/search", params
+        elif endpoint == "events_by_category":
+            yield endpoint, "/api/search/events-by-category", params
+        else:
+            next(queries)
+            yield endpoint, f"/api/search/events/{rng.choice(event_ids)}/related", params
+
+
+def in_process_app():
+    from fastapi import FastAPI
+    from api.search.semanticSearch import router as search_router
+    from api.getRelatedEvents import router as related_router
+    from api.search.events_by_categories import router as events_by_categories_router
+    from app.backends import install_unavailable_handlers
+
+    app = FastAPI()
+    install_unavailable_handlers(app)
+    app.include_router(search_router, prefix="/api/search")
+    app.include_router(related_router, prefix="/api/search")
+    app.include_router(events_by_categories_router, prefix="/api/search")
+    return app
+
+
+async def drive(client: httpx.AsyncClient, requests, concurrency: int, deadline: float = None):
+    latencies = defaultdict(list)
+    statuses = defaultdict(Counter)
+    lock = asyncio.Lock()
+
+    async def worker():
+        while deadline is None or time.perf_counter() < deadline:
+            async with lock:
+                item = next(requests, None)
+            if item is None:
+                return
+            endpoint, path, params = item
+            start = time.perf_counter()
+            try:
+                response = await client.get(path, params=params)
+                status = str(response.status_code)
+            except httpx.HTTPError as e:
+                status = type(e).__name__
+            latencies[endpoint].append(time.perf_counter() - start)
+            statuses[endpoint][status] += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, statuses, time.perf_counter() - started
+
+
+async def run(args):
+    rng = random.Random(args.seed)
+    if args.base_url:
+        event_ids = list(range(1, args.events + 1))
+        user_ids = []
+        transport = None
+        base_url = args.base_url
+    else:
+        env = stand_ins.install(events=args.events, seed=args.seed, embedder=args.embedder)
+        event_ids = [event["id"] for event in env.events]
+        user_ids = [f"user-{u}" for u in range(100)]
+        transport = httpx.ASGITransport(app=in_process_app())
+        base_url = "http://bench"
+
+    total = args.requests if not args.duration else None
+    requests = build_requests(rng, total + args.warmup if total else 10 ** 9, event_ids, DEFAULT_MIX, user_ids)
+    async with httpx.AsyncClient(transport=transport, base_url=base_url, timeout=args.timeout) as client:
+        # Warm the caches and lazy initialisation before measuring
+        await drive(client, itertools.islice(requests, args.warmup), args.concurrency)
+        deadline = time.perf_counter() + args.duration if args.duration else None
+        latencies, statuses, elapsed = await drive(client, requests, args.concurrency, deadline)
+
+    results = {}
+    for endpoint, samples in sorted(latencies.items()):
+        stats = summarize(samples)
+        stats["ops_per_sec"] = len(samples) / elapsed
+        stats["status"] = dict(statuses[endpoint])
+        results[endpoint] = stats
+    all_samples = [s for samples in latencies.values() for s in samples]
+    results["total"] = summarize(all_samples)
+    results["total"]["ops_per_sec"] = len(all_samples) / elapsed
+    results["total"]["elapsed_s"] = elapsed
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Search service HTTP load generator")
+    parser.add_argument("--base-url", help="Target a running service instead of the in-process stand-ins")
+    parser.add_argument("--events", type=int, default=5000, help="Synthetic corpus size (or id range with --base-url)")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--duration", type=float, help="Run for this many seconds instead of a fixed request count")
+    parser.add_argument("--warmup", type=int, default=100)
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--embedder", choices=["hash", "fastembed"], default="hash")
+    parser.add_argument("--output", help="Result file (default: benchmarks/results/load-<sha>-<time>.json)")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    print_table(results)
+    for endpoint, stats in results.items():
+        if "status" in stats:
+            print(f"{endpoint}: {stats['status']}")
+    print(f"Saved {save_results('load', run_meta('load', args), results, args.output)}")
+
+
+if __name__ == "__main__":
+    main()
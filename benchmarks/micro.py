@@ -0,0 +1,99 @@
+"""
+Micro-benchmarks for the hot paths of HybridSearcher, run against the local stand-ins.
+
+    python -m benchmarks.micro --events 5000 --iterations 2000
+"""
+import time
+import argparse
+import random
+from benchmarks import stand_ins
+from benchmarks.common import summarize, run_meta, save_results, print_table
+
+QUERIES = ["nhạc jazz", "đêm nhạc acoustic", "lễ hội ẩm thực", "triển lãm tranh", "kịch hài", "marathon",
+           "workshop gốm", "rượu vang", "concert mùa hè", "múa rối nước"]
+
+
+def bench(func, iterations: int, warmup: int = 20):
+    """Run `func(i)` `iterations` times and return its timing summary plus ops/s"""
+    for i in range(warmup):
+        func(i)
+    samples = []
+    started = time.perf_counter()
+    for i in range(iterations):
+        start = time.perf_counter()
+        func(i)
+        samples.append(time.perf_counter() - start)
+    stats = summarize(samples)
+    stats["ops_per_sec"] = iterations / (time.perf_counter() - started)
+    return stats
+
+
+def run(args):
+    env = stand_ins.install(events=args.events, seed=args.seed, embedder=args.embedder)
+    # Imported after install() so the app builds its clients against the stand-ins
+    from app.hybrid_searcher import HybridSearcher, models, EVENTS_COLLECTION
+
+    searcher = HybridSearcher(collection_name=EVENTS_COLLECTION)
+    rng = random.Random(args.seed)
+    n = args.iterations
+
+    def category_filter():
+        return models.Filter(must=[models.FieldCondition(key="categories", match=models.MatchAny(any=["music", "art"]))])
+
+    filter_args = dict(city="ha noi", startDate="2025-01-01", endDate="2025-12-31",
+                       min_lat=None, max_lat=None, min_lon=None, max_lon=None)
+    payloads = [event for event in env.events[:1000]]
+    ids = [event["id"] for event in env.events]
+    unique = [f"{rng.choice(QUERIES)} {i}" for i in range(n + 100)]
+    query_filter = searcher._build_query_filter(extra_filter=None, **filter_args)
+
+    results = {}
+    results["generate_cache_key"] = bench(
+        lambda i: searcher._generate_cache_key(QUERIES[i % len(QUERIES)], city="ha noi", extra_filter=category_filter(),
+                                               startDate="2025-01-01", endDate="2025-12-31"), n)
+    large_filter = models.Filter(must=[
+        models.FieldCondition(key="categories", match=models.MatchAny(any=[f"category-{c}" for c in range(50)])),
+        models.FieldCondition(key="city", match=models.MatchAny(any=[city for city, _, _, _ in stand_ins.CITIES])),
+        models.FieldCondition(key="minimumPrice", range=models.Range(gte=0, lte=500000)),
+    ])
+    results["generate_cache_key_large_filter"] = bench(
+        lambda i: searcher._generate_cache_key(QUERIES[i % len(QUERIES)], extra_filter=large_filter), n)
+    results["build_query_filter"] = bench(
+        lambda i: searcher._build_query_filter(extra_filter=category_filter(), **filter_args), n)
+    results["build_query_filter_geo_price"] = bench(
+        lambda i: searcher._build_query_filter(extra_filter=None, city=None, startDate=None, endDate=None,
+                                               min_lat=None, max_lat=None, min_lon=None, max_lon=None,
+                                               lat=10.77, lon=106.70, radius_km=5, min_price=0, max_price=200000), n)
+    results["embed_query_cold"] = bench(lambda i: searcher.embed_query(unique[i]), n, warmup=0)
+    results["embed_query_cached"] = bench(lambda i: searcher.embed_query(QUERIES[i % len(QUERIES)]), n)
+    results["payload_to_result"] = bench(lambda i: searcher._payload_to_result(payloads[i % len(payloads)]), n)
+    results["fetch_candidates"] = bench(
+        lambda i: searcher._fetch_candidates(QUERIES[i % len(QUERIES)], query_filter, 15, 0, None), max(1, n // 10))
+    results["get_events_by_ids_cold"] = bench(
+        lambda i: (searcher.event_cache.clear(), searcher.get_events_by_ids(rng.sample(ids, 20))), max(1, n // 10))
+    results["get_events_by_ids_cached"] = bench(lambda i: searcher.get_events_by_ids(ids[:20]), n)
+    results["search_cached"] = bench(lambda i: searcher.search(QUERIES[i % len(QUERIES)], limit=15), n)
+    results["search_cached_redis_only"] = bench(
+        lambda i: (searcher.result_cache.l1.clear(), searcher.search(QUERIES[i % len(QUERIES)], limit=15)), n)
+    results["search_uncached"] = bench(
+        lambda i: (searcher.redis_client.flushall(), searcher.result_cache.l1.clear(), searcher.search(QUERIES[i % len(QUERIES)], limit=15)), max(1, n // 10))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Search service micro-benchmarks")
+    parser.add_argument("--events", type=int, default=5000, help="Synthetic corpus size")
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--embedder", choices=["hash", "fastembed"], default="hash",
+                        help="hash: deterministic stand-in; fastembed: the real ONNX model (needs fastembed)")
+    parser.add_argument("--output", help="Result file (default: benchmarks/results/micro-<sha>-<time>.json)")
+    args = parser.parse_args()
+
+    results = run(args)
+    print_table(results)
+    print(f"Saved {save_results('micro', run_meta('micro', args), results, args.output)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+"""
+Local stand-ins for the service's backends, so benchmarks run offline:
+
+- Qdrant: one in-memory local-mode client loaded with a synthetic event corpus,
+  handed to every `QdrantClient(...)` the app constructs.
+- Redis: fakeredis (all clients, including app.redis_pool's shared one, share
+  one fake server).
+- Postgres: SQLite behind psycopg2's pool interface, so DatabasePool's own
+  pool wait and circuit breaker run, with categories, cities and interests tables.
+- Embeddings: a deterministic feature-hashing embedder, unless
+  `embedder="fastembed"` asks for the real ONNX model.
+
+`install()` must run before any `app.*` or `api.*` module is imported, since
+those modules build their clients at import time.
+"""
+import os
+import re
+import random
+import sqlite3
+import hashlib
+import tempfile
+import threading
+from datetime import datetime, timedelta, timezone
+import numpy as np
+
+DENSE_MODEL = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
+VECTOR_SIZE = 384
+
+CITIES = [
+    ("Ho Chi Minh", "Hồ Chí Minh", 10.7769, 106.7009),
+    ("Ha Noi", "Hà Nội", 21.0278, 105.8342),
+    ("Da Nang", "Đà Nẵng", 16.0544, 108.2022),
+    ("Hai Phong", "Hải Phòng", 20.8449, 106.6881),
+    ("Can Tho", "Cần Thơ", 10.0452, 105.7469),
+]
+CATEGORIES = [
+    ("music", "Music", "Âm nhạc"),
+    ("theater", "Theater", "Sân khấu"),
+    ("art", "Art", "Nghệ thuật"),
+    ("sport", "Sport", "Thể thao"),
+    ("workshop", "Workshop", "Hội thảo"),
+    ("food", "Food", "Ẩm thực"),
+    ("nightlife", "Nightlife", "Về đêm"),
+    ("other", "Other", "Khác"),
+]
+WORDS = [
+    "đêm", "nhạc", "jazz", "rock", "acoustic", "hòa", "tấu", "giao", "hưởng", "lễ", "hội",
+    "ẩm", "thực", "đường", "phố", "triển", "lãm", "tranh", "kịch", "hài", "múa", "rối",
+    "nước", "marathon", "bóng", "đá", "workshop", "gốm", "cà", "phê", "rượu", "vang",
+    "live", "show", "concert", "festival", "mùa", "hè", "thu", "xuân", "sài", "gòn", "hà", "nội",
+]
+PRICES = [0, 0, 50000, 100000, 150000, 200000, 350000, 500000, 800000, 1500000]
+
+
+class HashEmbedding:
+    """
+    Deterministic stand-in for the fastembed TextEmbedding API: tokens are hashed
+    into a fixed-size vector. Similar texts share tokens and so score higher, which
+    is all the ranking code needs; it costs microseconds instead of a model run.
+    """
+
+    def __init__(self, size: int = VECTOR_SIZE):
+        self.size = size
+
+    def _vector(self, text: str):
+        vector = np.zeros(self.size, dtype=np.float32)
+        for token in re.findall(r"\w+", text.lower()):
+            digest = hashlib.blake2b(token.encode(), digest_size=8).digest()
+            index = int.from_bytes(digest[:4], "little") % self.size
+            vector[index] += 1.0 if digest[4] & 1 else -1.0
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def embed(self, documents, batch_size: int = 256, parallel=None, **kwargs):
+        if isinstance(documents, str):
+            documents = [documents]
+        for document in documents:
+            yield self._vector(document)
+
+    query_embed = embed
+    passage_embed = embed
+
+
+def _geohash_payload(lat, lon):
+    # Mirrors app.map_clusters.geohash_payload, which cannot be imported before install()
+    from app import geohash
+    cell = geohash.encode(lat, lon, 8)
+    return {f"geohash{precision}": cell[:precision] for precision in range(1, 9)}
+
+
+def synthetic_events(count: int, seed: int = 42):
+    """`count` events shaped like the payloads jobs/upload_events.py writes"""
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc).replace(hour=19, minute=0, second=0, microsecond=0)
+    events = []
+    for event_id in range(1, count + 1):
+        city_en, city_vi, lat, lon = rng.choice(CITIES)
+        categories = rng.sample([code for code, _, _ in CATEGORIES], rng.randint(1, 3))
+        name = " ".join(rng.choice(WORDS) for _ in range(rng.randint(2, 6))).title()
+        description = " ".join(rng.choice(WORDS) for _ in range(rng.randint(10, 40)))
+        shows = sorted(now + timedelta(days=rng.randint(-10, 90), hours=rng.choice([0, 2, 24])) for _ in range(rng.randint(1, 4)))
+        text = f"{name} - {description}. Located at {city_vi}. Categories: {', '.join(categories)}"
+        location = {"lat": lat + rng.uniform(-0.08, 0.08), "lon": lon + rng.uniform(-0.08, 0.08)}
+        events.append({
+            "id": event_id,
+            "eventName": name,
+            "eventDescription": description,
+            "city": city_en.lower(),
+            "district": None,
+            "ward": None,
+            "street": None,
+            "categories": categories,
+            "eventLogoUrl": f"https://example.com/{event_id}.png",
+            "minimumPrice": float(rng.choice(PRICES)),
+            "startTime": shows[0].timestamp(),
+            "startTimes": [show.timestamp() for show in shows],
+            "text": text,
+            "location": location,
+            "formattedAddress": None,
+            "placeId": None,
+            **_geohash_payload(location["lat"], location["lon"]),
+            "document": text,
+        })
+    return events
+
+
+class _SqliteCursor:
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def execute(self, sql, params=()):
+        self._cursor.execute(sql.replace("%s", "?"), params)
+
+    def fetchall(self):
+        columns = [c[0] for c in self._cursor.description]
+        return [dict(zip(columns, row)) for row in self._cursor.fetchall()]
+
+    def fetchone(self):
+        rows = self.fetchall()
+        return rows[0] if rows else None
+
+    def close(self):
+        self._cursor.close()
+
+
+class _SqliteConnection:
+    def __init__(self, path):
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+
+    def cursor(self, cursor_factory=None, name=None):
+        return _SqliteCursor(self._conn.cursor())
+
+    def commit(self):
+        self._conn.commit()
+
+    def close(self):
+        self._conn.close()
+
+
+class SqlitePool:
+    """psycopg2 ThreadedConnectionPool look-alike over a temporary SQLite file"""
+
+    def __init__(self, interests_per_user: int = 20, users: int = 100, event_count: int = 0, seed: int = 42,
+                 maxconn: int = 20):
+        self.maxconn = maxconn
+        self.path = os.path.join(tempfile.mkdtemp(prefix="search-bench-"), "bench.db")
+        self._local = threading.local()
+        rng = random.Random(seed)
+        conn = sqlite3.connect(self.path)
+        conn.executescript("""
+            CREATE TABLE categories (id INTEGER PRIMARY KEY, code TEXT, name_en TEXT, name_vi TEXT, image TEXT);
+            CREATE TABLE cities (id INTEGER PRIMARY KEY, origin_id INTEGER, name TEXT, name_en TEXT, status INTEGER, sort INTEGER);
+            CREATE TABLE interests (user_id TEXT, event_id INTEGER);
+            CREATE INDEX interests_user ON interests (user_id);
+        """)
+        conn.executemany("INSERT INTO categories (code, name_en, name_vi, image) VALUES (?, ?, ?, '')", CATEGORIES)
+        conn.executemany(
+            "INSERT INTO cities (origin_id, name, name_en, status, sort) VALUES (?, ?, ?, 1, ?)",
+            [(i + 1, vi, en, i) for i, (en, vi, _, _) in enumerate(CITIES)]
+        )
+        if event_count:
+            conn.executemany(
+                "INSERT INTO interests (user_id, event_id) VALUES (?, ?)",
+                [(f"user-{u}", rng.randint(1, event_count)) for u in range(users) for _ in range(interests_per_user)]
+            )
+        conn.commit()
+        conn.close()
+
+    def getconn(self):
+        return _SqliteConnection(self.path)
+
+    def putconn(self, conn, close=False):
+        conn.close()
+
+
+class StandIns:
+    def __init__(self, qdrant_client, pool, events, embedder):
+        self.qdrant_client = qdrant_client
+        self.pool = pool
+        self.events = events
+        self.embedder = embedder
+
+
+def install(events: int = 5000, seed: int = 42, embedder: str = "hash", collection: str = "events") -> StandIns:
+    """Patch the backend constructors and load the synthetic corpus; call before importing the app"""
+    import redis
+    import fakeredis
+    import qdrant_client
+    from qdrant_client import models
+
+    os.environ["QDRANT_URL"] = ":memory:"
+    os.environ["EVENTS_COLLECTION"] = collection
+    os.environ.setdefault("JWT_SECRET_KEY", "benchmark")
+
+    if embedder == "hash":
+        model = HashEmbedding()
+        # set_model() returns an already registered model without importing fastembed
+        qdrant_client.QdrantClient.embedding_models[DENSE_MODEL] = model
+    elif embedder == "fastembed":
+        from fastembed import TextEmbedding
+        model = TextEmbedding(model_name=DENSE_MODEL)
+        qdrant_client.QdrantClient.embedding_models[DENSE_MODEL] = model
+    else:
+        raise ValueError(f"Unknown embedder: {embedder}")
+
+    shared = qdrant_client.QdrantClient(":memory:")
+    shared.set_model(DENSE_MODEL)
+    vector_name = shared.get_vector_field_name()
+    shared.create_collection(
+        collection,
+        vectors_config={vector_name: models.VectorParams(size=VECTOR_SIZE, distance=models.Distance.COSINE)}
+    )
+
+    corpus = synthetic_events(events, seed)
+    vectors = list(model.embed([event["document"] for event in corpus]))
+    for start in range(0, len(corpus), 1000):
+        shared.upsert(collection, [
+            models.PointStruct(id=event["id"], vector={vector_name: vector.tolist()}, payload=event)
+            for event, vector in zip(corpus[start:start + 1000], vectors[start:start + 1000])
+        ])
+
+    # Every client the app builds gets the shared stand-in
+    qdrant_client.QdrantClient = lambda *args, **kwargs: shared
+    redis.Redis = fakeredis.FakeRedis
+
+    # The shared guarded client (circuit breaker included) over a fake connection pool
+    from app import redis_pool
+    fake = fakeredis.FakeRedis(host=redis_pool.REDIS_HOST, port=redis_pool.REDIS_PORT, decode_responses=True)
+    redis_pool._client = redis_pool.GuardedRedis(connection_pool=fake.connection_pool)
+
+    pool = SqlitePool(event_count=events, seed=seed)
+    from app.hybrid_searcher import DatabasePool
+    DatabasePool._pool = pool
+    DatabasePool._instance = None
+
+    return StandIns(shared, pool, corpus, model)
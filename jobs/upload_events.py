@@ -6,10 +6,378 @@ from tqdm import tqdm
 import psycopg2
 from psycopg2.extras import RealDictCursor
 from dotenv import load_dotenv
+import time
+import json
+import argparse
+import redis
 from qdrant_client.http.models import PointIdsList
+from qdrant_client.http import models
+from app.metrics import SYNC_ROWS
+from app.embedding import DENSE_MODEL, EMBEDDING_BATCH_SIZE, configure_model
+from app.tiered_cache import bump_cache_version
+from app.map_clusters import GEOHASH_PRECISIONS, geohash_payload
 
-def main():
+UPSERT_BATCH_SIZE = int(os.getenv("SYNC_UPSERT_BATCH_SIZE", 256))
+# Related events precomputed per event for the detail page (0 disables the table)
+RELATED_TOP_K = int(os.getenv("RELATED_TOP_K", 0))
+RELATED_KEY_PREFIX = "related_events:"
+RELATED_QUERY_BATCH_SIZE = 64
+# Rows fetched per round trip from the server-side cursor
+SYNC_FETCH_SIZE = int(os.getenv("SYNC_FETCH_SIZE", 2000))
+# Searchers query this name; for blue/green rebuilds it is an alias onto a versioned collection
+EVENTS_COLLECTION = os.getenv("EVENTS_COLLECTION", "events")
+# Indexing threshold restored once a rebuilt collection is fully loaded (Qdrant default)
+INDEXING_THRESHOLD = int(os.getenv("QDRANT_INDEXING_THRESHOLD", 20000))
+KEEP_PREVIOUS_VERSIONS = int(os.getenv("KEEP_PREVIOUS_COLLECTION_VERSIONS", 1))
+REBUILD_INDEX_TIMEOUT_SECONDS = int(os.getenv("REBUILD_INDEX_TIMEOUT_SECONDS", 1800))
+
+
+class SyncCancelled(Exception):
+    """Raised between batches when the caller asked the sync to stop"""
+
+
+# One row per event; ticket and show aggregates are computed by Postgres
+# instead of shipping every ticket/show row to Python via giant IN-lists.
+EVENTS_QUERY = """
+    SELECT
+        e.id,
+        e.event_name,
+        e.event_description,
+        e.street,
+        e.categories,
+        e.updated_at,
+        e.event_logo_url,
+        e.latitude,
+        e.longitude,
+        e.formatted_address,
+        e.place_id,
+        c.name AS city_name,
+        c.name_en AS city_name_en,
+        d.name AS district_name,
+        d.name_en AS district_name_en,
+        w.name AS ward_name,
+        w.name_en AS ward_name_en,
+        t.has_free_ticket,
+        t.minimum_price,
+        s.soonest_start_time,
+        s.start_times
+    FROM events e
+    LEFT JOIN cities c ON (e.city_id)::integer = c.origin_id
+    LEFT JOIN districts d ON (e.district_id)::integer = d.origin_id
+    LEFT JOIN wards w ON (e.ward_id)::integer = w.origin_id
+    LEFT JOIN LATERAL (
+        SELECT
+            COALESCE(bool_or(tt.is_free), false) AS has_free_ticket,
+            CASE WHEN bool_or(tt.is_free) THEN 0 ELSE min(tt.price) END AS minimum_price
+        FROM ticket_types tt
+        WHERE tt.event_id = e.id
+    ) t ON true
+    LEFT JOIN LATERAL (
+        SELECT
+            min(sh.start_time) AS soonest_start_time,
+            array_agg(sh.start_time ORDER BY sh.start_time) AS start_times
+        FROM shows sh
+        WHERE sh.event_id = e.id
+    ) s ON true
+    WHERE e.status = 'PUBLISHED' OR e.status = 'UPCOMING'
+"""
+
+
+def snake_to_camel(s):
+    parts = s.split('_')
+    return parts[0] + ''.join(word.capitalize() for word in parts[1:])
+
+
+def dict_keys_to_camel_case(d):
+    if isinstance(d, dict):
+        return {snake_to_camel(k): dict_keys_to_camel_case(v) for k, v in d.items()}
+    elif isinstance(d, list):
+        return [dict_keys_to_camel_case(i) for i in d]
+    else:
+        return d
+
+
+def build_event_document(row):
+    """Turn one aggregated event row into the embedded text and its payload"""
+    categories = row["categories"] or []
+    categories_str = ", ".join(categories)
+
+    location_parts = filter(None, [
+        row.get("street"),
+        row.get("ward_name"),
+        row.get("district_name"),
+        row.get("city_name"),
+    ])
+    location_str = ", ".join(location_parts)
+
+    description = row.get("event_description") or ""
+    text = f"{row['event_name']} - {description}. Located at {location_str}. Categories: {categories_str}"
+
+    lowest_price = row.get("minimum_price")
+    soonest_time = row.get("soonest_start_time")
+    start_times = row.get("start_times") or []
+
+    meta = {
+        "id": row["id"],
+        "eventName": row["event_name"],
+        "eventDescription": row.get("event_description", ""),
+        "city": (row.get("city_name_en") or row.get("city_name") or "").lower(),
+        "district": row.get("district_name_en") or row.get("district_name"),
+        "ward": row.get("ward_name_en") or row.get("ward_name"),
+        "street": row.get("street"),
+        "categories": [cat.lower() for cat in categories],
+        "eventLogoUrl": row.get("event_logo_url"),
+        "minimumPrice": float(lowest_price) if lowest_price is not None else None,
+        "startTime": soonest_time.timestamp() if soonest_time else None,
+        # Every show, so date filters match long-running events on any showing
+        "startTimes": [t.timestamp() for t in start_times if t is not None],
+        "text": text,
+        "location": {
+            "lat": row.get("latitude"),
+            "lon": row.get("longitude"),
+        },
+        "formattedAddress": row.get("formatted_address"),
+        "placeId": row.get("place_id"),
+        # Cells the map clusters facet on
+        **geohash_payload(row.get("latitude"), row.get("longitude")),
+    }
+    return text, dict_keys_to_camel_case(meta)
+
+
+def fetch_point_ids(client, collection_name):
+    """All point ids in the collection, paging through scroll without payloads"""
+    point_ids = set()
+    offset = None
+    while True:
+        points, offset = client.scroll(
+            collection_name=collection_name,
+            limit=1000,
+            offset=offset,
+            with_payload=False,
+            with_vectors=False,
+        )
+        point_ids.update(p.id for p in points)
+        if offset is None:
+            return point_ids
+
+
+def get_redis_client():
+    try:
+        client = redis.Redis(
+            host=os.getenv('REDIS_HOST', 'redis'),
+            port=int(os.getenv('REDIS_PORT', 6379)),
+            decode_responses=True,
+            socket_connect_timeout=5,
+            retry_on_timeout=True
+        )
+        client.ping()
+        return client
+    except Exception as e:
+        print(f"Redis connection failed: {e}. Related events and cache invalidation are skipped.")
+        return None
+
+
+def load_related_watermark(redis_client, alias_name):
+    """Newest events.updated_at covered by the neighbour table, or None if never built"""
+    value = redis_client.get(f"{RELATED_KEY_PREFIX}{alias_name}:synced_at")
+    return datetime.fromisoformat(value) if value else None
+
+
+def save_related_watermark(redis_client, alias_name, updated_at):
+    if updated_at is not None:
+        redis_client.set(f"{RELATED_KEY_PREFIX}{alias_name}:synced_at", updated_at.isoformat())
+
+
+def query_neighbours(client, collection_name, event_ids, check_cancelled):
+    """Top-K nearest events for each id, using stored vectors via batched query-by-id"""
+    vector_name = client.get_vector_field_name()
+    event_ids = list(event_ids)
+    neighbours = {}
+    for start in range(0, len(event_ids), RELATED_QUERY_BATCH_SIZE):
+        check_cancelled()
+        batch = event_ids[start:start + RELATED_QUERY_BATCH_SIZE]
+        responses = client.query_batch_points(
+            collection_name=collection_name,
+            requests=[
+                models.QueryRequest(
+                    query=event_id,
+                    using=vector_name,
+                    filter=models.Filter(must_not=[models.HasIdCondition(has_id=[event_id])]),
+                    limit=RELATED_TOP_K,
+                    with_payload=False,
+                )
+                for event_id in batch
+            ],
+        )
+        for event_id, response in zip(batch, responses):
+            neighbours[event_id] = [point.id for point in response.points]
+    return neighbours
+
+
+def refresh_related_neighbours(client, collection_name, redis_client, alias_name,
+                               changed_ids, deleted_ids, full, check_cancelled):
+    """
+    Maintain the related-events table read by HybridSearcher.get_related_events.
+
+    A full refresh recomputes every event into a temporary key and renames it
+    into place. An incremental refresh recomputes changed events, events whose
+    lists mention a changed or deleted event, and the new neighbours of changed
+    events (whose own rankings may now include them).
+    """
+    key = RELATED_KEY_PREFIX + alias_name
+    if full:
+        neighbours = query_neighbours(client, collection_name, changed_ids, check_cancelled)
+        building_key = f"{key}:building"
+        pipe = redis_client.pipeline()
+        pipe.delete(building_key)
+        items = list(neighbours.items())
+        for start in range(0, len(items), 1000):
+            pipe.hset(building_key, mapping={str(k): json.dumps(v) for k, v in items[start:start + 1000]})
+        if neighbours:
+            pipe.rename(building_key, key)
+        pipe.execute()
+        print(f"Rebuilt related events for {len(neighbours)} events.")
+        return
+
+    deleted = set(deleted_ids)
+    stale = set(changed_ids) | deleted
+    to_refresh = set(changed_ids)
+    if stale:
+        for field, value in redis_client.hscan_iter(key):
+            if stale.intersection(json.loads(value)):
+                to_refresh.add(int(field) if field.isdigit() else field)
+    to_refresh -= deleted
+
+    neighbours = query_neighbours(client, collection_name, to_refresh, check_cancelled)
+    second_hop = {n for event_id in changed_ids for n in neighbours.get(event_id, [])} - to_refresh - deleted
+    neighbours.update(query_neighbours(client, collection_name, second_hop, check_cancelled))
+
+    pipe = redis_client.pipeline()
+    if neighbours:
+        pipe.hset(key, mapping={str(k): json.dumps(v) for k, v in neighbours.items()})
+    if deleted:
+        pipe.hdel(key, *[str(i) for i in deleted])
+    pipe.execute()
+    print(f"Refreshed related events for {len(neighbours)} events.")
+
+
+def resolve_alias(client, alias_name):
+    """Return the collection an alias points to, or None if it is not an alias"""
+    for alias in client.get_aliases().aliases:
+        if alias.alias_name == alias_name:
+            return alias.collection_name
+    return None
+
+
+def list_versions(client, alias_name):
+    """Versioned collections built for this alias, oldest first"""
+    prefix = f"{alias_name}_v"
+    return sorted(c.name for c in client.get_collections().collections if c.name.startswith(prefix))
+
+
+def create_versioned_collection(client, alias_name):
+    """
+    Create a fresh collection for a full rebuild with HNSW indexing deferred.
+    indexing_threshold=0 keeps every segment unindexed during the bulk load so
+    the graph is built once at the end instead of continuously during upserts.
+    """
+    collection_name = f"{alias_name}_v{datetime.now(UTC).strftime('%Y%m%d%H%M%S')}"
+    client.create_collection(
+        collection_name=collection_name,
+        vectors_config=client.get_fastembed_vector_params(),
+        sparse_vectors_config=client.get_fastembed_sparse_vector_params(),
+        optimizers_config=models.OptimizersConfigDiff(indexing_threshold=0),
+    )
+    print(f"Created rebuild collection '{collection_name}' with indexing deferred.")
+    return collection_name
+
+
+def build_index_and_wait(client, collection_name, check_cancelled):
+    """Re-enable indexing and wait until the optimizer has built the HNSW index"""
+    client.update_collection(
+        collection_name=collection_name,
+        optimizers_config=models.OptimizersConfigDiff(indexing_threshold=INDEXING_THRESHOLD),
+    )
+    deadline = time.monotonic() + REBUILD_INDEX_TIMEOUT_SECONDS
+    while client.get_collection(collection_name).status != models.CollectionStatus.GREEN:
+        check_cancelled()
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"Index build for '{collection_name}' did not finish in {REBUILD_INDEX_TIMEOUT_SECONDS}s")
+        time.sleep(2)
+    print(f"Index built for '{collection_name}'.")
+
+
+def switch_alias(client, alias_name, collection_name):
+    """Atomically point the alias at `collection_name`"""
+    previous = resolve_alias(client, alias_name)
+    if previous is None and client.collection_exists(alias_name):
+        # One-time migration: a plain collection holds the alias name and must go
+        # before the alias can be created. This is the only non-atomic switch.
+        print(f"Dropping legacy collection '{alias_name}' to replace it with an alias.")
+        client.delete_collection(alias_name)
+
+    operations = []
+    if previous is not None:
+        operations.append(models.DeleteAliasOperation(delete_alias=models.DeleteAlias(alias_name=alias_name)))
+    operations.append(models.CreateAliasOperation(
+        create_alias=models.CreateAlias(collection_name=collection_name, alias_name=alias_name)
+    ))
+    client.update_collection_aliases(change_aliases_operations=operations)
+    print(f"Alias '{alias_name}' now points to '{collection_name}' (previously {previous}).")
+    return previous
+
+
+def prune_versions(client, alias_name):
+    """Keep the live collection plus KEEP_PREVIOUS_VERSIONS older ones for rollback"""
+    live = resolve_alias(client, alias_name)
+    older = [name for name in list_versions(client, alias_name) if name != live and (live is None or name < live)]
+    for name in older[:max(0, len(older) - KEEP_PREVIOUS_VERSIONS)]:
+        client.delete_collection(name)
+        print(f"Deleted old collection version '{name}'.")
+
+
+def invalidate_search_caches(redis_client=None):
+    """Retire cached search results in every API process, in both cache tiers"""
+    redis_client = redis_client or get_redis_client()
+    if redis_client is None:
+        return
+    try:
+        print(f"Search cache generation is now {bump_cache_version(redis_client)}.")
+    except Exception as e:
+        print(f"Failed to invalidate search caches: {e}")
+
+
+def rollback(alias_name=EVENTS_COLLECTION):
+    """Point the alias back at the newest collection version older than the live one"""
+    load_dotenv()
+    client = QdrantClient(url=os.getenv("QDRANT_URL"), api_key=os.getenv("QDRANT_API_KEY"))
+    live = resolve_alias(client, alias_name)
+    candidates = [name for name in list_versions(client, alias_name) if live is None or name < live]
+    if not candidates:
+        raise RuntimeError(f"No previous version of '{alias_name}' to roll back to")
+    switch_alias(client, alias_name, candidates[-1])
+    invalidate_search_caches()
+    return candidates[-1]
+
+
+def main(progress=None, should_cancel=None, full_rebuild=False):
+    """
+    Sync published events from Postgres into Qdrant.
+
+    Args:
+        progress: Optional callback receiving absolute counters
+            (rows_read, rows_embedded, rows_upserted, rows_deleted)
+        should_cancel: Optional callable; when it returns True the sync stops
+            at the next checkpoint by raising SyncCancelled
+        full_rebuild: Load into a new versioned collection and switch the
+            alias when it is fully indexed, instead of updating in place
+    """
     VECTOR_NAME = "dense"
+    progress = progress or (lambda **counters: None)
+
+    def check_cancelled():
+        if should_cancel and should_cancel():
+            raise SyncCancelled("Sync cancelled by request")
 
     # Load .env config
     load_dotenv()
@@ -19,8 +387,9 @@ def main():
         url=os.getenv("QDRANT_URL"),
         api_key=os.getenv("QDRANT_API_KEY")
     )
-    client.set_model("sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2")
-    collection_name = "events"
+    configure_model(client, DENSE_MODEL)
+    alias_name = EVENTS_COLLECTION
+    collection_name = resolve_alias(client, alias_name) or alias_name
 
     def load_last_sync_time_qdrant():
         try:
@@ -60,67 +429,12 @@ def main():
         password=os.getenv("DATABASE_PASSWORD"),
         dbname=os.getenv("DATABASE_NAME")
     )
-    cursor = conn.cursor(cursor_factory=RealDictCursor)
-
-    # Get updated or new events
-    cursor.execute("""
-        SELECT 
-            e.id,
-            e.event_name,
-            e.event_description,
-            e.street,
-            e.categories,
-            e.updated_at,
-            e.event_logo_url,
-            e.latitude,
-            e.longitude,
-            e.formatted_address,
-            e.place_id,
-            c.name AS city_name,
-            c.name_en AS city_name_en,
-            d.name AS district_name,
-            d.name_en AS district_name_en,
-            w.name AS ward_name,
-            w.name_en AS ward_name_en
-        FROM events e
-        WHERE e.status = 'PUBLISHED' or e.status = 'UPCOMING'
-        LEFT JOIN cities c ON (e.city_id)::integer = c.origin_id
-        LEFT JOIN districts d ON (e.district_id)::integer = d.origin_id
-        LEFT JOIN wards w ON (e.ward_id)::integer = w.origin_id
-    """)
-
-    rows = cursor.fetchall()
-
-    # Also fetch ticket type and showtime info for all relevant events
-    event_ids = tuple(row["id"] for row in rows)
-    ticket_data = {}
-    showtime_data = {}
-
-    if event_ids:
-        # Get ticket prices & free status
-        cursor.execute("""
-            SELECT event_id, is_free, price
-            FROM ticket_types
-            WHERE event_id IN %s;
-        """, (event_ids,))
-        for ticket in cursor.fetchall():
-            event_id = ticket["event_id"]
-            ticket_data.setdefault(event_id, []).append(ticket)
-
-        # Get showtimes
-        cursor.execute("""
-            SELECT event_id, start_time
-            FROM shows
-            WHERE event_id IN %s;
-        """, (event_ids,))
-        for show in cursor.fetchall():
-            event_id = show["event_id"]
-            showtime_data.setdefault(event_id, []).append(show["start_time"])
-
-    conn.close()
 
     # Ensure collection exists
-    if not client.collection_exists(collection_name):
+    if full_rebuild:
+        # Blue/green: the live collection keeps serving untouched until the switch
+        collection_name = create_versioned_collection(client, alias_name)
+    elif not client.collection_exists(collection_name):
         client.create_collection(
             collection_name=collection_name,
             vectors_config=client.get_fastembed_vector_params(),
@@ -133,8 +447,11 @@ def main():
             ("categories", "keyword"),
             ("city", "keyword"),
             ("startTime", "float"),
+            ("startTimes", "float"),  # ✅ Array of all show times for date range filters and sort=date
+            ("minimumPrice", "float"),  # ✅ Price filters and sort=price
             ("text", "text"),  # ✅ For BM25 search support
-            ("location", "geo")  # ✅ For efficient geo bounding box queries
+            ("location", "geo"),  # ✅ For efficient geo bounding box queries
+            *((f"geohash{precision}", "keyword") for precision in GEOHASH_PRECISIONS)  # ✅ Map cluster facets
         ]
         for field_name, schema in index_fields:
             try:
@@ -149,107 +466,120 @@ def main():
     except Exception as e:
         print(f"Failed to create payload indexes: {e}")
 
-    # Fetch existing IDs in Qdrant
-    existing_qdrant_ids = set()
-    scroll = client.scroll(collection_name=collection_name, limit=1000)
-    existing_qdrant_ids.update(p.id for p in scroll[0])
+    # Optional related-events neighbour table; only events changed since the last
+    # refresh (and events that listed them as neighbours) are recomputed
+    related_redis = get_redis_client() if RELATED_TOP_K > 0 else None
+    related_watermark = load_related_watermark(related_redis, alias_name) if related_redis else None
+    refresh_all_related = full_rebuild or related_watermark is None
+    changed_ids = set()
+    max_updated_at = related_watermark
 
-    # Determine deleted IDs
-    db_ids = set(row["id"] for row in rows)
-    deleted_ids = list(existing_qdrant_ids - db_ids)
+    try:
+        # Stream one pre-aggregated row per event through a server-side cursor and
+        # upsert batch by batch, so memory stays flat regardless of catalogue size
+        db_ids = set()
+        upserted = 0
+        try:
+            cursor = conn.cursor(name="events_sync", cursor_factory=RealDictCursor)
+            cursor.itersize = SYNC_FETCH_SIZE
+            cursor.execute(EVENTS_QUERY)
 
-    # Delete removed events
-    if deleted_ids:
-        client.delete(
-            collection_name=collection_name,
-            points_selector=PointIdsList(points=deleted_ids)
-        )
-        print(f"Deleted {len(deleted_ids)} events from Qdrant (no longer in DB).")
-
-    # Prepare data for upserting
-    documents = []
-    metadata = []
-    ids = []
-
-    def snake_to_camel(s):
-        parts = s.split('_')
-        return parts[0] + ''.join(word.capitalize() for word in parts[1:])
-
-    def dict_keys_to_camel_case(d):
-        if isinstance(d, dict):
-            return {snake_to_camel(k): dict_keys_to_camel_case(v) for k, v in d.items()}
-        elif isinstance(d, list):
-            return [dict_keys_to_camel_case(i) for i in d]
-        else:
-            return d
-
-    i = 0
-    for row in rows:
-        event_id = row["id"]
-        categories = row["categories"] or []
-        categories_str = ", ".join(categories)
-
-        location_parts = filter(None, [
-            row.get("street"),
-            row.get("ward_name"),
-            row.get("district_name"),
-            row.get("city_name"),
-        ])
-        location_str = ", ".join(location_parts)
-
-        description = row.get("event_description") or ""
-        text = f"{row['event_name']} - {description}. Located at {location_str}. Categories: {categories_str}"
-
-        # Calculate lowest price
-        tickets = ticket_data.get(event_id, [])
-        has_free_ticket = any(t["is_free"] for t in tickets)
-        lowest_price = 0 if has_free_ticket else (
-            min((t["price"] for t in tickets if t["price"] is not None), default=None)
-        )
+            documents, metadata, ids = [], [], []
 
-        # Calculate soonest start_time
-        start_times = showtime_data.get(event_id, [])
-        soonest_time = min(start_times) if start_times else None
-        soonest_time_float = soonest_time.timestamp() if soonest_time else None
-
-        i += 1
-        print(i, start_times, soonest_time_float)
-        print(i, lowest_price)
-
-        documents.append(text)
-        meta = {
-            "id": event_id,
-            "eventName": row["event_name"],
-            "eventDescription": row.get("event_description", ""),
-            "city": (row.get("city_name_en") or row.get("city_name") or "").lower(),
-            "district": row.get("district_name_en") or row.get("district_name"),
-            "ward": row.get("ward_name_en") or row.get("ward_name"),
-            "street": row.get("street"),
-            "categories": [cat.lower() for cat in row.get("categories", [])],
-            "eventLogoUrl": row.get("event_logo_url"),
-            "minimumPrice": lowest_price,
-            "startTime": soonest_time_float,
-            "text": text,
-            "location": {
-                "lat": row.get("latitude"),
-                "lon": row.get("longitude"),
-            },
-            "formattedAddress": row.get("formatted_address"),
-            "placeId": row.get("place_id"),
-        }
-        meta_camel = dict_keys_to_camel_case(meta)
-        metadata.append(meta_camel)
-        ids.append(event_id)
-
-    # Upsert events
-    if documents:
-        client.add(
-            collection_name=collection_name,
-            documents=documents,
-            metadata=metadata,
-            ids=tqdm(ids),
-        )
-        print(f"Upserted {len(documents)} events into Qdrant.")
+            def flush():
+                nonlocal upserted
+                check_cancelled()
+                client.add(
+                    collection_name=collection_name,
+                    documents=documents,
+                    metadata=metadata,
+                    ids=ids,
+                    batch_size=EMBEDDING_BATCH_SIZE,
+                )
+                upserted += len(ids)
+                SYNC_ROWS.labels("upserted").inc(len(ids))
+                progress(rows_read=len(db_ids), rows_embedded=upserted, rows_upserted=upserted)
+                documents.clear()
+                metadata.clear()
+                ids.clear()
+
+            for row in tqdm(cursor):
+                SYNC_ROWS.labels("read").inc()
+                text, meta = build_event_document(row)
+                db_ids.add(row["id"])
+                updated_at = row.get("updated_at")
+                if updated_at is not None:
+                    if not refresh_all_related and updated_at > related_watermark:
+                        changed_ids.add(row["id"])
+                    if max_updated_at is None or updated_at > max_updated_at:
+                        max_updated_at = updated_at
+                documents.append(text)
+                metadata.append(meta)
+                ids.append(row["id"])
+                if len(ids) >= UPSERT_BATCH_SIZE:
+                    flush()
+            if ids:
+                flush()
+            cursor.close()
+        finally:
+            conn.close()
+        progress(rows_read=len(db_ids))
+        print(f"Upserted {upserted} events into Qdrant.")
+
+        # Delete removed events (a rebuild collection only holds current rows)
+        deleted_ids = []
+        if not full_rebuild:
+            check_cancelled()
+            deleted_ids = list(fetch_point_ids(client, collection_name) - db_ids)
+            if deleted_ids:
+                client.delete(
+                    collection_name=collection_name,
+                    points_selector=PointIdsList(points=deleted_ids)
+                )
+                print(f"Deleted {len(deleted_ids)} events from Qdrant (no longer in DB).")
+                SYNC_ROWS.labels("deleted").inc(len(deleted_ids))
+            progress(rows_deleted=len(deleted_ids))
+
+        if full_rebuild:
+            # Build HNSW once over the complete data set, then go live atomically
+            build_index_and_wait(client, collection_name, check_cancelled)
+
+        if related_redis:
+            try:
+                refresh_related_neighbours(
+                    client, collection_name, related_redis, alias_name,
+                    db_ids if refresh_all_related else changed_ids,
+                    deleted_ids, refresh_all_related, check_cancelled
+                )
+                save_related_watermark(related_redis, alias_name, max_updated_at)
+            except SyncCancelled:
+                raise
+            except Exception as e:
+                # The table is an optimization; searches fall back to live queries
+                print(f"Failed to refresh related events table: {e}")
+
+        if full_rebuild:
+            switch_alias(client, alias_name, collection_name)
+    except BaseException:
+        if full_rebuild:
+            # Never leave a half-built version behind; the live alias is untouched
+            client.delete_collection(collection_name)
+            print(f"Dropped incomplete rebuild collection '{collection_name}'.")
+        raise
+
+    invalidate_search_caches(related_redis)
+
+    if full_rebuild:
+        prune_versions(client, alias_name)
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Sync events from Postgres into Qdrant")
+    parser.add_argument("--full-rebuild", action="store_true",
+                        help="Load into a new collection version and switch the alias when indexed")
+    parser.add_argument("--rollback", action="store_true",
+                        help="Point the alias back at the previous collection version")
+    args = parser.parse_args()
+    if args.rollback:
+        print(f"Rolled back to '{rollback()}'.")
+    else:
+        main(full_rebuild=args.full_rebuild)
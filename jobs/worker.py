@@ -0,0 +1,160 @@
+"""
+Background worker for indexing jobs.
+
+Runs outside the API process so a reindex never competes with live search for
+CPU. Start it with:
+
+    python -m jobs.worker
+"""
+import os
+import time
+import uuid
+import socket
+import logging
+import signal
+import threading
+from datetime import datetime, timezone
+from dotenv import load_dotenv
+from prometheus_client import start_http_server
+from app.job_queue import JobQueue, JobCancelled, LOCK_TTL_SECONDS, WORKER_TTL_SECONDS
+from app.metrics import JOBS, JOB_SECONDS
+from jobs import upload_events
+
+load_dotenv()
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger("jobs.worker")
+
+JOB_RUNNERS = {
+    "events_upload": upload_events.main,
+}
+
+# Prometheus exporter for job and sync counters; 0 disables it
+METRICS_PORT = int(os.getenv("WORKER_METRICS_PORT", 9100))
+
+_shutdown = threading.Event()
+
+
+def _keep_lock_alive(queue: JobQueue, job_type: str, job_id: str, done: threading.Event):
+    """Extend the run lock while the job is alive so a crash frees it within one TTL"""
+    while not done.wait(LOCK_TTL_SECONDS / 3):
+        if not queue.extend_lock(job_type, job_id):
+            logger.warning(f"Lost run lock for {job_type} while running job {job_id}")
+            return
+
+
+def _keep_worker_alive(queue: JobQueue, worker_id: str):
+    """Refresh the worker heartbeat; once it lapses other workers reclaim this one's jobs"""
+    while not _shutdown.wait(WORKER_TTL_SECONDS / 3):
+        try:
+            queue.heartbeat(worker_id)
+        except Exception as e:
+            logger.warning(f"Worker heartbeat failed: {e}")
+
+
+def run_job(queue: JobQueue, job_id: str, worker_id: str):
+    job = queue.get(job_id)
+    if not job:
+        logger.warning(f"Job {job_id} vanished before it could run")
+        return
+
+    if job["status"] in ("completed", "failed", "cancelled"):
+        return
+
+    job_type = job["type"]
+    runner = JOB_RUNNERS.get(job_type)
+    if runner is None:
+        queue.finish(job_id, job_type, "failed", error=f"Unknown job type: {job_type}")
+        return
+
+    if job["cancel_requested"]:
+        queue.finish(job_id, job_type, "cancelled")
+        logger.info(f"Job {job_id} cancelled before start")
+        return
+
+    # Only one job per type may run; wait for the current holder instead of failing
+    while not queue.acquire_lock(job_type, job_id):
+        if _shutdown.wait(5):
+            queue.requeue(job_id, worker_id)
+            return
+        if queue.is_cancel_requested(job_id):
+            queue.finish(job_id, job_type, "cancelled")
+            return
+
+    done = threading.Event()
+    threading.Thread(target=_keep_lock_alive, args=(queue, job_type, job_id, done), daemon=True).start()
+    started = time.monotonic()
+    outcome = "failed"
+    try:
+        logger.info(f"Starting {job_type} job {job_id}")
+        queue.update(job_id, status="running", started_at=datetime.now(timezone.utc).isoformat())
+        runner(
+            progress=lambda **counters: queue.report_progress(job_id, **counters),
+            should_cancel=lambda: _shutdown.is_set() or queue.is_cancel_requested(job_id),
+            **job["params"],
+        )
+        queue.finish(job_id, job_type, "completed",
+                     result={"status": "success", "message": "Events upload job completed successfully"})
+        outcome = "completed"
+        logger.info(f"Completed {job_type} job {job_id}")
+    except (JobCancelled, upload_events.SyncCancelled):
+        if queue.is_cancel_requested(job_id):
+            queue.finish(job_id, job_type, "cancelled")
+            logger.info(f"Cancelled {job_type} job {job_id}")
+            outcome = "cancelled"
+        else:
+            # Interrupted by worker shutdown: hand it to the next worker
+            queue.update(job_id, status="pending")
+            queue.requeue(job_id, worker_id)
+            logger.info(f"Requeued {job_type} job {job_id} after shutdown")
+            outcome = "requeued"
+    except Exception as e:
+        error_msg = f"Error running upload events job: {str(e)}"
+        logger.error(error_msg, exc_info=True)
+        queue.finish(job_id, job_type, "failed", error=error_msg)
+    finally:
+        done.set()
+        queue.release_lock(job_type, job_id)
+        JOBS.labels(job_type, outcome).inc()
+        JOB_SECONDS.labels(job_type).observe(time.monotonic() - started)
+
+
+def main():
+    queue = JobQueue()
+    worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+    def handle_signal(signum, frame):
+        logger.info("Shutdown requested, finishing at the next checkpoint")
+        _shutdown.set()
+
+    signal.signal(signal.SIGTERM, handle_signal)
+    signal.signal(signal.SIGINT, handle_signal)
+
+    if METRICS_PORT:
+        start_http_server(METRICS_PORT)
+    queue.heartbeat(worker_id)
+    threading.Thread(target=_keep_worker_alive, args=(queue, worker_id), daemon=True).start()
+    logger.info(f"Job worker {worker_id} started")
+    last_reap = float("-inf")
+    while not _shutdown.is_set():
+        try:
+            if time.monotonic() - last_reap >= WORKER_TTL_SECONDS:
+                last_reap = time.monotonic()
+                requeued = queue.reap_dead_workers()
+                if requeued:
+                    logger.info(f"Requeued {requeued} jobs taken by dead workers")
+            job_id = queue.dequeue(worker_id, timeout=5)
+        except Exception as e:
+            logger.warning(f"Failed to read job queue: {e}")
+            _shutdown.wait(5)
+            continue
+        if job_id:
+            run_job(queue, job_id, worker_id)
+            try:
+                queue.ack(worker_id, job_id)
+            except Exception as e:
+                # Left on the processing list; the reaper drops it once this worker is gone
+                logger.warning(f"Failed to acknowledge job {job_id}: {e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,5 @@
-from fastapi import FastAPI
+import time
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from api.getRelatedEvents import router as get_related_events_router
 from api.search.semanticSearch import router as search_router
@@ -6,11 +7,26 @@ from api.search.searchMetadata import router as search_metadata_router
 from api.search.events_this_month import router as events_this_month_router
 from api.search.events_this_week import router as events_this_week_router
 from api.search.events_by_categories import router as events_by_categories_router
+from api.search.voiceSearch import router as voice_search_router
+from api.search.mapClusters import router as map_clusters_router
+from api.search.suggest import router as suggest_router
 from api.speech import router as speech_router
 from api.chat import router as chat_router
 from api.upload_events import router as upload_events_router
+from api.metrics import router as metrics_router
+from app.metrics import REQUEST_SECONDS
+from app.backends import install_unavailable_handlers
+from app.tracing import TRACING_ENABLED, configure_tracing, server_span
+from app.reference_data import reference_data
+from app.suggest import suggest_index
+from app.query_log import query_log
+from api.search.semanticSearch import prewarm_queries
 
 app = FastAPI()
+install_unavailable_handlers(app)
+
+if TRACING_ENABLED:
+    configure_tracing()
 
 app.add_middleware(
     CORSMiddleware,
@@ -27,9 +43,46 @@ app.include_router(search_metadata_router, prefix="/api/search")
 app.include_router(events_this_month_router, prefix="/api/search")
 app.include_router(events_this_week_router, prefix="/api/search")
 app.include_router(events_by_categories_router, prefix="/api/search")
+app.include_router(voice_search_router, prefix="/api/search")
+app.include_router(map_clusters_router, prefix="/api/search")
+app.include_router(suggest_router, prefix="/api/search")
 app.include_router(speech_router, prefix="/api")
 app.include_router(chat_router, prefix="/api")
 app.include_router(upload_events_router)
+app.include_router(metrics_router)
+
+@app.middleware("http")
+async def record_request_latency(request: Request, call_next):
+    start = time.perf_counter()
+    status = 500
+    with server_span(f"{request.method} {request.url.path}", request.headers) as request_span:
+        try:
+            response = await call_next(request)
+            status = response.status_code
+            return response
+        finally:
+            # Label by route template (/events/{event_id}/related), not the raw path
+            route = request.scope.get("route")
+            route_path = route.path if route else "unmatched"
+            REQUEST_SECONDS.labels(request.method, route_path, str(status)).observe(time.perf_counter() - start)
+            request_span.update_name(f"{request.method} {route_path}")
+            request_span.set_attribute("http.status_code", status)
+
+@app.on_event("startup")
+def load_reference_data():
+    # Categories and cities are served from memory and refreshed in the background
+    reference_data.start()
+    # Popular queries feed trending keywords, typeahead and cache pre-warming
+    query_log.start(prewarm=prewarm_queries)
+    suggest_index.query_source = query_log.top_queries
+    # Typeahead index is built in the background once reference data is loaded
+    suggest_index.start()
+
+@app.on_event("shutdown")
+def stop_reference_data():
+    reference_data.stop()
+    suggest_index.stop()
+    query_log.stop()
 
 if __name__ == "__main__":
     import uvicorn